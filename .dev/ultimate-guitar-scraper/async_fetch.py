@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Async fetch engine for the tab scrapers.
+
+Fetches many URLs concurrently while staying polite: each host's request
+rate and concurrency are run by an adaptive controller (rate_control.py)
+that ramps up while the host is healthy, backs off on 429/503 and honours
+Retry-After; transient failures are retried with jittered backoff. Results
+are handed to a callback as soon as each page arrives, so callers never
+have to hold the whole corpus in memory.
+
+Requirements:
+    pip install aiohttp
+"""
+
+import asyncio
+import inspect
+
+import aiohttp
+
+from http_cache import CacheMiss
+from rate_control import RateControl
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class AsyncFetcher:
+    def __init__(self, max_per_host=4, rate=2.0, burst=4, timeout=10, headers=None, cache=None,
+                 rate_control=None):
+        """
+        Initialize the fetcher.
+
+        Args:
+            max_per_host: Starting number of concurrent requests against a single host
+            rate: Starting requests per second per host
+            burst: Number of requests that may be sent back-to-back
+            timeout: Total timeout per request in seconds
+            headers: Extra request headers (defaults to a browser user agent)
+            cache: Optional http_cache.ResponseCache used to skip or revalidate downloads
+            rate_control: Optional rate_control.RateControl (built from the values above if omitted)
+        """
+        self.max_per_host = max_per_host
+        self.rate_control = rate_control or RateControl(rate=rate, concurrency=max_per_host, burst=burst)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.headers = dict(DEFAULT_HEADERS)
+        if headers:
+            self.headers.update(headers)
+        self.cache = cache
+
+    async def fetch(self, session, url, raw=False):
+        """Fetch a single URL and return its body as text (`raw`: the undecoded bytes)."""
+        cache = self.cache
+        cached = cache.get(url) if cache else None
+        if cached is not None and cache.is_fresh(cached):
+            cache.stats['hits'] += 1
+            return cached.body if raw else cached.text
+        if cache and cache.offline:
+            cache.stats['misses'] += 1
+            raise CacheMiss(f"Not in cache (offline mode): {url}")
+
+        request_headers = cache.conditional_headers(cached) if cache else {}
+
+        async def request():
+            async with session.get(url, headers=request_headers) as response:
+                if response.status == 304 and cached is not None:
+                    cache.stats['revalidated'] += 1
+                    revalidated = cache.mark_revalidated(cached)
+                    return revalidated.body if raw else revalidated.text
+
+                response.raise_for_status()
+                if not cache:
+                    return await response.read() if raw else await response.text()
+
+                cache.stats['misses'] += 1
+                stored = cache.put(
+                    url,
+                    await response.read(),
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                )
+                return stored.body if raw else stored.text
+
+        # Paced, limited and retried per host
+        return await self.rate_control.call(url, request)
+
+    async def fetch_all(self, urls, on_result, workers=None, raw=False):
+        """
+        Fetch every URL and call `on_result(index, url, body, error)` per page.
+
+        `body` is None when the fetch failed, in which case `error` holds the
+        exception; with `raw` it is the undecoded bytes. `on_result` may be a
+        coroutine function: awaiting it holds back only that worker, so it
+        can apply backpressure without stalling the event loop. Worker tasks
+        pull from a shared queue, so the number of pending coroutines stays
+        bounded no matter how long the URL list is.
+        """
+        if workers is None:
+            # Enough workers for the controller to ramp up to its ceiling
+            workers = self.rate_control.max_concurrency
+
+        queue = asyncio.Queue(maxsize=workers * 2)
+
+        async def worker(session):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    queue.task_done()
+                    return
+                index, url = item
+                body, error = None, None
+                try:
+                    body = await self.fetch(session, url, raw=raw)
+                except Exception as e:
+                    error = e
+                try:
+                    handled = on_result(index, url, body, error)
+                    if inspect.isawaitable(handled):
+                        await handled
+                finally:
+                    queue.task_done()
+
+        async with aiohttp.ClientSession(headers=self.headers, timeout=self.timeout) as session:
+            tasks = [asyncio.create_task(worker(session)) for _ in range(workers)]
+
+            for index, url in enumerate(urls):
+                await queue.put((index, url))
+            for _ in tasks:
+                await queue.put(None)
+
+            await asyncio.gather(*tasks)
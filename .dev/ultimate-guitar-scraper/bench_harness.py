@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the scrapers and the importer.
+
+Starts a local stub tab site (pages built from the saved fixture, with
+configurable latency, error rate and page size) and a stand-in for the
+open-chords `/api/songs` routes, then runs TabScraper, SimpleTabScraper and
+UGToOpenChordsImporter against them. Each target runs in its own process so
+peak RSS is its own, and reports pages/second, p50/p95/p99 per-page latency,
+peak RSS and bytes transferred.
+
+Usage:
+    python bench_harness.py --pages 200 --latency 0.05 --error-rate 0.02
+    python bench_harness.py --targets importer --json bench_results.json
+"""
+
+import argparse
+import contextlib
+import copy
+import html as html_lib
+import inspect
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from song_ids import content_hash
+from ug_store import DATA_CONTENT_ATTR, find_store
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "tab_static.html"
+TARGETS = ('scrape_tabs', 'scrape_tabs_simple', 'importer')
+
+
+class StubSite:
+    """Fixture tab pages and a songs API behind one ThreadingHTTPServer."""
+
+    def __init__(self, pages, page_size=4096, latency=0.0, jitter=0.0, error_rate=0.0,
+                 api_latency=0.0, api_error_rate=0.0, seed=1):
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.api_latency = api_latency
+        self.api_error_rate = api_error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.songs = {}
+        self.reset_counters()
+
+        template = FIXTURE.read_text(encoding='utf-8')
+        self.store = find_store(template)
+        attr = template.index(DATA_CONTENT_ATTR) + len(DATA_CONTENT_ATTR)
+        self.head, self.tail = template[:attr], template[template.index('"', attr):]
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.urls = [f"{self.base_url}/tab/artist-{i}/song-{i}-chords-{100000 + i}" for i in range(pages)]
+
+    def reset_counters(self):
+        with self.lock:
+            self.counters = {'requests': 0, 'errors': 0, 'bytes_sent': 0, 'bytes_received': 0}
+
+    def _count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+
+    def _should_fail(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def _delay(self, latency):
+        if latency or self.jitter:
+            time.sleep(max(0.0, latency + self.random.uniform(-self.jitter, self.jitter)))
+
+    def render_page(self, path):
+        """A tab page whose embedded store holds about `page_size` bytes of chord markup."""
+        number = int(path.rsplit('-', 1)[-1])
+        store = copy.deepcopy(self.store)
+        data = store['store']['page']['data']
+        data['tab'].update(id=number, song_name=f"Song {number}", artist_name=f"Artist {number}",
+                           tab_url=self.base_url + path)
+        markup = data['tab_view']['wiki_tab']['content']
+        repeats = max(1, self.page_size // len(markup))
+        data['tab_view']['wiki_tab']['content'] = markup * repeats
+        value = html_lib.escape(json.dumps(store), quote=True)
+        return (self.head + value + self.tail).encode('utf-8')
+
+    def save(self, song):
+        """Store an imported song under its sourceId, as the API does for one user."""
+        song = {**song, 'id': f"{song['sourceId']}.bench", 'contentHash': content_hash(song['content'])}
+        self.songs[song['sourceId']] = song
+        return song
+
+    def api_response(self, method, path, query, body):
+        """Status and JSON body for a songs API request."""
+        if path == '/api/songs' and method == 'GET':
+            if query.get('view') == ['hashes']:
+                return 200, [{'id': s['id'], 'sourceId': i, 'contentHash': s.get('contentHash'),
+                              'parsedVersion': (s.get('parsed') or {}).get('v')}
+                             for i, s in self.songs.items()]
+            return 200, list(self.songs.values())
+        if path == '/api/songs' and method == 'POST':
+            song = self.save(json.loads(body))
+            return 201, song
+        if path == '/api/songs/batch' and method == 'POST':
+            results = []
+            for song in json.loads(body)['songs']:
+                song = self.save(song)
+                results.append({'id': song['id'], 'status': 'saved'})
+            return 200, {'results': results, 'saved': len(results), 'failed': 0}
+        return 404, {'error': 'Not found'}
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                site._count(requests=1, bytes_sent=len(body), errors=int(status >= 500))
+
+            def handle_request(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                site._count(bytes_received=length)
+                url = urlparse(self.path)
+
+                if url.path.startswith('/api/'):
+                    site._delay(site.api_latency)
+                    if site._should_fail(site.api_error_rate):
+                        self.send(503, b'{"error": "Unavailable"}', 'application/json', {'Retry-After': '0'})
+                        return
+                    status, payload = site.api_response(method, url.path, parse_qs(url.query), body)
+                    self.send(status, json.dumps(payload).encode('utf-8'), 'application/json')
+                elif url.path.startswith('/tab/') and method == 'GET':
+                    site._delay(site.latency)
+                    if site._should_fail(site.error_rate):
+                        self.send(503, b'Service Unavailable', 'text/plain', {'Retry-After': '0'})
+                        return
+                    self.send(200, site.render_page(url.path), 'text/html; charset=utf-8')
+                else:
+                    self.send(404, b'Not Found', 'text/plain')
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_POST(self):
+                self.handle_request('POST')
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples` (None when empty)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def time_calls(obj, name, samples):
+    """Replace `obj.name` with a wrapper appending each call's duration to `samples`."""
+    method = getattr(obj, name)
+    if inspect.iscoroutinefunction(method):
+        async def timed_method(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+    else:
+        def timed_method(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+    setattr(obj, name, timed_method)
+
+
+def run_scrape_tabs(urls, work_dir, args):
+    from scrape_tabs import TabScraper
+
+    scraper = TabScraper(max_per_host=args.concurrency, rate=args.rate, burst=args.concurrency,
+                         parse_workers=args.parse_workers)
+    samples = []
+    time_calls(scraper.fetcher, 'fetch', samples)
+    urls_file = work_dir / "urls.txt"
+    urls_file.write_text('\n'.join(urls) + '\n')
+    summary = scraper.scrape_all_tabs(urls_file, work_dir / "out")
+    return samples, summary['successful']
+
+
+def run_scrape_tabs_simple(urls, work_dir, args):
+    from rate_control import RateControl
+    from scrape_tabs_simple import SimpleTabScraper
+
+    scraper = SimpleTabScraper()
+    # Measure the scraper, not its politeness delay
+    scraper.control = RateControl(rate=args.rate, concurrency=1, max_concurrency=1)
+    samples = []
+    time_calls(scraper, 'extract_tab_content', samples)
+    summary = scraper.scrape_batch(urls, work_dir / "out")
+    return samples, summary['successful']
+
+
+def run_importer(urls, work_dir, args):
+    import asyncio
+    from import_automated import UGToOpenChordsImporter
+    from rate_control import RateControl
+
+    importer = UGToOpenChordsImporter(
+        args.api_url, workers=args.concurrency, upload_workers=args.concurrency,
+        bulk=args.bulk, rate=args.rate,
+    )
+    importer.api_control = RateControl(rate=args.rate, concurrency=args.concurrency)
+    samples = []
+    time_calls(importer, 'extract_tab_content', samples)
+    asyncio.run(importer.process_urls(urls))
+    return samples, importer.stats['successful']
+
+
+RUNNERS = {
+    'scrape_tabs': run_scrape_tabs,
+    'scrape_tabs_simple': run_scrape_tabs_simple,
+    'importer': run_importer,
+}
+
+
+def run_target(name, urls, args, results):
+    """Child process entry point: run one target and put its measurements on `results`."""
+    sys.path.insert(0, str(Path(__file__).parent))
+    import sync_manifest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        (work_dir / "out").mkdir()
+        # Keep benchmark tabs out of the real sync manifest
+        sync_manifest.DEFAULT_MANIFEST = work_dir / "sync_manifest.db"
+
+        output = sys.stdout if args.verbose else open(os.devnull, 'w')
+        try:
+            with contextlib.redirect_stdout(output):
+                start = time.perf_counter()
+                samples, successful = RUNNERS[name](urls, work_dir, args)
+                elapsed = time.perf_counter() - start
+        except Exception as e:
+            results.put({'error': f"{type(e).__name__}: {e}"})
+            return
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        peak_rss *= 1024
+    results.put({
+        'pages': len(urls),
+        'successful': successful,
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(len(urls) / elapsed, 2),
+        'latency_ms': {
+            f"p{pct}": round(percentile(samples, pct) * 1000, 2) if samples else None
+            for pct in (50, 95, 99)
+        },
+        'peak_rss_bytes': peak_rss,
+    })
+
+
+def bench_target(name, site, args):
+    """Run one target in a fresh process against the stub site; returns its result dict."""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    site.reset_counters()
+    process = context.Process(target=run_target, args=(name, site.urls, args, results))
+    process.start()
+    result = results.get()
+    process.join()
+    result.update(site.counters)
+    return result
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers and importer against a local stub site")
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS),
+                        help="What to benchmark")
+    parser.add_argument('--pages', type=int, default=100,
+                        help="Tab pages per target")
+    parser.add_argument('--page-size', type=int, default=4096,
+                        help="Approximate bytes of chord markup per page")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Seconds the stub site waits before answering a page")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="Random +/- seconds added to every latency")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of page requests answered with 503")
+    parser.add_argument('--api-latency', type=float, default=0.0,
+                        help="Seconds the stub API waits before answering")
+    parser.add_argument('--api-error-rate', type=float, default=0.0,
+                        help="Fraction of API requests answered with 503")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Workers / requests in flight for the concurrent targets")
+    parser.add_argument('--rate', type=float, default=1000.0,
+                        help="Starting requests per second (high, to measure the code rather than the pacing)")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Run the importer in --bulk mode")
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help="Parse processes for scrape_tabs (default: its own default; 0: in-process)")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="Seed for latency jitter and injected errors")
+    parser.add_argument('--json', dest='json_file', default=None,
+                        help="Also write the results to this JSON file")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="Show the targets' own output")
+    args = parser.parse_args()
+
+    site = StubSite(
+        args.pages, page_size=args.page_size, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, api_latency=args.api_latency, api_error_rate=args.api_error_rate,
+        seed=args.seed,
+    )
+    site.start()
+    args.api_url = site.base_url
+    print(f"Stub site: {site.base_url} ({args.pages} pages, ~{args.page_size} B markup, "
+          f"{args.latency * 1000:.0f} ms latency, {args.error_rate:.0%} errors)\n")
+
+    results = {}
+    try:
+        print(f"{'Target':<20} {'pages/sec':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'RSS MB':>8} {'sent KB':>9} {'ok':>6}")
+        print("-" * 84)
+        for name in args.targets:
+            result = bench_target(name, site, args)
+            results[name] = result
+            if 'error' in result:
+                print(f"{name:<20} failed: {result['error']}")
+                continue
+            latency = result['latency_ms']
+            print(f"{name:<20} {result['pages_per_second']:>10.1f} {latency['p50'] or 0:>8.1f} "
+                  f"{latency['p95'] or 0:>8.1f} {latency['p99'] or 0:>8.1f} "
+                  f"{result['peak_rss_bytes'] / 1024 / 1024:>8.1f} {result['bytes_sent'] / 1024:>9.0f} "
+                  f"{result['successful']:>6}")
+    finally:
+        site.close()
+
+    if args.json_file:
+        config = {key: value for key, value in vars(args).items() if key not in ('json_file', 'verbose', 'api_url')}
+        with open(args.json_file, 'w') as f:
+            json.dump({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'python': platform.python_version(),
+                'config': config,
+                'results': results,
+            }, f, indent=2)
+        print(f"\nResults saved to: {args.json_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Parse benchmark for the tab scrapers.
+
+Runs every installed tab_parser backend over the saved fixture pages and
+reports pages/second, next to the old multi-pass BeautifulSoup approach
+(one html.parser tree plus a separate find/select_one per field) as the
+baseline.
+
+Usage:
+    python bench_parse.py [fixtures_dir] [--iterations 200]
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+from tab_parser import CONTENT_SELECTORS, available_backends, extract_page_fields
+
+
+def legacy_bs4_extract(html):
+    """The pre-tab_parser extraction: one tree, one search per field."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    soup.find('h1')
+    soup.find('a', href=re.compile(r'/artist/'))
+    soup.find('code')
+    soup.find('pre')
+    for selector in CONTENT_SELECTORS:
+        soup.select_one(selector)
+    soup.find_all(['div', 'span', 'p'], string=re.compile(r'[A-G]m?[\d#b]*'))
+    soup.get_text()
+
+
+def load_fixtures(fixtures_dir):
+    """Read every saved .html page in the fixtures directory."""
+    pages = []
+    for path in sorted(Path(fixtures_dir).glob('*.html')):
+        pages.append(path.read_text(encoding='utf-8'))
+    return pages
+
+
+def bench(extract, pages, iterations):
+    """Return pages/second for `extract` over `pages`, repeated `iterations` times."""
+    extract(pages[0])  # Warm up imports and caches
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages:
+            extract(html)
+    elapsed = time.perf_counter() - start
+    return (iterations * len(pages)) / elapsed
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on fixture pages")
+    parser.add_argument('fixtures_dir', nargs='?', default=Path(__file__).parent / "fixtures",
+                        help="Directory of saved tab page .html files")
+    parser.add_argument('--iterations', type=int, default=200,
+                        help="Passes over the fixture set per backend")
+    parser.add_argument('--json', dest='json_file', default=None,
+                        help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures_dir)
+    if not pages:
+        print(f"No .html fixtures found in: {args.fixtures_dir}")
+        return
+
+    total_bytes = sum(len(p.encode('utf-8')) for p in pages)
+    print(f"Fixtures: {len(pages)} pages, {total_bytes / 1024:.1f} KB total")
+    print(f"Iterations: {args.iterations}\n")
+
+    candidates = []
+    backends = available_backends()
+    if 'bs4' in backends:
+        candidates.append(('bs4 (legacy multi-pass)', legacy_bs4_extract))
+    for backend in backends:
+        candidates.append((f"{backend} (single pass)", lambda html, b=backend: extract_page_fields(html, b)))
+
+    results = {}
+    baseline = None
+    print(f"{'Backend':<28} {'pages/sec':>12} {'speedup':>9}")
+    print("-" * 51)
+    for name, extract in candidates:
+        rate = bench(extract, pages, args.iterations)
+        if baseline is None:
+            baseline = rate
+        results[name] = rate
+        print(f"{name:<28} {rate:>12.1f} {rate / baseline:>8.2f}x")
+
+    if args.json_file:
+        with open(args.json_file, 'w') as f:
+            json.dump({
+                'pages': len(pages),
+                'bytes': total_bytes,
+                'iterations': args.iterations,
+                'pages_per_second': results,
+            }, f, indent=2)
+        print(f"\nResults saved to: {args.json_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the process-pool parse stage (parse_pool.py).
+
+Parses the saved fixture pages, repeated up to `--pages`, with
+scrape_tabs.parse_tab_page: first in-process, then in a ParsePool of 1, 2,
+... up to `--max-workers` processes. Reports pages/second and speedup over
+in-process parsing for each, so you can see where adding cores stops
+paying for the copying.
+
+Usage:
+    python bench_parse_pool.py [fixtures_dir] [--pages 2000] [--max-workers 8] [--chunk 16]
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+from bench_parse import load_fixtures
+from parse_pool import ParsePool
+from scrape_tabs import parse_tab_page
+
+
+def bench(pages, workers, chunk_size, backend):
+    """Return pages/second parsing `pages` with `workers` processes (0: in-process)."""
+    with ParsePool(parse_tab_page, workers=workers, chunk_size=chunk_size, parser_backend=backend) as pool:
+        # Start the workers and warm up imports before timing
+        for url, html in pages[:max(workers, 1) * chunk_size]:
+            pool.submit(url, html)
+        pool.drain()
+
+        start = time.perf_counter()
+        parsed = 0
+        for url, html in pages:
+            parsed += len(pool.submit(url, html))
+        parsed += len(pool.drain())
+        elapsed = time.perf_counter() - start
+    assert parsed == len(pages)
+    return len(pages) / elapsed
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark parse stage scaling across processes")
+    parser.add_argument('fixtures_dir', nargs='?', default=Path(__file__).parent / "fixtures",
+                        help="Directory of saved tab page .html files")
+    parser.add_argument('--pages', type=int, default=2000, help="Pages parsed per run (fixtures repeated)")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help="Largest pool to try (default: number of cores)")
+    parser.add_argument('--chunk', type=int, default=16, help="Pages sent to a worker at a time")
+    parser.add_argument('--parser', dest='parser_backend', default='auto', help="tab_parser backend")
+    parser.add_argument('--json', dest='json_file', default=None,
+                        help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures_dir)
+    if not fixtures:
+        print(f"No .html fixtures found in: {args.fixtures_dir}")
+        return
+    # As the scraper submits them: the response bytes, undecoded
+    bodies = [html.encode('utf-8') for html in fixtures]
+    pages = [(f"https://tabs.ultimate-guitar.com/tab/bench/page-chords-{i}", bodies[i % len(bodies)])
+             for i in range(args.pages)]
+
+    total_bytes = sum(len(body) for _, body in pages)
+    print(f"Pages: {len(pages)} ({len(fixtures)} fixtures repeated), {total_bytes / 1024 / 1024:.1f} MB total")
+    print(f"Cores: {os.cpu_count()}, chunk size: {args.chunk}\n")
+
+    results = {}
+    baseline = None
+    print(f"{'Workers':<16} {'pages/sec':>12} {'speedup':>9}")
+    print("-" * 39)
+    for workers in range(0, args.max_workers + 1):
+        rate = bench(pages, workers, args.chunk, args.parser_backend)
+        if baseline is None:
+            baseline = rate
+        name = f"{workers} processes" if workers else "in-process"
+        results[name] = rate
+        print(f"{name:<16} {rate:>12.1f} {rate / baseline:>8.2f}x")
+
+    if args.json_file:
+        with open(args.json_file, 'w') as f:
+            json.dump({
+                'pages': len(pages),
+                'bytes': total_bytes,
+                'cores': os.cpu_count(),
+                'chunk_size': args.chunk,
+                'pages_per_second': results,
+            }, f, indent=2)
+        print(f"\nResults saved to: {args.json_file}")
+
+
+if __name__ == "__main__":
+    main()
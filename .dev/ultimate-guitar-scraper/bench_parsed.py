@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Size and speed of the precomputed parsed form (chord_engine.encode_parsed).
+
+For every song in the corpus, compares what is stored and sent - the
+content alone, the content plus the compact parsed form, and the content
+plus full ParsedLine JSON - raw and gzipped, and times parsing the content
+against decoding the stored form, and transposing either way.
+
+Songs come from corpus.db files (corpus_store.py), directories of scraped
+.txt tabs, or NDJSON files with a 'content' field. By default: the scraper
+corpora in scraped_tabs*/ and the tab in each fixture page.
+
+Usage:
+    python bench_parsed.py [sources ...] [--iterations 50] [--json results.json]
+"""
+
+import argparse
+import gzip
+import json
+import time
+from pathlib import Path
+
+from chord_engine import decode_parsed, encode_parsed, parse_ug_format, transpose_encoded, transpose_song
+from corpus_store import CORPUS_NAME, CorpusStore
+from ug_store import extract_tab_from_html
+
+
+HERE = Path(__file__).parent
+TXT_HEADER_END = "=" * 50 + "\n\n"
+
+
+def load_songs(sources):
+    """Song contents from corpus.db files, .txt tab directories, NDJSON files or .html pages."""
+    songs = []
+    for source in map(Path, sources):
+        if source.is_dir():
+            if (source / CORPUS_NAME).exists():
+                songs.extend(load_songs([source / CORPUS_NAME]))
+            for path in sorted(source.glob('*.txt')):
+                text = path.read_text(encoding='utf-8')
+                songs.append(text.split(TXT_HEADER_END, 1)[-1])
+        elif source.suffix == '.db':
+            store = CorpusStore(source)
+            songs.extend(tab['content'] for tab in store)
+            store.close()
+        elif source.suffix == '.html':
+            tab = extract_tab_from_html(source.read_text(encoding='utf-8'))
+            if tab:
+                songs.append(tab['content'])
+        else:
+            with open(source, encoding='utf-8') as f:
+                songs.extend(json.loads(line).get('content') or '' for line in f if line.strip())
+    return [song for song in songs if song.strip()]
+
+
+def compact_json(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def sizes(songs):
+    """Bytes per representation, summed over the corpus: raw and gzipped."""
+    totals = {}
+    for content in songs:
+        parsed = parse_ug_format(content)
+        for name, payload in (
+            ('content', compact_json(content)),
+            ('content + compact parsed', compact_json([content, encode_parsed(content, parsed)])),
+            ('content + ParsedLine JSON', compact_json([content, parsed])),
+        ):
+            raw, zipped = totals.get(name, (0, 0))
+            totals[name] = (raw + len(payload), zipped + len(gzip.compress(payload)))
+    return totals
+
+
+def per_song_us(operation, items, iterations):
+    """Mean microseconds per song for `operation` over `items`."""
+    for item in items:
+        operation(item)  # Warm up the chord caches
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for item in items:
+            operation(item)
+    return (time.perf_counter() - start) / (iterations * len(items)) * 1e6
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark the precomputed parsed-song form on a corpus")
+    parser.add_argument('sources', nargs='*', help="corpus.db files, tab directories, NDJSON files or .html pages")
+    parser.add_argument('--iterations', type=int, default=50, help="Passes over the corpus per timing")
+    parser.add_argument('--semitones', type=int, default=2, help="Shift used for the transposition timings")
+    parser.add_argument('--json', dest='json_file', default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    sources = args.sources or sorted(HERE.glob('scraped_tabs*')) + sorted((HERE / "fixtures").glob('*.html'))
+    songs = load_songs(sources)
+    if not songs:
+        print("No songs found in: " + ", ".join(map(str, sources)))
+        return
+    stored = [(content, json.loads(compact_json(encode_parsed(content)))) for content in songs]
+    for content, encoded in stored:
+        assert decode_parsed(encoded, content) == parse_ug_format(content)
+
+    print(f"Corpus: {len(songs)} songs, {sum(len(s.encode('utf-8')) for s in songs) / 1024:.1f} KB of content\n")
+
+    size_results = sizes(songs)
+    base_raw, base_zipped = size_results['content']
+    print(f"{'Stored / sent':<28} {'bytes':>10} {'vs content':>11} {'gzipped':>10} {'vs content':>11}")
+    print("-" * 74)
+    for name, (raw, zipped) in size_results.items():
+        print(f"{name:<28} {raw:>10} {raw / base_raw:>10.2f}x {zipped:>10} {zipped / base_zipped:>10.2f}x")
+
+    s = args.semitones
+    timings = {
+        'parse content': per_song_us(parse_ug_format, songs, args.iterations),
+        'decode stored form': per_song_us(lambda item: decode_parsed(item[1], item[0]), stored, args.iterations),
+        f'transpose content ({s:+d})': per_song_us(lambda content: transpose_song(content, s), songs, args.iterations),
+        f'transpose stored form ({s:+d})': per_song_us(
+            lambda item: decode_parsed(transpose_encoded(item[1], s), item[0]), stored, args.iterations),
+    }
+    print(f"\n{'Per song':<28} {'us':>10}")
+    print("-" * 39)
+    for name, us in timings.items():
+        print(f"{name:<28} {us:>10.1f}")
+    print(f"\nDecoding is {timings['parse content'] / timings['decode stored form']:.1f}x faster than parsing")
+
+    if args.json_file:
+        with open(args.json_file, 'w') as f:
+            json.dump({
+                'songs': len(songs),
+                'iterations': args.iterations,
+                'bytes': {name: {'raw': raw, 'gzip': zipped} for name, (raw, zipped) in size_results.items()},
+                'microseconds_per_song': timings,
+            }, f, indent=2)
+        print(f"\nResults saved to: {args.json_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -209,12 +209,36 @@ async function extractAndUploadTabs() {
             // Determine type from URL
             const type = url.includes('-tabs-') ? 'tabs' : 'chords';
             
+            // Where the song came from (ug-<tab id>, else a content hash prefix); the API
+            // keeps one song per user and source, so re-importing overwrites instead of duplicating
+            const tabId = url.match(/-(\d+)\/?(?:[?#].*)?$/);
+            let sourceId;
+            if (tabId) {
+                sourceId = `ug-${tabId[1]}`;
+            } else {
+                const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(content));
+                const hex = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+                sourceId = `ug-${hex.slice(0, 16)}`;
+            }
+            
+            // The key the tab states, from the page's own data; left unset rather than guessed
+            let key = null;
+            try {
+                const store = window.UGAPP?.store?.page
+                    ? { store: window.UGAPP.store }
+                    : JSON.parse(document.querySelector('.js-store')?.dataset.content || '{}');
+                const pageData = store.store?.page?.data || {};
+                key = pageData.tab?.tonality_name || pageData.tab_view?.meta?.tonality || null;
+            } catch (e) {
+                key = null;
+            }
+            
             // Create song object for the API
             const song = {
-                id: Date.now().toString() + '_' + Math.random().toString(36).substr(2, 9),
+                sourceId: sourceId,
                 title: title,
                 artist: artist,
-                key: 'C',  // default key
+                key: key,
                 type: type,
                 content: content,
                 updatedAt: new Date().toISOString()
@@ -231,8 +255,9 @@ async function extractAndUploadTabs() {
                 });
                 
                 if (response.ok) {
+                    const saved = await response.json();
                     console.log(`✅ Uploaded: ${title} by ${artist}`);
-                    results.push({ url, title, artist, status: 'success', songId: song.id });
+                    results.push({ url, title, artist, status: 'success', songId: saved.id });
                 } else {
                     const error = await response.text();
                     console.log(`❌ Upload failed for ${title}: ${error}`);
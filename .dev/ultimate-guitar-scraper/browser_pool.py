@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Recycling Playwright browser pool for the importer workers.
+
+Each worker leases its own browser context + page from the pool. Chromium's
+memory grows over a long run no matter how carefully pages are reused, so
+after `recycle_after` pages the pool launches a fresh browser for new
+leases and closes the old one once its last lease has been handed back.
+The browser is launched lazily, so a run where every page is served from
+the embedded page data never starts Chromium at all.
+"""
+
+import asyncio
+
+
+class PageLease:
+    """A worker's context + page on one particular browser."""
+
+    def __init__(self, slot, context, page):
+        self.slot = slot
+        self.context = context
+        self.page = page
+
+
+class _BrowserSlot:
+    def __init__(self, browser):
+        self.browser = browser
+        self.leases = 0
+        self.served = 0
+        self.retired = False
+
+
+class BrowserPool:
+    def __init__(self, playwright, headless=True, recycle_after=200, context_setup=None):
+        """
+        Initialize the pool.
+
+        Args:
+            playwright: The object returned by `async_playwright()`
+            headless: Launch Chromium without a window
+            recycle_after: Pages a browser may serve before it is replaced
+            context_setup: Optional `async fn(context)` run on every new context
+        """
+        self.playwright = playwright
+        self.headless = headless
+        self.recycle_after = recycle_after
+        self.context_setup = context_setup
+
+        self.current = None
+        self.browsers_launched = 0
+        self._lock = asyncio.Lock()
+
+    async def _launch(self):
+        browser = await self.playwright.chromium.launch(headless=self.headless)
+        self.browsers_launched += 1
+        return _BrowserSlot(browser)
+
+    async def new_page(self):
+        """Lease a fresh context + page on the current browser."""
+        async with self._lock:
+            if self.current is None:
+                print("🌐 Launching browser...")
+                self.current = await self._launch()
+            slot = self.current
+            slot.leases += 1
+
+        try:
+            context = await slot.browser.new_context()
+            if self.context_setup:
+                await self.context_setup(context)
+            page = await context.new_page()
+        except Exception:
+            slot.leases -= 1
+            raise
+        return PageLease(slot, context, page)
+
+    async def page_done(self, lease):
+        """
+        Count a page served on `lease` and return the lease to keep using.
+
+        When the lease's browser has hit its recycle limit, the lease is
+        released and a new one on a freshly launched browser is returned.
+        """
+        slot = lease.slot
+        slot.served += 1
+
+        async with self._lock:
+            if slot is self.current and slot.served >= self.recycle_after:
+                print(f"♻️  Recycling browser after {slot.served} pages")
+                slot.retired = True
+                self.current = await self._launch()
+
+        if slot.retired:
+            await self.release(lease)
+            return await self.new_page()
+        return lease
+
+    async def release(self, lease):
+        """Close a lease's context, and its browser if that was retired and idle."""
+        slot = lease.slot
+        try:
+            await lease.context.close()
+        except Exception:
+            pass
+        slot.leases -= 1
+        if slot.retired and slot.leases == 0:
+            await slot.browser.close()
+
+    async def close(self):
+        """Close the current browser (leases should be released first)."""
+        async with self._lock:
+            if self.current is not None:
+                await self.current.browser.close()
+                self.current = None
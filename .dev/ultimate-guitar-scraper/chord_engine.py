@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Python port of the app's chord parser and transposer.
+
+Matches src/services/parser.ts (parseUGFormat, isChordLine, extractChords,
+transposeParsedSong, formatToUGText, extractMetadata), src/utils/chords.ts
+(transposeChord, keyUsesFlats, parseChord, getSemitoneDifference) and
+src/services/transposer.ts, so songs can be parsed and transposed in bulk
+on the import side with the same results the app gets. Parsed lines have
+the same shape as the app's ParsedLine objects:
+
+    {'type': 'section', 'content': '[Verse 1]'}
+    {'type': 'chord-line', 'chords': [{'chord': 'C', 'position': 0}], 'lyrics': '...'}
+    {'type': 'lyric', 'content': '...'}
+    {'type': 'empty', 'content': ''}
+
+A few JavaScript semantics are reproduced on purpose: `trim()` and `\\s`
+use JavaScript's whitespace set, `.` stops at any line terminator, and chord
+positions and line lengths count UTF-16 code units like `String.length`.
+
+Patterns are compiled once and chord lookups are memoized, and
+`transpose_songs` runs whole batches through one set of caches:
+
+    python chord_engine.py songs.jsonl --semitones 2 -o transposed.jsonl
+"""
+
+import argparse
+import json
+import re
+from functools import lru_cache
+
+
+NOTES_SHARP = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+NOTES_FLAT = ('C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B')
+SHARP_INDEX = {note: i for i, note in enumerate(NOTES_SHARP)}
+FLAT_INDEX = {note: i for i, note in enumerate(NOTES_FLAT)}
+
+FLAT_KEYS = ('F', 'Bb', 'Eb', 'Ab', 'Db', 'Gb', 'Cb', 'Dm', 'Gm', 'Cm', 'Fm', 'Bbm', 'Ebm')
+
+# JavaScript's whitespace (String.prototype.trim, \s) and line terminators (what `.` won't match)
+JS_WHITESPACE = (
+    '\t\n\x0b\x0c\r \xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006'
+    '\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+)
+_JS_SPACE = '[' + re.escape(JS_WHITESPACE) + ']'
+_JS_DOT = r'[^\n\r\u2028\u2029]'
+
+SECTION_RE = re.compile(rf'\[{_JS_DOT}*\]')
+# isChordLine's pattern (no slash bass) and extractChords' pattern
+CHORD_TOKEN_RE = re.compile(r'(?<![A-Za-z])[A-G][#b]?(?:m|maj|min|dim|aug|sus|add)?[0-9]*(?![A-Za-z#b])')
+CHORD_RE = re.compile(r'(?<![A-Za-z])([A-G][#b]?(?:m|maj|min|dim|aug|sus|add)?[0-9]*(?:/[A-G][#b]?)?)(?![A-Za-z#b])')
+CHORD_PARTS_RE = re.compile(rf'([A-G][#b]?)({_JS_DOT}*)')
+WORD_SPLIT_RE = re.compile(_JS_SPACE + '+')
+
+TITLE_RE = re.compile(rf'Title:{_JS_SPACE}*({_JS_DOT}+)', re.IGNORECASE | re.ASCII)
+ARTIST_RE = re.compile(rf'Artist:{_JS_SPACE}*({_JS_DOT}+)', re.IGNORECASE | re.ASCII)
+KEY_RE = re.compile(rf'Key:{_JS_SPACE}*([A-G][#b]?m?)', re.IGNORECASE | re.ASCII)
+
+# Version of the compact parsed form (encode_parsed); bump when it changes
+PARSED_VERSION = 1
+LINE_CODES = {'section': 's', 'chord-line': 'c', 'lyric': 'l', 'empty': 'e'}
+
+
+def js_trim(text):
+    return text.strip(JS_WHITESPACE)
+
+
+def js_length(text):
+    """`String.length`: UTF-16 code units."""
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _js_positions(line):
+    """Map code point offsets in `line` to UTF-16 offsets (None when they are the same)."""
+    if line.isascii() or all(ord(ch) < 0x10000 for ch in line):
+        return None
+    positions = []
+    offset = 0
+    for ch in line:
+        positions.append(offset)
+        offset += 2 if ord(ch) >= 0x10000 else 1
+    positions.append(offset)
+    return positions
+
+
+@lru_cache(maxsize=4096)
+def parse_chord(chord):
+    """(root, quality) for a chord, or None - the memoized chord table."""
+    match = CHORD_PARTS_RE.fullmatch(chord)
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+
+def is_valid_chord(chord):
+    return parse_chord(chord) is not None
+
+
+@lru_cache(maxsize=16384)
+def transpose_chord(chord, semitones, use_flats=False):
+    """Transpose a single chord by a number of semitones."""
+    if not chord or js_trim(chord) == '':
+        return chord
+
+    parts = parse_chord(chord)
+    if parts is None:
+        return chord
+    root, quality = parts
+
+    note_scale = NOTES_FLAT if use_flats else NOTES_SHARP
+    index = (FLAT_INDEX if use_flats else SHARP_INDEX).get(root)
+    if index is None:
+        index = (SHARP_INDEX if use_flats else FLAT_INDEX).get(root)
+        if index is None:
+            return chord
+
+    return note_scale[(index + semitones) % 12] + quality
+
+
+@lru_cache(maxsize=256)
+def key_uses_flats(key):
+    """Whether a key signature typically uses flats."""
+    return key.startswith(FLAT_KEYS)
+
+
+def get_semitone_difference(from_note, to_note):
+    """Semitones up from one note to another (0 when either is unknown)."""
+    from_index = SHARP_INDEX.get(from_note, FLAT_INDEX.get(from_note))
+    to_index = SHARP_INDEX.get(to_note, FLAT_INDEX.get(to_note))
+    if from_index is None or to_index is None:
+        return 0
+    return (to_index - from_index) % 12
+
+
+def is_chord_line(line):
+    """Whether a line is (mostly) chords."""
+    trimmed = js_trim(line)
+    if not trimmed:
+        return False
+
+    matches = [match.group(0) for match in CHORD_TOKEN_RE.finditer(line)]
+    if not matches:
+        return False
+
+    ratio = sum(len(chord) for chord in matches) / js_length(line)
+    return ratio > 0.15 or len(WORD_SPLIT_RE.split(trimmed)) <= 6
+
+
+def extract_chords(line):
+    """Chords in a line with their column positions."""
+    positions = _js_positions(line)
+    return [
+        {'chord': match.group(1), 'position': positions[match.start()] if positions else match.start()}
+        for match in CHORD_RE.finditer(line)
+    ]
+
+
+def parse_ug_format(text):
+    """Parse a song in Ultimate Guitar format (chord line over lyric line, [Section] markers)."""
+    if not text:
+        return []
+
+    lines = text.split('\n')
+    parsed = []
+    i = 0
+    count = len(lines)
+    while i < count:
+        line = lines[i]
+        trimmed = js_trim(line)
+
+        if SECTION_RE.fullmatch(trimmed):
+            parsed.append({'type': 'section', 'content': trimmed})
+        elif not trimmed:
+            parsed.append({'type': 'empty', 'content': ''})
+        elif is_chord_line(line):
+            if i + 1 < count:
+                parsed.append({'type': 'chord-line', 'chords': extract_chords(line), 'lyrics': lines[i + 1]})
+                i += 1  # The lyrics line is consumed with its chords
+            # A chord line with nothing after it is dropped, as in the app
+        else:
+            parsed.append({'type': 'lyric', 'content': line})
+        i += 1
+
+    return parsed
+
+
+def transpose_parsed_song(parsed_lines, semitones, original_key=None):
+    """Transpose all chords in a parsed song (other lines are shared, not copied)."""
+    use_flats = key_uses_flats(original_key) if original_key else False
+    return [
+        {**line, 'chords': [
+            {'chord': transpose_chord(chord['chord'], semitones, use_flats), 'position': chord['position']}
+            for chord in line['chords']
+        ]}
+        if line['type'] == 'chord-line' else line
+        for line in parsed_lines
+    ]
+
+
+def reconstruct_chord_line(chords):
+    if not chords:
+        return ''
+
+    parts = []
+    length = 0
+    current = 0
+    for chord in sorted(chords, key=lambda c: c['position']):
+        spaces = max(chord['position'] - current, 1 if length > 0 else 0)
+        parts.append(' ' * spaces + chord['chord'])
+        length += spaces + len(chord['chord'])
+        current = chord['position'] + len(chord['chord'])
+    return ''.join(parts)
+
+
+def format_to_ug_text(parsed_lines):
+    """Format parsed lines back to Ultimate Guitar format text."""
+    out = []
+    for line in parsed_lines:
+        kind = line.get('type')
+        if kind == 'chord-line':
+            out.append(reconstruct_chord_line(line['chords']) + '\n' + line['lyrics'])
+        elif kind in ('section', 'lyric'):
+            out.append(line['content'])
+        else:
+            out.append('')
+    return '\n'.join(out)
+
+
+def extract_metadata(text):
+    """Title, artist and key from 'Title: ...' style header lines."""
+    metadata = {'title': None, 'artist': None, 'key': None}
+    for line in text.split('\n'):
+        for field, pattern in (('title', TITLE_RE), ('artist', ARTIST_RE), ('key', KEY_RE)):
+            match = pattern.fullmatch(line)
+            if match:
+                metadata[field] = js_trim(match.group(1))
+                break
+    return metadata
+
+
+def encode_parsed(song_text, parsed_lines=None):
+    """
+    Compact form of a song's parsed lines, stored next to its content.
+
+        {'v': 1,                          format version (PARSED_VERSION)
+         't': 'sce...',                   one letter per line: section, chord-line, lyric, empty
+                                          ('x': a trailing chord line the parser drops)
+         'c': ['C', 'G/B', ...],          distinct chords, in order of first use
+         'p': [[0, 0, 1, 24], ...]}       per chord-line: chord index, position, chord index, ...
+
+    Text (sections, lyrics) isn't repeated - decode_parsed takes it from
+    the content - and transposing only has to touch the chord table.
+    `parsed_lines` saves a second parse when the caller already has them.
+    """
+    if parsed_lines is None:
+        parsed_lines = parse_ug_format(song_text)
+
+    types = []
+    table = {}
+    positions = []
+    consumed = 0
+    for line in parsed_lines:
+        types.append(LINE_CODES[line['type']])
+        if line['type'] == 'chord-line':
+            pairs = []
+            for chord in line['chords']:
+                pairs.append(table.setdefault(chord['chord'], len(table)))
+                pairs.append(chord['position'])
+            positions.append(pairs)
+            consumed += 2
+        else:
+            consumed += 1
+    if song_text and consumed < song_text.count('\n') + 1:
+        types.append('x')
+    return {'v': PARSED_VERSION, 't': ''.join(types), 'c': list(table), 'p': positions}
+
+
+def decode_parsed(encoded, song_text):
+    """
+    Parsed lines from their compact form and the song's content.
+
+    Returns None if the encoding is of an unknown version or doesn't fit
+    the content (say, the content was edited since), so callers can fall
+    back to parse_ug_format.
+    """
+    if not isinstance(encoded, dict) or encoded.get('v') != PARSED_VERSION:
+        return None
+    if not song_text:
+        return [] if not encoded.get('t') else None
+
+    lines = song_text.split('\n')
+    parsed = []
+    i = 0
+    try:
+        table = encoded['c']
+        positions = iter(encoded['p'])
+        for code in encoded['t']:
+            line = lines[i]
+            if code == 'c':
+                pairs = next(positions)
+                chords = [{'chord': table[pairs[j]], 'position': pairs[j + 1]} for j in range(0, len(pairs), 2)]
+                parsed.append({'type': 'chord-line', 'chords': chords, 'lyrics': lines[i + 1]})
+                i += 2
+                continue
+            if code == 's':
+                parsed.append({'type': 'section', 'content': js_trim(line)})
+            elif code == 'l':
+                parsed.append({'type': 'lyric', 'content': line})
+            elif code == 'e':
+                parsed.append({'type': 'empty', 'content': ''})
+            elif code != 'x':
+                return None
+            i += 1
+    except (KeyError, IndexError, StopIteration, TypeError):
+        return None
+
+    if i != len(lines):
+        return None
+    return parsed
+
+
+def transpose_encoded(encoded, semitones, original_key=None):
+    """Transpose a compact parsed song; only its table of distinct chords changes."""
+    use_flats = key_uses_flats(original_key) if original_key else False
+    return {**encoded, 'c': [transpose_chord(chord, semitones, use_flats) for chord in encoded['c']]}
+
+
+def transpose_song(song_text, semitones, original_key=None):
+    """Transpose a song in Ultimate Guitar format."""
+    return format_to_ug_text(transpose_parsed_song(parse_ug_format(song_text), semitones, original_key))
+
+
+def transpose_song_to_key(song_text, from_key, to_key):
+    """Transpose a song to a target key."""
+    return transpose_song(song_text, get_semitone_difference(from_key, to_key), to_key)
+
+
+def get_transposed_key(original_key, semitones):
+    """The key after a semitone shift."""
+    if not original_key:
+        return None
+    return transpose_chord(original_key, semitones, key_uses_flats(original_key))
+
+
+def transpose_songs(songs, semitones, original_key=None):
+    """
+    Transpose many songs at once. Yields the transposed texts in order.
+
+    `songs` holds song texts, or (text, semitones, original_key) tuples to
+    give each song its own shift; the chord caches are shared across the
+    whole batch, so each distinct chord is only worked out once.
+    """
+    for song in songs:
+        if isinstance(song, str):
+            yield transpose_song(song, semitones, original_key)
+        else:
+            text, song_semitones, song_key = song
+            yield transpose_song(text, song_semitones, song_key)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Transpose songs (NDJSON with a 'content' field per line)")
+    parser.add_argument('input', help="NDJSON file of songs")
+    parser.add_argument('--semitones', type=int, required=True, help="Semitones to shift by")
+    parser.add_argument('-o', '--output', required=True, help="NDJSON file to write")
+    args = parser.parse_args()
+
+    count = 0
+    with open(args.input, 'r', encoding='utf-8') as f, open(args.output, 'w', encoding='utf-8') as out:
+        songs = (json.loads(line) for line in f if line.strip())
+        for song in songs:
+            song['content'] = transpose_song(song.get('content') or '', args.semitones, song.get('key'))
+            song['key'] = get_transposed_key(song.get('key'), args.semitones)
+            out.write(json.dumps(song, ensure_ascii=False) + '\n')
+            count += 1
+    print(f"Transposed {count} songs by {args.semitones:+d} semitones -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Packed, content-addressed corpus of scraped tabs.
+
+The scrapers used to write one .txt file per tab named after artist and
+title, so tabs with the same name (every "Unknown - Unknown - chords.txt")
+silently overwrote each other, and large runs left hundreds of thousands of
+small files behind. The corpus is a single SQLite file instead:
+
+    blobs  content hash -> compressed content, stored once however many
+           URLs share it
+    tabs   URL -> content hash plus metadata columns (title, artist, type,
+           key, tuning, capo, content source)
+
+Blobs are compressed with zstd when the `zstandard` package is installed,
+zlib otherwise; the codec is recorded per blob so either can read the
+other's files. `export` writes the old one-file-per-tab layout on demand:
+
+    python corpus_store.py stats scraped_tabs/corpus.db
+    python corpus_store.py get scraped_tabs/corpus.db <url>
+    python corpus_store.py export scraped_tabs/corpus.db exported_tabs/
+"""
+
+import argparse
+import hashlib
+import re
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from song_ids import tab_id_from_url
+
+
+CORPUS_NAME = "corpus.db"
+
+METADATA_FIELDS = ('title', 'artist', 'tab_type', 'key', 'tuning', 'capo', 'content_source')
+
+
+def _codecs():
+    codecs = {
+        'none': (lambda data: data, lambda data: data),
+        'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    }
+    if zstandard is not None:
+        codecs['zstd'] = (zstandard.ZstdCompressor(level=3).compress,
+                          zstandard.ZstdDecompressor().decompress)
+    return codecs
+
+
+class CorpusStore:
+    def __init__(self, path, compression='auto', commit_every=100):
+        """
+        Open (or create) a corpus file.
+
+        Args:
+            path: SQLite file, or a directory to hold corpus.db
+            compression: 'zstd', 'zlib', 'none' or 'auto' (zstd if installed, else zlib)
+            commit_every: Tabs written between commits
+        """
+        path = Path(path)
+        if path.is_dir():
+            path = path / CORPUS_NAME
+        self.path = path
+
+        self.codecs = _codecs()
+        if compression == 'auto':
+            compression = 'zstd' if 'zstd' in self.codecs else 'zlib'
+        if compression not in self.codecs:
+            raise ValueError(f"Compression '{compression}' not available (have: {', '.join(self.codecs)})")
+        self.compression = compression
+        self.commit_every = commit_every
+        self._pending = 0
+
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS tabs (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL REFERENCES blobs (hash),
+                title TEXT,
+                artist TEXT,
+                tab_type TEXT,
+                key TEXT,
+                tuning TEXT,
+                capo INTEGER,
+                content_source TEXT,
+                scraped_at REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS tabs_content_hash ON tabs (content_hash)")
+        self.db.commit()
+
+    def put(self, tab_data):
+        """
+        Store a scraped tab (a scraper result dict). Returns its content hash.
+
+        Only the latest content of a URL is kept: when it changes, the old
+        blob is deleted unless another tab still uses it.
+
+        Raises ValueError for blank content, which the scrapers count as a
+        failure (result_sink.require_content) rather than storing.
+        """
+        content = (tab_data.get('content') or '').encode('utf-8')
+        if not content.strip():
+            raise ValueError(f"No content to store for {tab_data.get('url')}")
+        digest = hashlib.sha256(content).hexdigest()
+
+        exists = self.db.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if not exists:
+            compress, _ = self.codecs[self.compression]
+            self.db.execute(
+                "INSERT INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                (digest, self.compression, len(content), compress(content))
+            )
+
+        old = self.db.execute("SELECT content_hash FROM tabs WHERE url = ?", (tab_data['url'],)).fetchone()
+        self.db.execute(
+            """INSERT OR REPLACE INTO tabs
+               (url, content_hash, title, artist, tab_type, key, tuning, capo, content_source, scraped_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (tab_data['url'], digest, *(tab_data.get(field) for field in METADATA_FIELDS), time.time())
+        )
+        if old and old[0] != digest:
+            # The tab's content changed: drop the old blob unless another tab shares it
+            self.db.execute(
+                "DELETE FROM blobs WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM tabs WHERE content_hash = ?)",
+                (old[0], old[0])
+            )
+
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+        return digest
+
+    def _content(self, digest):
+        row = self.db.execute("SELECT codec, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        codec, data = row
+        _, decompress = self.codecs[codec]
+        return decompress(data).decode('utf-8')
+
+    def _tab(self, row):
+        url, digest, *metadata = row
+        return {'url': url, 'content_hash': digest, **dict(zip(METADATA_FIELDS, metadata)),
+                'content': self._content(digest)}
+
+    def get(self, url):
+        """The stored tab for `url` (metadata and content), or None."""
+        row = self.db.execute(
+            f"SELECT url, content_hash, {', '.join(METADATA_FIELDS)} FROM tabs WHERE url = ?", (url,)
+        ).fetchone()
+        return self._tab(row) if row else None
+
+    def __iter__(self):
+        """Every stored tab, in URL order."""
+        rows = self.db.execute(
+            f"SELECT url, content_hash, {', '.join(METADATA_FIELDS)} FROM tabs ORDER BY url"
+        )
+        for row in rows:
+            yield self._tab(row)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM tabs").fetchone()[0]
+
+    def stats(self):
+        """Tab and blob counts with raw vs stored content size."""
+        tabs = len(self)
+        blobs, raw_bytes, stored_bytes = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+        ).fetchone()
+        return {
+            'tabs': tabs,
+            'unique_contents': blobs,
+            'raw_bytes': raw_bytes,
+            'stored_bytes': stored_bytes,
+            'file_bytes': self.path.stat().st_size,
+        }
+
+    def export(self, output_dir):
+        """Write one .txt file per tab (the old scraper layout). Returns the number written."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        used = set()
+        count = 0
+        for tab in self:
+            artist = re.sub(r'[^\w\s-]', '', tab['artist'] or 'Unknown').strip()
+            title = re.sub(r'[^\w\s-]', '', tab['title'] or 'Unknown').strip()
+            stem = re.sub(r'\s+', ' ', f"{artist} - {title} - {tab['tab_type'] or 'chords'}")[:100]
+            if stem in used:
+                # Same name as an earlier tab: tell them apart instead of overwriting
+                stem = f"{stem} ({tab_id_from_url(tab['url']) or tab['content_hash'][:8]})"
+            used.add(stem)
+
+            with open(output_dir / f"{stem}.txt", 'w', encoding='utf-8') as f:
+                f.write(f"Title: {tab['title']}\n")
+                f.write(f"Artist: {tab['artist']}\n")
+                f.write(f"Type: {tab['tab_type']}\n")
+                f.write(f"Source: {tab['url']}\n")
+                f.write(f"Content Length: {len(tab['content'])} characters\n")
+                f.write(f"Content Source: {tab['content_source'] or 'none'}\n")
+                f.write("=" * 50 + "\n\n")
+                f.write(tab['content'])
+            count += 1
+        return count
+
+    def commit(self):
+        self.db.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Inspect or export a scraped tab corpus")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stats_cmd = commands.add_parser('stats', help="Show tab counts and storage size")
+    stats_cmd.add_argument('corpus', help="corpus.db file or the directory holding it")
+
+    get_cmd = commands.add_parser('get', help="Print one tab by URL")
+    get_cmd.add_argument('corpus', help="corpus.db file or the directory holding it")
+    get_cmd.add_argument('url')
+
+    export_cmd = commands.add_parser('export', help="Write one .txt file per tab")
+    export_cmd.add_argument('corpus', help="corpus.db file or the directory holding it")
+    export_cmd.add_argument('output_dir')
+
+    args = parser.parse_args()
+    store = CorpusStore(args.corpus)
+    try:
+        if args.command == 'stats':
+            stats = store.stats()
+            print(f"Tabs: {stats['tabs']} ({stats['unique_contents']} unique contents)")
+            print(f"Content: {stats['raw_bytes'] / 1024:.0f} KB raw, "
+                  f"{stats['stored_bytes'] / 1024:.0f} KB stored, "
+                  f"{stats['file_bytes'] / 1024:.0f} KB on disk")
+        elif args.command == 'get':
+            tab = store.get(args.url)
+            if tab is None:
+                print(f"Not in corpus: {args.url}")
+                return
+            print(f"{tab['title']} by {tab['artist']} ({tab['tab_type']})")
+            print("=" * 50)
+            print(tab['content'])
+        else:
+            count = store.export(args.output_dir)
+            print(f"Exported {count} tabs to {args.output_dir}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
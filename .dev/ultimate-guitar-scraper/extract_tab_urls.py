@@ -4,78 +4,125 @@ Ultimate Guitar Tab URL Extractor
 
 This script extracts all tab URLs from your saved Ultimate Guitar HTML file.
 It finds URLs that match the pattern: https://tabs.ultimate-guitar.com/tab/...
+
+Files are memory-mapped and scanned in overlapping chunks, so memory use
+stays flat however large the export is. Pass any number of export files or
+directories; URLs are canonicalized (query string and fragment dropped),
+deduplicated across all inputs and written out as they are found.
+
+Usage:
+    python extract_tab_urls.py                        # ~/Downloads/(1) My tabs @ Ultimate-Guitar.Com.html
+    python extract_tab_urls.py export1.html exports/  # many files and/or directories
 """
 
+import argparse
+import mmap
 import re
-import sys
 from pathlib import Path
 
+# Pattern to match Ultimate Guitar tab URLs
+# Looking for: https://tabs.ultimate-guitar.com/tab/artist/song-type-number
+URL_PATTERN = re.compile(rb'https://tabs\.ultimate-guitar\.com/tab/[^"\'\s<>]+')
+
+CHUNK_SIZE = 8 * 1024 * 1024
+# Longer than the URL prefix, so a URL starting just before a chunk
+# boundary is still matched by the chunk it starts in
+CHUNK_OVERLAP = 4096
+
+# Query string, fragment, or an HTML entity (&quot;, &amp;) glued onto the URL
+URL_END_RE = re.compile(r'[?#&]')
+
+def canonicalize(url):
+    """Strip query string, fragment and trailing entity junk from a tab URL."""
+    return URL_END_RE.split(url, 1)[0].rstrip('/')
+
+def iter_file_urls(path, chunk_size=CHUNK_SIZE):
+    """Yield every tab URL in one file (duplicates included), scanning it via mmap."""
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # Empty file
+        with mapped:
+            size = len(mapped)
+            for start in range(0, size, chunk_size):
+                boundary = min(start + chunk_size, size)
+                end = min(boundary + CHUNK_OVERLAP, size)
+                for match in URL_PATTERN.finditer(mapped, start, end):
+                    if match.start() >= boundary:
+                        break  # Belongs to the next chunk
+                    if match.end() == end and end < size:
+                        # Cut off by the scan window: match it again without the limit
+                        match = URL_PATTERN.match(mapped, match.start())
+                    yield match.group().decode('utf-8', errors='replace')
+
+def iter_export_files(paths):
+    """Expand directories into the HTML files they contain."""
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob('*') if p.suffix.lower() in ('.html', '.htm'))
+        else:
+            yield path
+
+def iter_unique_urls(paths):
+    """Yield each canonical tab URL once, in order of first appearance across all inputs."""
+    seen = set()
+    for path in iter_export_files(paths):
+        for url in iter_file_urls(path):
+            url = canonicalize(url)
+            if url not in seen:
+                seen.add(url)
+                yield url
+
 def extract_tab_urls(html_file_path):
     """Extract all Ultimate Guitar tab URLs from the HTML file."""
-    
-    # Read the HTML file
     try:
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        return list(iter_unique_urls([html_file_path]))
     except Exception as e:
         print(f"Error reading file: {e}")
         return []
-    
-    # Pattern to match Ultimate Guitar tab URLs
-    # Looking for: https://tabs.ultimate-guitar.com/tab/artist/song-type-number
-    pattern = r'https://tabs\.ultimate-guitar\.com/tab/[^"\s<>]+'
-    
-    # Find all matches
-    urls = re.findall(pattern, html_content)
-    
-    # Remove duplicates while preserving order
-    unique_urls = []
-    seen = set()
-    for url in urls:
-        if url not in seen:
-            unique_urls.append(url)
-            seen.add(url)
-    
-    return unique_urls
 
 def main():
     # Default path to your downloaded HTML file
-    html_file = Path.home() / "Downloads" / "(1) My tabs @ Ultimate-Guitar.Com.html"
+    default_file = Path.home() / "Downloads" / "(1) My tabs @ Ultimate-Guitar.Com.html"
     
-    # Allow custom path as command line argument
-    if len(sys.argv) > 1:
-        html_file = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Extract Ultimate Guitar tab URLs from saved HTML exports")
+    parser.add_argument('inputs', nargs='*', default=[default_file],
+                        help="Saved HTML files and/or directories of them")
+    parser.add_argument('-o', '--output', default=Path.cwd() / "ultimate_guitar_urls.txt",
+                        help="File to write the URLs to, one per line")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="Don't print each URL as it is found")
+    args = parser.parse_args()
     
-    # Check if file exists
-    if not html_file.exists():
-        print(f"HTML file not found: {html_file}")
+    # Check if files exist
+    missing = [path for path in args.inputs if not Path(path).exists()]
+    if missing:
+        for path in missing:
+            print(f"HTML file not found: {path}")
         print("Please provide the correct path to your downloaded HTML file.")
         return
     
-    print(f"Extracting tab URLs from: {html_file}")
-    
-    # Extract URLs
-    urls = extract_tab_urls(html_file)
-    
-    if not urls:
-        print("No tab URLs found in the HTML file.")
-        return
-    
-    print(f"\nFound {len(urls)} unique tab URLs:")
+    print(f"Extracting tab URLs from: {', '.join(str(path) for path in args.inputs)}")
     print("-" * 50)
     
-    # Print all URLs
-    for i, url in enumerate(urls, 1):
-        print(f"{i:3d}. {url}")
-    
-    # Save to file
-    output_file = Path.cwd() / "ultimate_guitar_urls.txt"
+    # Stream unique URLs straight to the output file
+    output_file = Path(args.output)
+    count = 0
     with open(output_file, 'w') as f:
-        for url in urls:
+        for url in iter_unique_urls(args.inputs):
+            count += 1
             f.write(url + '\n')
+            if not args.quiet:
+                print(f"{count:3d}. {url}")
+    
+    if not count:
+        print("No tab URLs found in the HTML file.")
+        return
     
     print(f"\nURLs saved to: {output_file}")
-    print(f"Total tabs found: {len(urls)}")
+    print(f"Total tabs found: {count}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP response cache shared by the tab scrapers.
+
+Bodies are stored gzip-compressed and content-addressed (sha256 of the body),
+with a small SQLite index mapping each URL to its body plus the ETag and
+Last-Modified validators. Cached entries are revalidated with conditional
+requests, the least recently used entries are evicted once the cache grows
+past its size budget, and offline mode serves everything from disk without
+touching the network.
+"""
+
+import gzip
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".http_cache"
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL has never been cached."""
+
+
+class CachedResponse:
+    def __init__(self, url, body, etag=None, last_modified=None, fetched_at=None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    @property
+    def text(self):
+        """
+        The body decoded as UTF-8 (undecodable bytes replaced).
+
+        The response charset isn't stored or consulted: Ultimate Guitar
+        serves UTF-8, which is all the scrapers fetch.
+        """
+        return self.body.decode('utf-8', errors='replace')
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024, max_age=None, offline=False):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the index and compressed bodies
+            max_bytes: Size budget for stored bodies before LRU eviction kicks in
+            max_age: Seconds a cached body is served without revalidation (None = always revalidate)
+            offline: Never touch the network; serve cached bodies or raise CacheMiss
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.offline = offline
+
+        self.db = sqlite3.connect(self.cache_dir / "index.db")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self.db.commit()
+        self._total_size = self.total_size()
+
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evicted': 0}
+        self.last_hit = False  # Whether the most recent cached_get skipped the network
+
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / f"{digest}.gz"
+
+    def get(self, url):
+        """Return the cached response for a URL, or None."""
+        row = self.db.execute(
+            "SELECT digest, etag, last_modified, fetched_at FROM entries WHERE url = ?", (url,)
+        ).fetchone()
+        if not row:
+            return None
+
+        digest, etag, last_modified, fetched_at = row
+        try:
+            body = gzip.decompress(self._object_path(digest).read_bytes())
+        except (OSError, EOFError):
+            # Body went missing or is corrupt; forget the entry
+            self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self.db.commit()
+            return None
+
+        self.db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        self.db.commit()
+        return CachedResponse(url, body, etag, last_modified, fetched_at)
+
+    def is_fresh(self, cached):
+        """Whether a cached response may be served without revalidating."""
+        return self._fresh_at(cached.fetched_at)
+
+    def _fresh_at(self, fetched_at):
+        if self.offline:
+            return True
+        if self.max_age is None:
+            return False
+        return time.time() - fetched_at < self.max_age
+
+    def serves_from_disk(self, url):
+        """Whether fetching `url` right now would skip the network entirely."""
+        if self.offline:
+            return True
+        if self.max_age is None:
+            return False
+        # Index row only: no body read, no access-time update (the fetch does both)
+        row = self.db.execute("SELECT fetched_at FROM entries WHERE url = ?", (url,)).fetchone()
+        return row is not None and self._fresh_at(row[0])
+
+    def conditional_headers(self, cached):
+        """Request headers that ask the server to revalidate a cached response."""
+        headers = {}
+        if cached is None:
+            return headers
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """Store a response body for a URL and return it as a CachedResponse."""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_bytes(gzip.compress(body, compresslevel=6))
+            tmp_path.replace(path)
+            self._total_size += path.stat().st_size
+
+        # A URL whose body changed leaves its old body behind unless another URL uses it
+        old = self.db.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+
+        now = time.time()
+        self.db.execute(
+            """
+            INSERT OR REPLACE INTO entries (url, digest, size, etag, last_modified, fetched_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (url, digest, path.stat().st_size, etag, last_modified, now, now),
+        )
+        if old and old[0] != digest:
+            self._total_size -= self._drop_unused(old[0])
+        self.db.commit()
+        self.evict()
+        return CachedResponse(url, body, etag, last_modified, now)
+
+    def mark_revalidated(self, cached):
+        """Record that the server confirmed a cached response is still current (304)."""
+        now = time.time()
+        self.db.execute(
+            "UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, cached.url)
+        )
+        self.db.commit()
+        cached.fetched_at = now
+        return cached
+
+    def total_size(self):
+        """Total compressed size of all distinct stored bodies."""
+        row = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits its size budget."""
+        if self._total_size <= self.max_bytes:
+            return
+
+        total = self.total_size()
+
+        rows = self.db.execute("SELECT url, digest FROM entries ORDER BY accessed_at").fetchall()
+        for url, digest in rows:
+            if total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self.stats['evicted'] += 1
+            total -= self._drop_unused(digest)
+        self.db.commit()
+        self._total_size = total
+
+    def _drop_unused(self, digest):
+        """Delete a stored body no entry refers to any more. Returns the bytes freed."""
+        # Bodies are shared between URLs with identical content
+        still_used = self.db.execute(
+            "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if still_used:
+            return 0
+        path = self._object_path(digest)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return 0
+        return size
+
+    def close(self):
+        self.db.close()
+
+
+def cached_get(session, cache, url, timeout=10):
+    """
+    Fetch a URL through a requests.Session, using the cache when possible.
+
+    Returns the response body as text. Raises CacheMiss in offline mode when
+    the URL has never been fetched, and requests.HTTPError for error responses.
+    """
+    if cache is None:
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.text
+
+    cached = cache.get(url)
+    cache.last_hit = cached is not None and cache.is_fresh(cached)
+    if cache.last_hit:
+        cache.stats['hits'] += 1
+        return cached.text
+    if cache.offline:
+        cache.stats['misses'] += 1
+        raise CacheMiss(f"Not in cache (offline mode): {url}")
+
+    response = session.get(url, headers=cache.conditional_headers(cached), timeout=timeout)
+    if response.status_code == 304 and cached is not None:
+        cache.stats['revalidated'] += 1
+        return cache.mark_revalidated(cached).text
+
+    response.raise_for_status()
+    cache.stats['misses'] += 1
+    stored = cache.put(
+        url,
+        response.content,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+    )
+    return stored.text
+
+
+def add_cache_arguments(parser):
+    """Add the shared cache command-line options to an argparse parser."""
+    parser.add_argument('--cache-dir', default=None,
+                        help=f"Response cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always download pages, bypassing the response cache")
+    parser.add_argument('--offline', action='store_true',
+                        help="Only use cached pages; never touch the network")
+    parser.add_argument('--max-age', type=float, default=None,
+                        help="Seconds a cached page is reused without revalidation")
+
+
+def cache_from_args(args):
+    """Build a ResponseCache from parsed command-line options (or None)."""
+    if args.no_cache:
+        return None
+    return ResponseCache(args.cache_dir, max_age=args.max_age, offline=args.offline)
@@ -6,34 +6,160 @@ Uses Playwright to automate browser, extract content, and upload to your app.
 No manual steps required!
 
 Requirements:
-    pip install playwright requests
+    pip install playwright requests aiohttp
     playwright install chromium
 """
 
+import argparse
 import asyncio
 import json
 import time
-import re
 from pathlib import Path
+import aiohttp
 import requests
-from playwright.async_api import async_playwright
-import sys
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+from browser_pool import BrowserPool
+from chord_engine import PARSED_VERSION, encode_parsed
+from import_journal import ImportJournal, FETCHED, PARSED, UPLOADED, FAILED
+from key_detection import chords_from_parsed, detect_keys
+from metrics import DEPTH_BUCKETS, SIZE_BUCKETS, HttpTimings, Registry
+from normalize import ContentNormalizer, format_summary
+from page_extract import CONTENT_SELECTOR, capture_tab_data, extract_in_page, timed
+from pipeline import Pipeline, Stage
+from profiling import add_profile_arguments, profile_stage, profiler_from_args
+from rate_control import RETRY_STATUSES, RateControl, format_rate_summary
+from request_filter import RequestFilter, format_page_stats
+from song_ids import content_hash, source_id_for
+from sync_manifest import SyncManifest
+from ug_store import extract_tab_from_html
+
+
+# Largest batch /api/songs/batch accepts (MAX_BATCH_SONGS in api/songs/batch.js)
+MAX_BATCH_SONGS = 100
+
+# Songs whose keys are detected together, and how long a group waits to fill
+KEY_GROUP_SIZE = 50
+KEY_GROUP_LINGER = 1.0
+
+
+def batch_size_arg(value):
+    """argparse type for --batch-size: 1 to MAX_BATCH_SONGS."""
+    size = int(value)
+    if not 1 <= size <= MAX_BATCH_SONGS:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {MAX_BATCH_SONGS} (the server's limit)")
+    return size
 
 
 class UGToOpenChordsImporter:
-    def __init__(self, app_url="http://localhost:5173"):
+    def __init__(self, app_url="http://localhost:5173", static_first=True,
+                 workers=4, headless=True, recycle_after=200, content_timeout=15000,
+                 block_resources=True, upload_workers=4, bulk=False, batch_size=25,
+                 journal=None, skip_unchanged=True, capture_data=True, manifest=None, rate=2.0,
+                 profiler=None):
         self.app_url = app_url
         self.api_url = f"{app_url}/api"
         self.session = requests.Session()
+        # Try the JSON store embedded in the raw page before launching into the browser
+        self.static_first = static_first
+        self.page_headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        self.http = None  # aiohttp.ClientSession, open while process_urls runs
+        # Adaptive per-host pacing with retries: page fetches and renders against
+        # Ultimate Guitar start at `rate` per second, API calls get their own budget
+        self.rate_control = RateControl(rate=rate, concurrency=workers, max_concurrency=workers)
+        self.api_control = RateControl(rate=20, concurrency=upload_workers, max_concurrency=upload_workers)
+        self.upload_workers = upload_workers  # Concurrent POSTs to the API
+        # Send songs in chunks to /api/songs/batch instead of one POST each
+        self.bulk = bulk
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SONGS))  # The server rejects larger batches whole
+        # Skip songs whose stored contentHash already matches (ids are stable per tab)
+        self.skip_unchanged = skip_unchanged
+        self.remote_hashes = {}
+        
+        # Browser worker pool
+        self.workers = workers  # Pages processed concurrently
+        self.headless = headless
+        self.recycle_after = recycle_after  # Pages per browser before it is relaunched
+        self.content_timeout = content_timeout  # ms to wait for the tab content to render
+        # Capture the tab from the page's own data responses before falling back to the DOM
+        self.capture_data = capture_data
+        # Abort images, fonts, ads and trackers, and count what each page downloads
+        self.request_filter = RequestFilter() if block_resources else None
         
         self.stats = {
             'total': 0,
             'successful': 0,
             'failed': 0,
-            'no_content': 0
+            'no_content': 0,
+            'unchanged': 0,
+            'static': 0,
+            'browser': 0,
+            'captured': 0,
+            'keys_detected': 0
         }
         
         self.failed_urls = []
+        self.pipeline = None
+        self.normalizer = ContentNormalizer()  # Cleans up content before upload, counting bytes saved
+        self.extract_times = []  # Seconds spent reading each rendered page
+        self.capture_times = []  # Seconds from navigation to captured tab data
+        self.journal = journal  # ImportJournal recording per-URL progress, for --resume
+        self.manifest = manifest  # SyncManifest of imported tabs, for incremental syncs
+        self.profiler = profiler  # Optional profiling.StageProfiler (--profile)
+        self.setup_metrics()
+    
+    def setup_metrics(self):
+        """Per-stage histograms, served during the run with --metrics-port and written at exit."""
+        self.metrics = Registry()
+        self.http_timings = HttpTimings(self.metrics, 'ug_import_http')
+        self.parse_seconds = self.metrics.histogram(
+            'ug_import_parse_seconds', "Time to read the tab out of a page (capture includes the wait for it)",
+            ('source',))
+        self.content_bytes = self.metrics.histogram(
+            'ug_import_content_bytes', "Tab content size", ('source',), buckets=SIZE_BUCKETS)
+        self.upload_seconds = self.metrics.histogram(
+            'ug_import_upload_seconds', "API upload latency, retries included", ('mode',))
+        self.stage_seconds = self.metrics.histogram(
+            'ug_import_stage_seconds', "Handler time per item", ('stage',))
+        self.queue_depth = self.metrics.histogram(
+            'ug_import_queue_depth', "Items still queued when a stage takes one", ('stage',), buckets=DEPTH_BUCKETS)
+        self.metrics.gauge(
+            'ug_import_queue_items', "Items currently queued in front of each stage", ('stage',),
+            collect=lambda: {(name,): depth for name, depth in self.pipeline.queue_depths().items()}
+            if self.pipeline else {})
+        self.metrics.gauge(
+            'ug_import_urls', "URLs by outcome so far", ('outcome',),
+            collect=lambda: {(name,): count for name, count in self.stats.items()})
+    
+    def observe_stage(self, stage, seconds, queue_depth):
+        """Pipeline on_item hook: per-stage timing and queue depth."""
+        self.stage_seconds.observe(seconds, stage=stage)
+        self.queue_depth.observe(queue_depth, stage=stage)
+    
+    def profiled(self, name, handler):
+        """Wrap a pipeline stage handler so --profile charges it to stage `name`."""
+        async def run(item, state):
+            with profile_stage(self.profiler, name):
+                return await handler(item, state)
+        return run
+    
+    async def setup_context(self, context):
+        """Run on every new browser context: resource filter and request timings."""
+        if self.request_filter:
+            await self.request_filter.install(context)
+        await self.http_timings.install(context)
+    
+    def mark_synced(self, url, song_hash):
+        """Record a tab as imported in the sync manifest, if there is one."""
+        if self.manifest:
+            self.manifest.record(url, song_hash)
+    
+    def log_state(self, url, state, **details):
+        """Record a URL's progress in the journal, if there is one."""
+        if self.journal:
+            self.journal.record(url, state, **details)
     
     def test_api(self):
         """Test if the app API is accessible."""
@@ -50,87 +176,153 @@ class UGToOpenChordsImporter:
             print(f"   Make sure your app is running at {self.app_url}")
             return False
     
-    def upload_song(self, song_data):
+    async def upload_song(self, song_data):
         """Upload song to the API."""
-        try:
-            response = self.session.post(
-                f"{self.api_url}/songs",
+        url = f"{self.api_url}/songs"
+        
+        async def request():
+            async with self.http.post(
+                url,
                 json=song_data,
-                timeout=30
-            )
-            
-            if response.status_code in [200, 201]:
-                return True, response.json()
-            else:
-                return False, f"HTTP {response.status_code}: {response.text}"
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status in RETRY_STATUSES:
+                    response.raise_for_status()  # Throttled or transient: retried with backoff
+                if response.status in [200, 201]:
+                    return True, await response.json()
+                else:
+                    return False, f"HTTP {response.status}: {await response.text()}"
+        
+        start = time.perf_counter()
+        try:
+            return await self.api_control.call(url, request)
         except Exception as e:
             return False, str(e)
+        finally:
+            self.upload_seconds.observe(time.perf_counter() - start, mode='single')
     
-    async def extract_tab_content(self, page, url):
-        """Extract tab content from a single Ultimate Guitar page."""
+    async def fetch_remote_hashes(self):
+        """
+        Fetch {sourceId: contentHash} for every imported song the API already has.
+        
+        Songs stored without the current parsed form are left out, so they
+        are uploaded again (with it) even when their content is unchanged.
+        """
+        url = f"{self.api_url}/songs"
+        
+        async def request():
+            async with self.http.get(
+                url,
+                params={'view': 'hashes'},
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                response.raise_for_status()
+                return await response.json()
+        
         try:
+            hashes = await self.api_control.call(url, request)
+        except Exception as e:
+            print(f"⚠️  Could not fetch stored content hashes, uploading everything: {e}")
+            return {}
+        return {song['sourceId']: song.get('contentHash') for song in hashes
+                if song.get('sourceId') and song.get('parsedVersion') == PARSED_VERSION}
+    
+    async def upload_songs_batch(self, songs):
+        """Upload a chunk of songs to the batch endpoint. Returns per-song results on success."""
+        url = f"{self.api_url}/songs/batch"
+        
+        async def request():
+            async with self.http.post(
+                url,
+                json={'songs': songs},
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status in RETRY_STATUSES:
+                    response.raise_for_status()  # Throttled or transient: retried with backoff
+                if response.status == 200:
+                    return True, (await response.json())['results']
+                else:
+                    return False, f"HTTP {response.status}: {await response.text()}"
+        
+        start = time.perf_counter()
+        try:
+            return await self.api_control.call(url, request)
+        except Exception as e:
+            return False, str(e)
+        finally:
+            self.upload_seconds.observe(time.perf_counter() - start, mode='batch')
+    
+    async def fetch_static_tab(self, url):
+        """Fetch the raw page and read the tab from its embedded JSON store (no browser)."""
+        async def request():
+            async with self.http.get(
+                url,
+                headers=self.page_headers,
+                timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
+                response.raise_for_status()
+                start = time.perf_counter()
+                html = await response.text()
+                self.http_timings.observe_download(url, time.perf_counter() - start)
+                return html
+        
+        try:
+            html = await self.rate_control.call(url, request)
+        except Exception as e:
+            print(f"⚠️  Static fetch failed, falling back to browser: {e}")
+            return None
+        
+        with profile_stage(self.profiler, 'parse'):
+            start = time.perf_counter()
+            store_tab = extract_tab_from_html(html)
+            self.parse_seconds.observe(time.perf_counter() - start, source='js-store')
+            if not store_tab or not store_tab['content'].strip():
+                return None
+            return self.tab_data_from_store(url, store_tab, 'js-store')
+    
+    def tab_data_from_store(self, url, store_tab, source):
+        """Build the importer's tab dict from ug_store tab fields."""
+        # Determine type from URL
+        tab_type = 'tabs' if '-tabs-' in url else 'chords'
+        content = store_tab['content'].strip()
+        
+        return {
+            'url': url,
+            'title': store_tab['title'] or 'Unknown Song',
+            'artist': store_tab['artist'] or 'Unknown Artist',
+            'type': tab_type,
+            'content': content,
+            'content_markup': store_tab['content_markup'],
+            'key': store_tab['key'],
+            'capo': store_tab['capo'],
+            'tuning': store_tab['tuning'],
+            'content_source': source,
+            'has_content': len(content) > 50
+        }
+    
+    async def extract_tab_content(self, url, get_page):
+        """
+        Extract tab content from a single Ultimate Guitar page.
+        
+        `get_page` is awaited for a browser page only when the embedded page
+        data isn't enough, so static pages never touch the browser.
+        """
+        if self.static_first:
+            tab_data = await self.fetch_static_tab(url)
+            if tab_data:
+                print(f"📦 Read from page data: {url}")
+                self.stats['static'] += 1
+                return tab_data
+        
+        self.stats['browser'] += 1
+        page = None
+        try:
+            page = await get_page()
+            if self.request_filter:
+                self.request_filter.start_page(page, url)
             print(f"📄 Loading: {url}")
-            
-            # Navigate to the page
-            await page.goto(url, wait_until='networkidle', timeout=30000)
-            
-            # Wait a bit for dynamic content
-            await page.wait_for_timeout(2000)
-            
-            # Extract title and artist
-            title = "Unknown Song"
-            artist = "Unknown Artist"
-            
-            h1_elem = await page.query_selector('h1')
-            if h1_elem:
-                h1_text = await h1_elem.inner_text()
-                h1_text = h1_text.strip()
-                
-                # Parse "Song Title Type by Artist"
-                if " by " in h1_text.lower():
-                    parts = h1_text.split(" by ", 1)
-                    if len(parts) == 2:
-                        title = re.sub(r'\s+(Chords|Tab|Ukulele|Bass)$', '', parts[0], flags=re.IGNORECASE).strip()
-                        artist = parts[1].strip()
-            
-            # Fallback: extract from URL
-            if title == "Unknown Song" or artist == "Unknown Artist":
-                url_parts = url.split('/')
-                if len(url_parts) >= 6:
-                    if artist == "Unknown Artist":
-                        artist = url_parts[5].replace('-', ' ').title()
-                    if title == "Unknown Song":
-                        song_part = url_parts[6]
-                        # Remove type and ID
-                        song_clean = re.sub(r'-(chords|tabs|ukulele|bass)-\d+$', '', song_part)
-                        title = song_clean.replace('-', ' ').title()
-            
-            # Extract chord/tab content
-            content = ""
-            
-            # Try <code> element first (most common)
-            code_elem = await page.query_selector('code')
-            if code_elem:
-                content = await code_elem.inner_text()
-            
-            # Try <pre> if no code
-            if not content:
-                pre_elem = await page.query_selector('pre')
-                if pre_elem:
-                    content = await pre_elem.inner_text()
-            
-            # Determine type from URL
-            tab_type = 'tabs' if '-tabs-' in url else 'chords'
-            
-            return {
-                'url': url,
-                'title': title,
-                'artist': artist,
-                'type': tab_type,
-                'content': content.strip() if content else '',
-                'has_content': bool(content and len(content.strip()) > 50)
-            }
-            
+            # Paced like the static fetches; navigation errors are retried
+            return await self.rate_control.call(url, lambda: self.render_tab(url, page))
         except Exception as e:
             print(f"❌ Error extracting {url}: {e}")
             return {
@@ -142,63 +334,258 @@ class UGToOpenChordsImporter:
                 'has_content': False,
                 'error': str(e)
             }
+        finally:
+            if self.request_filter and page is not None:
+                page_stats = self.request_filter.finish_page(page)
+                if page_stats:
+                    print(f"🧹 {format_page_stats(page_stats)}")
+    
+    async def render_tab(self, url, page):
+        """Load `url` in a browser page and read the tab from its data responses or the DOM."""
+        if self.capture_data:
+            # Take the tab payload off the wire and stop the load there
+            store_tab, elapsed = await timed(capture_tab_data(page, url, self.content_timeout))
+            if store_tab:
+                self.capture_times.append(elapsed)
+                self.parse_seconds.observe(elapsed, source='captured')
+                self.stats['captured'] += 1
+                return self.tab_data_from_store(url, store_tab, 'captured')
+            print(f"⚠️  No tab data in the page's responses, reading the DOM: {url}")
+        else:
+            # Navigate to the page
+            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+        
+        # Wait for the tab content to render rather than a fixed delay
+        try:
+            await page.wait_for_selector(CONTENT_SELECTOR, timeout=self.content_timeout)
+        except PlaywrightTimeoutError:
+            print(f"⚠️  Content did not render within {self.content_timeout}ms: {url}")
+        
+        # Title, artist, type and content in a single round trip
+        data, elapsed = await timed(extract_in_page(page))
+        self.extract_times.append(elapsed)
+        self.parse_seconds.observe(elapsed, source='dom')
+        content = data['content']
+        
+        return {
+            'url': url,
+            'title': data['title'],
+            'artist': data['artist'],
+            'type': data['type'],
+            'content': content,
+            'content_source': data['contentSource'] or 'browser',
+            'has_content': len(content) > 50
+        }
+    
+    async def extract_stage(self, item, state):
+        """Pipeline stage 1: fetch/render one URL. `state` holds this worker's browser page."""
+        i, url = item
+        self.stats['total'] += 1
+        rendered = False
+        
+        async def get_page():
+            nonlocal rendered
+            rendered = True
+            if state.get('lease') is None:
+                state['lease'] = await self.pool.new_page()
+            return state['lease'].page
+        
+        tab_data = await self.extract_tab_content(url, get_page)
+        if rendered and state.get('lease') is not None:
+            # Counts towards the browser's recycle limit
+            state['lease'] = await self.pool.page_done(state['lease'])
+        
+        if tab_data['has_content']:
+            self.log_state(url, FETCHED, source=tab_data.get('content_source', 'browser'))
+        
+        self.extracted += 1
+        print(f"\n[{self.extracted}/{self.queued}] Extracted: {url}")
+        return i, url, tab_data
+    
+    async def release_page(self, state):
+        """Hand a render worker's browser page back to the pool."""
+        if state.get('lease') is not None:
+            await self.pool.release(state['lease'])
+            state['lease'] = None
+    
+    async def normalize_stage(self, item, state):
+        """Pipeline stage 2: turn extracted tab data into an API song object."""
+        _, url, tab_data = item
+        if not tab_data['has_content']:
+            print(f"⚠️  No content: {tab_data['title']} by {tab_data['artist']}")
+            self.stats['no_content'] += 1
+            self.failed_urls.append({'url': url, 'reason': 'no_content'})
+            self.log_state(url, FAILED, reason=tab_data.get('error', 'no_content'))
+            return None
+        
+        self.content_bytes.observe(len(tab_data['content'].encode('utf-8')),
+                                   source=tab_data.get('content_source') or 'unknown')
+        
+        # Markup, odd spaces, CRLF, trailing whitespace and blank runs never reach the API.
+        # Normalized from the page's raw markup when there is one, so the bytes saved count it.
+        content, bytes_saved = self.normalizer.normalize(tab_data.get('content_markup') or tab_data['content'])
+        if bytes_saved:
+            print(f"🧹 Cleaned up: {tab_data['title']} by {tab_data['artist']} ({bytes_saved} bytes saved)")
+        
+        # Same tab -> same sourceId, so a re-import overwrites instead of duplicating
+        source_id = source_id_for(url, content)
+        song_hash = content_hash(content)
+        if self.remote_hashes.get(source_id) == song_hash:
+            print(f"⏭️  Unchanged: {tab_data['title']} by {tab_data['artist']}")
+            self.stats['unchanged'] += 1
+            self.log_state(url, UPLOADED, source_id=source_id, unchanged=True)
+            self.mark_synced(url, song_hash)
+            return None
+        
+        # Create song object for API
+        song = {
+            'sourceId': source_id,
+            'title': tab_data['title'],
+            'artist': tab_data['artist'],
+            'key': tab_data.get('key'),  # Detected from the chords at upload if the page has none
+            'type': tab_data['type'],
+            'content': content,
+            'parsed': encode_parsed(content),  # Parsed once here, not on every view
+            'updatedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+        self.log_state(url, PARSED, source_id=source_id, bytes_saved=bytes_saved)
+        return url, song
+    
+    def assign_keys(self, songs):
+        """
+        Give every song a key and keyConfidence.
+        
+        Keys stated on the page are kept (confidence 1). The rest are
+        detected from the songs' chords, all songs in one matrix operation.
+        """
+        unkeyed = []
+        for song in songs:
+            if song.get('key'):
+                song['keyConfidence'] = 1.0
+            else:
+                unkeyed.append(song)
+        if not unkeyed:
+            return
+        
+        detected = detect_keys(chords_from_parsed(song['parsed']) for song in unkeyed)
+        for song, (key, confidence) in zip(unkeyed, detected):
+            song['key'] = key
+            song['keyConfidence'] = confidence
+            self.stats['keys_detected'] += key is not None
+    
+    async def keys_stage(self, items, state):
+        """Pipeline stage 3: give a group of songs their keys in one pass."""
+        self.assign_keys([song for _, song in items])
+        return items
+    
+    async def upload_stage(self, item, state):
+        """Pipeline stage 4: POST the song to the API."""
+        url, song = item
+        success, result = await self.upload_song(song)
+        
+        if success:
+            print(f"✅ Uploaded: {song['title']} by {song['artist']}")
+            self.stats['successful'] += 1
+            self.log_state(url, UPLOADED, source_id=song['sourceId'])
+            self.mark_synced(url, content_hash(song['content']))
+        else:
+            print(f"❌ Upload failed: {result}")
+            self.stats['failed'] += 1
+            self.failed_urls.append({'url': url, 'reason': result})
+            self.log_state(url, FAILED, reason=result)
+        return None
+    
+    async def bulk_upload_stage(self, item, state):
+        """Pipeline stage 4 (bulk mode): collect songs and upload them a chunk at a time."""
+        batch = state.setdefault('batch', [])
+        batch.append(item)
+        if len(batch) >= self.batch_size:
+            await self.flush_batch(state)
+        return None
+    
+    async def flush_batch(self, state):
+        """Upload the songs an upload worker has collected so far."""
+        batch = state.get('batch')
+        if not batch:
+            return
+        state['batch'] = []
+        
+        success, result = await self.upload_songs_batch([song for _, song in batch])
+        if not success:
+            print(f"❌ Batch upload failed ({len(batch)} songs): {result}")
+            self.stats['failed'] += len(batch)
+            for url, _ in batch:
+                self.failed_urls.append({'url': url, 'reason': result})
+                self.log_state(url, FAILED, reason=result)
+            return
+        
+        # Results come back in the order the songs were sent
+        saved = 0
+        for (url, song), item_result in zip(batch, result):
+            if item_result['status'] == 'saved':
+                saved += 1
+                self.stats['successful'] += 1
+                self.log_state(url, UPLOADED, source_id=song['sourceId'])
+                self.mark_synced(url, content_hash(song['content']))
+            else:
+                reason = item_result.get('error') or item_result['status']
+                print(f"❌ Upload failed: {song['title']} by {song['artist']}: {reason}")
+                self.stats['failed'] += 1
+                self.failed_urls.append({'url': url, 'reason': reason})
+                self.log_state(url, FAILED, reason=reason)
+        print(f"✅ Uploaded batch: {saved}/{len(batch)} songs saved")
     
     async def process_urls(self, urls):
-        """Process all URLs with browser automation."""
-        
-        async with async_playwright() as p:
-            # Launch browser
-            print("🌐 Launching browser...")
-            browser = await p.chromium.launch(headless=False)  # Set to True to hide browser
-            context = await browser.new_context()
-            page = await context.new_page()
+        """Process all URLs through the extract -> normalize -> keys -> upload pipeline."""
+        self.queued = len(urls)
+        self.extracted = 0
+        
+        async with async_playwright() as p, aiohttp.ClientSession(
+                trace_configs=[self.http_timings.trace_config()]) as http:
+            self.http = http
+            if self.skip_unchanged:
+                self.remote_hashes = await self.fetch_remote_hashes()
+                print(f"🔑 {len(self.remote_hashes)} songs already in the app")
+            self.pool = BrowserPool(
+                p,
+                headless=self.headless,
+                recycle_after=self.recycle_after,
+                context_setup=self.setup_context,
+            )
             
-            # Process each URL
-            for i, url in enumerate(urls, 1):
-                print(f"\n[{i}/{len(urls)}] Processing...")
-                self.stats['total'] += 1
-                
-                # Extract content
-                tab_data = await self.extract_tab_content(page, url)
-                
-                if not tab_data['has_content']:
-                    print(f"⚠️  No content: {tab_data['title']} by {tab_data['artist']}")
-                    self.stats['no_content'] += 1
-                    self.failed_urls.append({'url': url, 'reason': 'no_content'})
-                    continue
-                
-                # Create song object for API
-                song = {
-                    'id': f"{int(time.time() * 1000)}_{i}",
-                    'title': tab_data['title'],
-                    'artist': tab_data['artist'],
-                    'key': 'C',  # default
-                    'type': tab_data['type'],
-                    'content': tab_data['content'],
-                    'updatedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
-                }
-                
-                # Upload to API
-                success, result = self.upload_song(song)
-                
-                if success:
-                    print(f"✅ Uploaded: {tab_data['title']} by {tab_data['artist']}")
-                    self.stats['successful'] += 1
-                else:
-                    print(f"❌ Upload failed: {result}")
-                    self.stats['failed'] += 1
-                    self.failed_urls.append({'url': url, 'reason': result})
-                
-                # Small delay to be respectful
-                await page.wait_for_timeout(1500)
+            # Bounded queues between the stages: if uploads fall behind,
+            # extraction pauses instead of piling up finished tabs in memory
+            self.pipeline = Pipeline([
+                Stage('extract', self.profiled('fetch', self.extract_stage), concurrency=self.workers,
+                      on_worker_exit=self.release_page),
+                Stage('normalize', self.profiled('normalize', self.normalize_stage), concurrency=1),
+                Stage('keys', self.profiled('keys', self.keys_stage), concurrency=1,
+                      batch_size=KEY_GROUP_SIZE, linger=KEY_GROUP_LINGER),
+                Stage('upload', self.profiled('upload', self.bulk_upload_stage), concurrency=self.upload_workers,
+                      queue_size=self.upload_workers * self.batch_size,
+                      on_worker_exit=self.flush_batch)
+                if self.bulk else
+                Stage('upload', self.profiled('upload', self.upload_stage), concurrency=self.upload_workers),
+            ], on_item=self.observe_stage)
             
-            await browser.close()
+            print(f"👷 Starting {self.workers} extract workers, {self.upload_workers} upload workers...")
+            await self.pipeline.run(enumerate(urls, 1))
+            await self.pool.close()
+            self.http = None
+            
+            if self.pool.browsers_launched:
+                print(f"\n🌐 Browsers launched: {self.pool.browsers_launched}")
     
     def save_results(self):
         """Save import results."""
         results = {
             'stats': self.stats,
             'failed_urls': self.failed_urls,
+            'stages': self.pipeline.stage_stats() if self.pipeline else None,
+            'network': self.request_filter.summary() if self.request_filter else None,
+            'normalize': self.normalizer.summary(),
+            'journal': self.journal.summary() if self.journal else None,
+            'rate_control': {**self.rate_control.summary(), **self.api_control.summary()},
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
         }
         
@@ -216,7 +603,28 @@ class UGToOpenChordsImporter:
         print(f"Total URLs:     {self.stats['total']}")
         print(f"✅ Successful:  {self.stats['successful']}")
         print(f"⚠️  No Content:  {self.stats['no_content']}")
+        print(f"⏭️  Unchanged:   {self.stats['unchanged']}")
         print(f"❌ Failed:      {self.stats['failed']}")
+        print(f"🎹 Keys detected from chords: {self.stats['keys_detected']}")
+        print(f"🧹 Content: {format_summary(self.normalizer.summary())}")
+        print(f"📦 From page data: {self.stats['static']}  🌐 Rendered in browser: {self.stats['browser']} "
+              f"({self.stats['captured']} captured from data responses)")
+        if self.request_filter and self.request_filter.totals['pages']:
+            network = self.request_filter.summary()
+            print(f"🧹 Browser requests: {network['requests']} ({network['blocked']} blocked), "
+                  f"{network['bytes'] / 1024 / 1024:.1f} MB downloaded, "
+                  f"{network['avg_bytes_per_page'] / 1024:.0f} KB/page")
+        if self.capture_times:
+            avg_ms = sum(self.capture_times) / len(self.capture_times) * 1000
+            print(f"⏱️  Captured from page data: {avg_ms:.0f} ms/page over {len(self.capture_times)} pages")
+        if self.extract_times:
+            avg_ms = sum(self.extract_times) / len(self.extract_times) * 1000
+            print(f"⏱️  In-page extraction: {avg_ms:.1f} ms/page over {len(self.extract_times)} pages")
+        if self.pipeline:
+            for name, stage in self.pipeline.stage_stats().items():
+                print(f"⏱️  {name}: {stage['processed']} items, {stage['busy_seconds']:.1f}s busy")
+        for line in format_rate_summary({**self.rate_control.summary(), **self.api_control.summary()}):
+            print(f"🚦 {line}")
         print("="*60)
         
         if self.failed_urls:
@@ -232,8 +640,46 @@ class UGToOpenChordsImporter:
 async def main():
     """Main function."""
     script_dir = Path(__file__).parent
-    urls_file = script_dir / "ultimate_guitar_urls.txt"
     
+    parser = argparse.ArgumentParser(description="Import Ultimate Guitar tabs into open-chords")
+    parser.add_argument('app_url', nargs='?', default="http://localhost:5173",
+                        help="Base URL of the open-chords app")
+    parser.add_argument('--urls-file', default=script_dir / "ultimate_guitar_urls.txt",
+                        help="File with one tab URL per line")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Number of pages processed concurrently")
+    parser.add_argument('--upload-workers', type=int, default=4,
+                        help="Number of concurrent uploads to the API")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Upload songs in chunks to /api/songs/batch instead of one request per song")
+    parser.add_argument('--batch-size', type=batch_size_arg, default=25,
+                        help=f"Songs per batch request in --bulk mode (at most {MAX_BATCH_SONGS}, the server's limit)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip URLs the journal records as uploaded; retry everything else")
+    parser.add_argument('--journal', default=script_dir / "import_journal.jsonl",
+                        help="Journal file recording per-URL progress")
+    parser.add_argument('--force', action='store_true',
+                        help="Upload every song, even when the stored content is unchanged")
+    parser.add_argument('--rate', type=float, default=2.0,
+                        help="Starting page requests per second against Ultimate Guitar (adapts to 429s and errors)")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve OpenMetrics on http://127.0.0.1:PORT/metrics while the import runs")
+    parser.add_argument('--metrics-file', default=script_dir / "import_metrics.prom",
+                        help="OpenMetrics textfile written when the import ends")
+    add_profile_arguments(parser)
+    parser.add_argument('--headed', action='store_true',
+                        help="Show the browser window instead of running headless")
+    parser.add_argument('--recycle-after', type=int, default=200,
+                        help="Relaunch the browser after this many rendered pages")
+    parser.add_argument('--no-static', action='store_true',
+                        help="Always render in the browser instead of reading the embedded page data")
+    parser.add_argument('--no-capture', action='store_true',
+                        help="Read rendered pages from the DOM instead of capturing their data responses")
+    parser.add_argument('--no-block', action='store_true',
+                        help="Load images, fonts, ads and trackers instead of blocking them")
+    args = parser.parse_args()
+    
+    urls_file = Path(args.urls_file)
     if not urls_file.exists():
         print(f"❌ URLs file not found: {urls_file}")
         return
@@ -246,28 +692,66 @@ async def main():
         print("❌ No URLs found in file")
         return
     
-    # Get app URL
-    app_url = "http://localhost:5173"
-    if len(sys.argv) > 1:
-        app_url = sys.argv[1]
+    app_url = args.app_url
+    journal = ImportJournal(args.journal)
+    manifest = SyncManifest()
     
     print("🎵 Ultimate Guitar to Open-Chords Importer")
     print(f"📍 App URL: {app_url}")
+    if args.resume:
+        pending = journal.pending(urls)
+        print(f"📓 Resuming: {len(urls) - len(pending)} already uploaded, {len(pending)} to go")
+        urls = pending
+        if not urls:
+            print("✅ Nothing left to import")
+            journal.close()
+            manifest.close()
+            return
     print(f"📚 Total tabs to import: {len(urls)}\n")
     
     # Initialize importer
-    importer = UGToOpenChordsImporter(app_url)
+    importer = UGToOpenChordsImporter(
+        app_url,
+        static_first=not args.no_static,
+        workers=args.workers,
+        headless=not args.headed,
+        recycle_after=args.recycle_after,
+        block_resources=not args.no_block,
+        capture_data=not args.no_capture,
+        upload_workers=args.upload_workers,
+        bulk=args.bulk,
+        batch_size=args.batch_size,
+        journal=journal,
+        skip_unchanged=not args.force,
+        manifest=manifest,
+        rate=args.rate,
+        profiler=profiler_from_args(args),
+    )
     
     # Test API connection
     if not importer.test_api():
         print("\n❌ Cannot proceed without API access")
         print("   Start your app with: npm run dev")
+        journal.close()
+        manifest.close()
         return
     
     print("\n🚀 Starting automated import...\n")
     
-    # Process all URLs
-    await importer.process_urls(urls)
+    if args.metrics_port is not None:
+        print(f"📈 Metrics: {importer.metrics.serve(args.metrics_port)}\n")
+    
+    # Process all URLs (the journal keeps what finished if this is interrupted)
+    try:
+        await importer.process_urls(urls)
+    finally:
+        journal.close()
+        manifest.close()
+        importer.metrics.stop()
+        importer.metrics.write_textfile(args.metrics_file)
+        print(f"📈 Metrics written to: {args.metrics_file}")
+        if importer.profiler:
+            print(f"🔬 Profile report: {importer.profiler.write()}")
     
     # Print summary
     importer.print_summary()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of per-URL import progress.
+
+Every state change (fetched, parsed, uploaded, failed) is appended to a
+JSONL file as it happens, so a crashed or interrupted import can be resumed
+from where it stopped: URLs whose last state is `uploaded` are skipped and
+everything else is tried again. Lines are flushed immediately and fsynced
+in batches, which keeps the cost per record low while bounding how much
+a power loss can take with it.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from pathlib import Path
+
+
+DEFAULT_JOURNAL = Path(__file__).parent / 'import_journal.jsonl'
+
+FETCHED = 'fetched'
+PARSED = 'parsed'
+UPLOADED = 'uploaded'
+FAILED = 'failed'
+
+
+class ImportJournal:
+    def __init__(self, path=None, fsync_every=20, fsync_interval=1.0):
+        """
+        Open (or create) a journal.
+
+        Args:
+            path: JSONL file to append to (default: import_journal.jsonl next to this script)
+            fsync_every: Records written between fsyncs
+            fsync_interval: Seconds since the last fsync after which the next record syncs
+        """
+        self.path = Path(path) if path else DEFAULT_JOURNAL
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self.states = self._replay()  # url -> last record for that URL
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._torn:
+            self._file.write('\n')  # Don't glue the next record onto the torn line
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _replay(self):
+        states = {}
+        self._torn = False
+        if not self.path.exists():
+            return states
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                self._torn = not line.endswith('\n')
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from a crash mid-write
+                states[record['url']] = record
+        return states
+
+    def record(self, url, state, **details):
+        """Append a state change for `url` (extra keyword details are stored with it)."""
+        record = {'url': url, 'state': state, 'at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), **details}
+        self.states[url] = record
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+        self._unsynced += 1
+        if (self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """Force everything written so far to disk."""
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def state(self, url):
+        """Last recorded state for `url`, or None if it was never seen."""
+        record = self.states.get(url)
+        return record['state'] if record else None
+
+    def pending(self, urls):
+        """URLs from `urls` that have not been uploaded yet (new, interrupted or failed)."""
+        return [url for url in urls if self.state(url) != UPLOADED]
+
+    def summary(self):
+        """Number of URLs in each state."""
+        return dict(Counter(record['state'] for record in self.states.values()))
+
+    def close(self):
+        self.sync()
+        self._file.close()
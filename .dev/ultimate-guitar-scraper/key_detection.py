@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Key detection from a song's chords, for many songs at once.
+
+Each song's chords are spread into a 12-bin pitch-class histogram (every
+chord tone counts once per occurrence, with extra weight on the roots of
+the first and last chord, which are usually the tonic), and the histogram
+is correlated with the Krumhansl-Kessler major and minor key profiles in
+all 12 transpositions. The best of the 24 keys wins; its correlation is the
+confidence.
+
+A batch is handled as matrix operations, not a loop per song: the songs'
+chord counts form one (songs x distinct chords) matrix, which times a
+(distinct chords x 12) chord-tone matrix gives every histogram at once, and
+one product with the (24 x 12) key profiles scores them all.
+
+    python key_detection.py scraped_tabs/corpus.db
+"""
+
+import argparse
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from chord_engine import SHARP_INDEX, FLAT_INDEX, parse_chord, parse_ug_format
+
+
+# Krumhansl & Kessler (1982) probe-tone ratings, from the tonic up
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+# Key names by tonic pitch class, spelled the way key signatures usually are
+MAJOR_KEYS = ('C', 'Db', 'D', 'Eb', 'E', 'F', 'F#', 'G', 'Ab', 'A', 'Bb', 'B')
+MINOR_KEYS = ('Cm', 'C#m', 'Dm', 'Ebm', 'Em', 'Fm', 'F#m', 'Gm', 'G#m', 'Am', 'Bbm', 'Bm')
+KEY_NAMES = MAJOR_KEYS + MINOR_KEYS
+
+# Extra weight on the roots of a song's first and last chords
+EDGE_WEIGHT = 2.0
+
+# Chord tones (semitones above the root) by quality prefix and extension
+TRIADS = {'': (0, 4, 7), 'maj': (0, 4, 7), 'm': (0, 3, 7), 'min': (0, 3, 7),
+          'dim': (0, 3, 6), 'aug': (0, 4, 8), 'sus': (0, 5, 7), 'add': (0, 4, 7)}
+EXTENSIONS = {'2': (2,), '4': (5,), '5': (), '6': (9,), '7': (10,), '9': (10, 2), '11': (10, 5), '13': (10, 9)}
+
+
+def _key_profiles():
+    """(24 x 12) matrix of every key's profile, z-scored per key."""
+    rows = [np.roll(MAJOR_PROFILE, tonic) for tonic in range(12)]
+    rows += [np.roll(MINOR_PROFILE, tonic) for tonic in range(12)]
+    profiles = np.array(rows)
+    return (profiles - profiles.mean(axis=1, keepdims=True)) / profiles.std(axis=1, keepdims=True)
+
+
+KEY_PROFILES = _key_profiles()
+
+
+def _pitch_class(note):
+    return SHARP_INDEX.get(note, FLAT_INDEX.get(note))
+
+
+def _split_quality(quality):
+    """'maj7/G' -> ('maj', '7', 'G')."""
+    quality, _, bass = quality.partition('/')
+    for prefix in ('maj', 'min', 'dim', 'aug', 'sus', 'add', 'm'):
+        if quality.startswith(prefix):
+            return prefix, quality[len(prefix):], bass
+    return '', quality, bass
+
+
+@lru_cache(maxsize=4096)
+def chord_tones(chord):
+    """Pitch classes of a chord name's tones (root first, bass last), or () if it isn't one."""
+    parts = parse_chord(chord)
+    if parts is None:
+        return ()
+    root, quality = parts
+    prefix, extension, bass = _split_quality(quality)
+
+    intervals = list(TRIADS.get(prefix, (0, 4, 7)))
+    if prefix == 'sus' and extension == '2':
+        intervals = [0, 2, 7]
+    elif prefix == 'add':
+        intervals += EXTENSIONS.get(extension, ())[-1:]  # add9 adds only the 9th
+    elif prefix == 'maj' and extension:
+        intervals.append(11)  # maj7, maj9, ... have a major seventh
+        intervals += EXTENSIONS.get(extension, ())[1:]
+    elif prefix == 'dim' and extension == '7':
+        intervals.append(9)
+    elif extension == '5' and prefix == '':
+        intervals = [0, 7]  # Power chord
+    elif prefix != 'sus':
+        intervals += EXTENSIONS.get(extension, ())
+
+    root_class = _pitch_class(root)
+    if root_class is None:
+        return ()
+    tones = [(root_class + interval) % 12 for interval in dict.fromkeys(intervals)]
+    bass_class = _pitch_class(bass) if bass else None
+    if bass_class is not None and bass_class not in tones:
+        tones.append(bass_class)
+    return tuple(tones)
+
+
+def pitch_class_histograms(songs):
+    """
+    (songs x 12) matrix of pitch-class weights, one row per song.
+
+    `songs` holds each song's chord names in order of appearance.
+    """
+    vocabulary = {}
+    song_rows, chord_columns = [], []
+    edge_rows, edge_classes = [], []
+    for row, chords in enumerate(songs):
+        for chord in chords:
+            song_rows.append(row)
+            chord_columns.append(vocabulary.setdefault(chord, len(vocabulary)))
+        for chord in (chords[:1] + chords[-1:]) if chords else ():
+            tones = chord_tones(chord)
+            if tones:
+                edge_rows.append(row)
+                edge_classes.append(tones[0])
+    count = row + 1 if songs else 0
+
+    counts = np.zeros((count, len(vocabulary)))
+    np.add.at(counts, (song_rows, chord_columns), 1)
+    tones = np.zeros((len(vocabulary), 12))
+    for chord, column in vocabulary.items():
+        tones[column, list(chord_tones(chord))] = 1
+
+    histograms = counts @ tones
+    np.add.at(histograms, (edge_rows, edge_classes), EDGE_WEIGHT)
+    return histograms
+
+
+def score_keys(histograms):
+    """(songs x 24) Pearson correlation of each histogram with each key profile (0 for empty rows)."""
+    centered = histograms - histograms.mean(axis=1, keepdims=True)
+    spread = histograms.std(axis=1, keepdims=True)
+    z = np.divide(centered, spread, out=np.zeros_like(centered), where=spread > 0)
+    return z @ KEY_PROFILES.T / 12
+
+
+def detect_keys(songs):
+    """
+    Most likely key of every song, as (key, confidence) pairs.
+
+    `songs` holds each song's chord names in order of appearance; songs
+    without any recognisable chord get (None, 0.0).
+    """
+    songs = [list(chords) for chords in songs]
+    if not songs:
+        return []
+    scores = score_keys(pitch_class_histograms(songs))
+    best = scores.argmax(axis=1)
+    confidence = np.clip(scores[np.arange(len(songs)), best], 0, 1)
+    return [
+        (KEY_NAMES[index], round(float(value), 3)) if value > 0 else (None, 0.0)
+        for index, value in zip(best, confidence)
+    ]
+
+
+def detect_key(chords):
+    """(key, confidence) for a single song's chords."""
+    return detect_keys([chords])[0]
+
+
+def chords_from_parsed(encoded):
+    """A song's chords in order, from its compact parsed form (chord_engine.encode_parsed)."""
+    table = encoded['c']
+    return [table[pairs[j]] for pairs in encoded['p'] for j in range(0, len(pairs), 2)]
+
+
+def chords_from_text(song_text):
+    """A song's chords in order, from its content."""
+    return [chord['chord'] for line in parse_ug_format(song_text) if line['type'] == 'chord-line'
+            for chord in line['chords']]
+
+
+def main():
+    """Main function."""
+    from corpus_store import CorpusStore
+
+    parser = argparse.ArgumentParser(description="Detect the key of every tab in a corpus")
+    parser.add_argument('corpus', help="corpus.db written by the scrapers")
+    parser.add_argument('--json', dest='json_file', default=None, help="Also write {url: {key, confidence}} here")
+    args = parser.parse_args()
+
+    store = CorpusStore(args.corpus)
+    tabs = list(store)
+    store.close()
+
+    keys = detect_keys(chords_from_text(tab['content'] or '') for tab in tabs)
+    agree = stated = 0
+    for tab, (key, confidence) in zip(tabs, keys):
+        if tab['key']:
+            stated += 1
+            agree += tab['key'] == key
+        print(f"{key or '-':<5} {confidence:5.2f}  (stated: {tab['key'] or '-':<4})  {tab['url']}")
+    if stated:
+        print(f"\nMatches the stated key on {agree}/{stated} tabs")
+
+    if args.json_file:
+        with open(args.json_file, 'w') as f:
+            json.dump({tab['url']: {'key': key, 'confidence': confidence}
+                       for tab, (key, confidence) in zip(tabs, keys)}, f, indent=2)
+        print(f"Results saved to: {args.json_file}")
+
+
+if __name__ == "__main__":
+    main()
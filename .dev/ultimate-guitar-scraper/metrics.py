@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Counters, gauges and histograms with OpenMetrics export.
+
+A small stand-in for prometheus_client, without the dependency: metrics live
+in a Registry that renders the OpenMetrics text format, serves it on a local
+HTTP endpoint while a run is going (point Prometheus or `curl` at it), and
+writes it to a textfile at exit (node_exporter's textfile collector reads
+those).
+
+HttpTimings splits request time into DNS, connect, time to first byte and
+download, from aiohttp's tracing hooks and from Playwright's per-request
+timing alike, so static fetches and browser renders land in the same
+histograms.
+"""
+
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import aiohttp
+
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Seconds, from a fast cache hit to a slow browser render
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Bytes of tab content
+SIZE_BUCKETS = (256, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144)
+# Items waiting in a queue
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """(suffix, label values, extra labels, value) tuples to render."""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# TYPE {self.name} {self.type}", f"# HELP {self.name} {self.help}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [('_total', key, (), value) for key, value in self._values.items()]
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), collect=None):
+        """`collect()`, if given, returns {label value tuple: value} each time the gauge is rendered."""
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.collect:
+            values = self.collect()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [('', tuple(str(v) for v in key), (), value) for key, value in values.items()]
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def summary(self, **labels):
+        """Count, sum and mean of one series (for printed summaries)."""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            if not series:
+                return {'count': 0, 'sum': 0.0, 'mean': None}
+            return {'count': series['count'], 'sum': series['sum'], 'mean': series['sum'] / series['count']}
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(key, list(s['counts']), s['sum'], s['count']) for key, s in self._values.items()]
+        samples = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', key, (('le', _format_value(bound)),), cumulative))
+            samples.append(('_count', key, (), count))
+            samples.append(('_sum', key, (), total))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.server = None
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), collect=None):
+        return self._register(Gauge(name, help, labelnames, collect))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        """Every metric in the OpenMetrics text format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics on a background thread until `stop()`."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if urlparse(self.path).path not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}/metrics"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def write_textfile(self, path):
+        """Write the metrics to `path` atomically, so a collector never reads half a file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+class HttpTimings:
+    """DNS, connect, TTFB and download histograms per host."""
+
+    def __init__(self, registry, prefix):
+        self.dns = registry.histogram(f"{prefix}_dns_seconds", "DNS resolution time", ('host',))
+        self.connect = registry.histogram(f"{prefix}_connect_seconds", "TCP/TLS connection setup time", ('host',))
+        self.ttfb = registry.histogram(f"{prefix}_ttfb_seconds", "Request sent to response headers", ('host',))
+        self.download = registry.histogram(f"{prefix}_download_seconds", "Response headers to body read", ('host',))
+
+    def observe_download(self, url, seconds):
+        self.download.observe(seconds, host=urlparse(url).netloc)
+
+    def trace_config(self):
+        """An aiohttp TraceConfig feeding the DNS, connect and TTFB histograms."""
+        config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.host = urlparse(str(params.url)).netloc
+            ctx.start = ctx.sent = time.perf_counter()
+
+        async def on_dns_start(session, ctx, params):
+            ctx.dns_start = time.perf_counter()
+
+        async def on_dns_end(session, ctx, params):
+            self.dns.observe(time.perf_counter() - ctx.dns_start, host=ctx.host)
+
+        async def on_connect_start(session, ctx, params):
+            ctx.connect_start = time.perf_counter()
+
+        async def on_connect_end(session, ctx, params):
+            self.connect.observe(time.perf_counter() - ctx.connect_start, host=ctx.host)
+
+        async def on_headers_sent(session, ctx, params):
+            ctx.sent = time.perf_counter()
+
+        async def on_request_end(session, ctx, params):
+            # Fires once the response headers are in
+            self.ttfb.observe(time.perf_counter() - ctx.sent, host=ctx.host)
+
+        config.on_request_start.append(on_request_start)
+        config.on_dns_resolvehost_start.append(on_dns_start)
+        config.on_dns_resolvehost_end.append(on_dns_end)
+        config.on_connection_create_start.append(on_connect_start)
+        config.on_connection_create_end.append(on_connect_end)
+        if hasattr(config, 'on_request_headers_sent'):
+            config.on_request_headers_sent.append(on_headers_sent)
+        config.on_request_end.append(on_request_end)
+        return config
+
+    def observe_browser_request(self, request):
+        """Feed a finished Playwright request's timing (ms offsets, -1 when unknown) into the histograms."""
+        timing = request.timing
+
+        def span(start, end):
+            if timing.get(start, -1) < 0 or timing.get(end, -1) < 0:
+                return None
+            return max(0.0, (timing[end] - timing[start]) / 1000)
+
+        host = urlparse(request.url).netloc
+        for histogram, start, end in (
+            (self.dns, 'domainLookupStart', 'domainLookupEnd'),
+            (self.connect, 'connectStart', 'connectEnd'),
+            (self.ttfb, 'requestStart', 'responseStart'),
+            (self.download, 'responseStart', 'responseEnd'),
+        ):
+            seconds = span(start, end)
+            if seconds is not None:
+                histogram.observe(seconds, host=host)
+
+    async def install(self, context, resource_types=('document', 'xhr', 'fetch')):
+        """Record the timing of a browser context's page and data requests."""
+        def on_request_finished(request):
+            if request.resource_type in resource_types:
+                self.observe_browser_request(request)
+
+        context.on('requestfinished', on_request_finished)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Line-by-line clean-up of tab content before it is stored.
+
+Text taken from `<code>`/`<pre>` or the page store can still carry UG
+markup, non-breaking and other odd spaces, CRLF line endings, trailing
+whitespace and long runs of blank lines. All of it ends up in DynamoDB, in
+every `GET /api/songs` payload and in the client's chord-line heuristics.
+normalize_lines() works one line at a time, so a song is never copied
+whole more than once:
+
+- `[ch]G[/ch]` becomes `G`, `[tab]`/`[/tab]` are dropped
+- CRLF and lone CR line endings become LF
+- non-breaking and other fixed-width spaces become plain spaces, zero-width
+  characters are dropped, tabs are expanded to 8 columns (which keeps
+  chords over the same lyrics)
+- trailing whitespace is removed
+- runs of blank lines become one, leading and trailing blank lines are
+  dropped (indentation of the first line is kept)
+
+    python normalize.py scraped_tabs/corpus.db
+"""
+
+import argparse
+import re
+
+
+CHORD_MARKUP_RE = re.compile(r'\[ch\](.*?)\[/ch\]')
+TAB_MARKUP_RE = re.compile(r'\[/?tab\]')
+
+TAB_SIZE = 8
+
+# Spaces as wide as a plain one become one; zero-width characters go
+SPACE_TRANSLATION = {
+    **{ord(space): ' ' for space in '\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006'
+                                    '\u2007\u2008\u2009\u200a\u202f\u205f\u3000'},
+    **{ord(zero_width): None for zero_width in '\u200b\u2060\ufeff'},
+}
+
+
+def strip_line_markup(line):
+    """Turn one line of UG chord markup into plain text."""
+    if '[' not in line:
+        return line
+    return TAB_MARKUP_RE.sub('', CHORD_MARKUP_RE.sub(r'\1', line))
+
+
+def normalize_line(line):
+    """Clean up a single line (no line ending)."""
+    line = strip_line_markup(line).translate(SPACE_TRANSLATION)
+    if '\t' in line:
+        line = line.expandtabs(TAB_SIZE)
+    return line.rstrip()
+
+
+def normalize_lines(lines):
+    """
+    Yield the cleaned-up lines of a song, without line endings.
+
+    `lines` may be any iterable of lines, with or without their endings
+    (a file opened with newline='' works); a lone CR inside a line
+    splits it.
+    """
+    blank = False  # A blank line is pending, written only if more text follows
+    started = False
+    for raw in lines:
+        raw = raw.rstrip('\n')
+        if raw.endswith('\r'):
+            raw = raw[:-1]
+        for part in raw.split('\r'):
+            line = normalize_line(part)
+            if not line:
+                blank = started
+                continue
+            if blank:
+                yield ''
+                blank = False
+            started = True
+            yield line
+
+
+def normalize_text(text):
+    """Cleaned-up copy of a whole song."""
+    return '\n'.join(normalize_lines(text.split('\n')))
+
+
+class ContentNormalizer:
+    def __init__(self):
+        """Normalizes songs one at a time, keeping count of the bytes it saves."""
+        self.stats = {'songs': 0, 'changed': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def normalize(self, text):
+        """Return the cleaned-up text and the UTF-8 bytes saved on this song."""
+        normalized = normalize_text(text)
+        bytes_in = len(text.encode('utf-8'))
+        bytes_out = len(normalized.encode('utf-8')) if normalized != text else bytes_in
+
+        self.stats['songs'] += 1
+        self.stats['changed'] += normalized != text
+        self.stats['bytes_in'] += bytes_in
+        self.stats['bytes_out'] += bytes_out
+        return normalized, bytes_in - bytes_out
+
+    def summary(self):
+        """Totals so far, with bytes saved overall and as a percentage."""
+        saved = self.stats['bytes_in'] - self.stats['bytes_out']
+        return {
+            **self.stats,
+            'bytes_saved': saved,
+            'percent_saved': round(saved / self.stats['bytes_in'] * 100, 1) if self.stats['bytes_in'] else 0.0,
+        }
+
+
+def format_summary(summary):
+    """One line describing a ContentNormalizer summary."""
+    return (f"{summary['changed']}/{summary['songs']} songs cleaned up, "
+            f"{summary['bytes_saved'] / 1024:.1f} KB saved ({summary['percent_saved']}%)")
+
+
+def main():
+    """Main function."""
+    from corpus_store import CorpusStore
+
+    parser = argparse.ArgumentParser(description="Report what normalizing a corpus's tab content would save")
+    parser.add_argument('corpus', help="corpus.db written by the scrapers")
+    parser.add_argument('--top', type=int, default=10, help="Songs with the largest savings to list")
+    args = parser.parse_args()
+
+    store = CorpusStore(args.corpus)
+    normalizer = ContentNormalizer()
+    savings = []
+    for tab in store:
+        _, saved = normalizer.normalize(tab['content'] or '')
+        savings.append((saved, tab['url']))
+    store.close()
+
+    for saved, url in sorted(savings, reverse=True)[:args.top]:
+        if saved:
+            print(f"{saved:>8} B  {url}")
+    print(format_summary(normalizer.summary()))
+
+
+if __name__ == "__main__":
+    main()
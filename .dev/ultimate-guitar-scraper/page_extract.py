@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+In-page extraction for the Playwright path.
+
+Reading a tab with element handles costs one IPC round trip per call:
+query_selector('h1'), inner_text, query_selector('code'), inner_text, and
+again for <pre> when there is no <code>. EXTRACT_JS does the whole job
+inside the page and hands back one structured object from a single
+`page.evaluate`. `extract_legacy` keeps the old handle-by-handle version
+so test_extraction.py can measure the difference.
+
+`capture_tab_data` skips the DOM altogether: it listens to the page's own
+responses, takes the tab payload (the embedded store in the document, or
+JSON arriving over XHR) as soon as it lands, and stops the rest of the load.
+"""
+
+import asyncio
+import re
+import time
+
+from ug_store import extract_tab_from_html, extract_tab_from_payload
+
+
+# Rendered tab content lives in one of these
+CONTENT_SELECTOR = 'code, pre'
+
+EXTRACT_JS = r"""
+() => {
+    const text = (el) => (el ? el.innerText.trim() : '');
+
+    let title = 'Unknown Song';
+    let artist = 'Unknown Artist';
+
+    // Parse "Song Title Type by Artist"
+    const h1 = text(document.querySelector('h1'));
+    const at = h1.indexOf(' by ');
+    if (at !== -1) {
+        title = h1.slice(0, at).replace(/\s+(Chords|Tab|Ukulele|Bass)$/i, '').trim();
+        artist = h1.slice(at + 4).trim();
+    }
+
+    // Fallback: /tab/<artist>/<song>-<type>-<id>
+    const parts = location.pathname.split('/').filter(Boolean);
+    if (parts.length >= 3) {
+        const words = (s) => s.split('-').map(w => w.charAt(0).toUpperCase() + w.slice(1)).join(' ');
+        if (artist === 'Unknown Artist') {
+            artist = words(parts[1]);
+        }
+        if (title === 'Unknown Song') {
+            title = words(parts[2].replace(/-(chords|tabs|ukulele|bass)-\d+$/, ''));
+        }
+    }
+
+    // <code> first (most common), then <pre>
+    let content = '';
+    let contentSource = null;
+    for (const selector of ['code', 'pre']) {
+        const found = text(document.querySelector(selector));
+        if (found) {
+            content = found;
+            contentSource = selector;
+            break;
+        }
+    }
+
+    return {
+        title,
+        artist,
+        type: location.href.includes('-tabs-') ? 'tabs' : 'chords',
+        content,
+        contentSource,
+    };
+}
+"""
+
+
+async def extract_in_page(page):
+    """Read title, artist, type, content and contentSource in one round trip."""
+    return await page.evaluate(EXTRACT_JS)
+
+
+async def extract_legacy(page, url):
+    """The handle-by-handle extraction this module replaces (for comparison only)."""
+    title = "Unknown Song"
+    artist = "Unknown Artist"
+
+    h1_elem = await page.query_selector('h1')
+    if h1_elem:
+        h1_text = (await h1_elem.inner_text()).strip()
+        if " by " in h1_text.lower():
+            parts = h1_text.split(" by ", 1)
+            if len(parts) == 2:
+                title = re.sub(r'\s+(Chords|Tab|Ukulele|Bass)$', '', parts[0], flags=re.IGNORECASE).strip()
+                artist = parts[1].strip()
+
+    content = ""
+    content_source = None
+    code_elem = await page.query_selector('code')
+    if code_elem:
+        content = (await code_elem.inner_text()).strip()
+        content_source = 'code'
+    if not content:
+        pre_elem = await page.query_selector('pre')
+        if pre_elem:
+            content = (await pre_elem.inner_text()).strip()
+            content_source = 'pre'
+
+    return {
+        'title': title,
+        'artist': artist,
+        'type': 'tabs' if '-tabs-' in url else 'chords',
+        'content': content,
+        'contentSource': content_source if content else None,
+    }
+
+
+async def _tab_from_response(page, response):
+    """Tab fields carried by a response, or None."""
+    request = response.request
+    if request.resource_type == 'document':
+        if request.frame != page.main_frame:
+            return None
+        return extract_tab_from_html(await response.text())
+    if request.resource_type in ('xhr', 'fetch'):
+        if 'json' not in (response.headers.get('content-type') or ''):
+            return None
+        return extract_tab_from_payload(await response.json())
+    return None
+
+
+async def capture_tab_data(page, url, timeout=10000):
+    """
+    Navigate to `url` and return the tab from the page's own data responses.
+
+    Returns ug_store tab fields (with `[ch]` markup and metadata) as soon as
+    a response carrying the tab arrives, then stops the page load. Returns
+    None if nothing turns up within `timeout` ms - the page keeps loading,
+    so the caller can fall back to reading the DOM.
+    """
+    captured = asyncio.get_running_loop().create_future()
+
+    async def on_response(response):
+        if captured.done():
+            return
+        try:
+            tab = await _tab_from_response(page, response)
+        except Exception:
+            return  # Body unavailable (redirect, aborted) or not JSON
+        if tab and tab['content'].strip() and not captured.done():
+            captured.set_result(tab)
+
+    page.on('response', on_response)
+    try:
+        await page.goto(url, wait_until='commit', timeout=30000)
+        tab = await asyncio.wait_for(captured, timeout / 1000)
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        page.remove_listener('response', on_response)
+
+    # Got what we came for: don't wait on scripts, ads and images
+    try:
+        await page.evaluate('window.stop()')
+    except Exception:
+        pass
+    return tab
+
+
+async def timed(coro):
+    """Await `coro` and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Process pool for the scrapers' parse stage.
+
+Pages are fetched concurrently, but parsing them (the embedded JSON store,
+or a full DOM parse and the regex fallbacks when it is missing) holds the
+GIL, so a single core ends up doing all of it. ParsePool sends fetched
+pages to worker processes a chunk at a time. Each chunk travels as one
+UTF-8 bytes buffer plus (url, start, end) spans: sending it is a single
+pickled bytes copy instead of one pickled string per page, and workers
+decode every page straight out of a memoryview of that buffer.
+
+Results come back in the order the pages were submitted, to the calling
+thread, so saving them stays single-threaded. With 0 workers pages are
+parsed in-process, exactly as before. From an event loop, use
+submit_async(): it waits for the workers to catch up without blocking the
+loop's other fetches.
+"""
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_workers():
+    """One worker per core, leaving one for fetching and saving (0 on a single core: parse in-process)."""
+    return max((os.cpu_count() or 1) - 1, 0)
+
+
+def _parse_one(parse, url, html, options):
+    try:
+        return parse(url, html, **options), None
+    except Exception as e:
+        return None, e
+
+
+def _parse_chunk(parse, buffer, spans, options):
+    """Worker side: parse every page of a chunk. Returns a (result, error) pair per page."""
+    view = memoryview(buffer)
+    return [_parse_one(parse, url, str(view[start:end], 'utf-8', 'replace'), options)
+            for url, start, end in spans]
+
+
+class ParsePool:
+    def __init__(self, parse, workers=None, chunk_size=16, max_pending=None, **options):
+        """
+        Initialize the pool.
+
+        Args:
+            parse: Module-level function parse(url, html, **options) -> result (sent to workers by name)
+            workers: Worker processes (default: default_workers()); 0 parses in this process
+            chunk_size: Pages sent to a worker at a time
+            max_pending: Chunks in flight before submit() waits for the oldest (default: 2 per worker)
+            options: Extra keyword arguments for `parse`
+        """
+        self.parse = parse
+        self.workers = default_workers() if workers is None else max(workers, 0)
+        self.chunk_size = max(chunk_size, 1)
+        self.max_pending = max_pending or self.workers * 2
+        self.options = options
+        self.executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers else None
+        self.chunk = []  # (url, html) pages waiting for a full chunk
+        self.pending = deque()  # (urls, future) per chunk in flight, oldest first
+        self.stats = {'pages': 0, 'chunks': 0, 'bytes_sent': 0}
+
+    def submit(self, url, html):
+        """
+        Queue a fetched page (UTF-8 bytes, or str) for parsing.
+
+        Returns the (url, result, error) of every page finished so far, in
+        submission order; `error` is the exception when parsing raised. If
+        too many chunks are in flight, blocks for the oldest one first.
+        """
+        finished = self._add(url, html)
+        return finished + self._collect(wait=len(self.pending) > self.max_pending)
+
+    async def submit_async(self, url, html):
+        """submit() for code running on an event loop: waits for the oldest chunk without blocking it."""
+        finished = self._add(url, html)
+        while len(self.pending) > self.max_pending:
+            # asyncio.wait, not await: a failed chunk is reported by _collect, not raised here
+            await asyncio.wait([asyncio.wrap_future(self.pending[0][1])])
+            finished.extend(self._collect())
+        return finished + self._collect()
+
+    def drain(self):
+        """Send the last partial chunk and return every remaining result, in submission order."""
+        if self.executor is None:
+            return []
+        self._send_chunk()
+        finished = []
+        while self.pending:
+            finished.extend(self._collect(wait=True))
+        return finished
+
+    def close(self):
+        """Stop the worker processes. Pages not drained are dropped."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _add(self, url, html):
+        """Parse the page now (no workers) or add it to the current chunk."""
+        self.stats['pages'] += 1
+        if self.executor is None:
+            if isinstance(html, bytes):
+                html = html.decode('utf-8', errors='replace')
+            return [(url, *_parse_one(self.parse, url, html, self.options))]
+
+        self.chunk.append((url, html))
+        if len(self.chunk) >= self.chunk_size:
+            self._send_chunk()
+        return []
+
+    def _send_chunk(self):
+        chunk, self.chunk = self.chunk, []
+        if not chunk:
+            return
+        pages = [html.encode('utf-8') if isinstance(html, str) else html for _, html in chunk]
+        spans, offset = [], 0
+        for (url, _), page in zip(chunk, pages):
+            spans.append((url, offset, offset + len(page)))
+            offset += len(page)
+
+        future = self.executor.submit(_parse_chunk, self.parse, b''.join(pages), spans, self.options)
+        self.pending.append(([url for url, _ in chunk], future))
+        self.stats['chunks'] += 1
+        self.stats['bytes_sent'] += offset
+
+    def _collect(self, wait=False):
+        """Results of the chunks finished so far, oldest first; with `wait`, block for the oldest."""
+        finished = []
+        while self.pending and (wait or self.pending[0][1].done()):
+            wait = False
+            urls, future = self.pending.popleft()
+            try:
+                results = future.result()
+            except Exception as e:
+                # The chunk never got parsed (a worker died, or it couldn't be sent)
+                results = [(None, e)] * len(urls)
+            finished.extend((url, result, error) for url, (result, error) in zip(urls, results))
+        return finished
+
+
+def add_parse_pool_arguments(parser):
+    """Add the shared --parse-workers / --parse-chunk options to an argparse parser."""
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help="Processes parsing pages (default: one per core but one; 0: parse in-process)")
+    parser.add_argument('--parse-chunk', type=int, default=16,
+                        help="Pages sent to a parse worker at a time (default: 16)")
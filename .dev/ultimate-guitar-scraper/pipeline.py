@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Staged asyncio pipeline with bounded queues between stages.
+
+Each stage has its own worker count and an input queue with a fixed size.
+When a downstream stage falls behind, its queue fills up and the upstream
+workers block on `put`, so backpressure flows all the way back to the
+input without any stage buffering unbounded work.
+
+A stage handler is `async fn(item, state) -> result`. Returning None drops
+the item; anything else is passed to the next stage. `state` is a dict
+private to each worker (e.g. the browser page a render worker holds), and
+`on_worker_exit(state)` is awaited when that worker shuts down.
+`on_item(stage_name, seconds, queue_depth)`, if given, is called after each
+item with the handler time and how many items were still queued behind it.
+
+A stage with a `batch_size` gets a list of up to that many items instead
+(waiting at most `linger` seconds to fill it) and returns a list of
+results, each passed on; None entries are dropped.
+"""
+
+import asyncio
+import time
+
+
+_DONE = object()
+
+
+class Stage:
+    def __init__(self, name, handler, concurrency=1, queue_size=None, on_worker_exit=None,
+                 batch_size=None, linger=1.0):
+        """
+        Initialize a stage.
+
+        Args:
+            name: Stage name used in logs and stats
+            handler: `async fn(item, state)` returning the item for the next stage, or None
+            concurrency: Number of workers running the handler
+            queue_size: Capacity of the stage's input queue (default: 2 x concurrency, at least batch_size)
+            on_worker_exit: Optional `async fn(state)` run when a worker finishes
+            batch_size: Hand the handler lists of up to this many items (it returns a list)
+            linger: Seconds a batch waits for more items after its first one arrives
+        """
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size or max(self.concurrency * 2, batch_size or 0)
+        self.on_worker_exit = on_worker_exit
+        self.batch_size = batch_size
+        self.linger = linger
+
+        self.queue = None
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+
+class Pipeline:
+    def __init__(self, stages, on_item=None):
+        self.stages = stages
+        self.on_item = on_item
+
+    def queue_depths(self):
+        """Current number of items waiting in front of each stage."""
+        return {
+            stage.name: stage.queue.qsize() if stage.queue is not None else 0
+            for stage in self.stages
+        }
+
+    def stage_stats(self):
+        """Items processed, errors and busy time per stage."""
+        return {
+            stage.name: {
+                'processed': stage.processed,
+                'errors': stage.errors,
+                'busy_seconds': round(stage.busy_seconds, 3),
+            }
+            for stage in self.stages
+        }
+
+    async def _next_batch(self, stage):
+        """Up to `stage.batch_size` items: the first one, then whatever arrives within `stage.linger`."""
+        batch = [await stage.queue.get()]
+        deadline = time.monotonic() + stage.linger
+        while len(batch) < stage.batch_size and batch[-1] is not _DONE:
+            if not stage.queue.empty():
+                batch.append(stage.queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(stage.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self, index, stage):
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        state = {}
+        try:
+            while True:
+                if stage.batch_size:
+                    item = await self._next_batch(stage)
+                    done = item[-1] is _DONE
+                    if done:
+                        item.pop()
+                        if not item:
+                            return
+                else:
+                    item = await stage.queue.get()
+                    if item is _DONE:
+                        return
+                    done = False
+
+                depth = stage.queue.qsize()
+                start = time.perf_counter()
+                try:
+                    result = await stage.handler(item, state)
+                except Exception as e:
+                    # A failing item must not stall the pipeline
+                    print(f"❌ {stage.name} stage error: {e}")
+                    stage.errors += 1
+                    result = None
+                elapsed = time.perf_counter() - start
+                stage.busy_seconds += elapsed
+                stage.processed += len(item) if stage.batch_size else 1
+                if self.on_item:
+                    self.on_item(stage.name, elapsed, depth)
+
+                results = (result or []) if stage.batch_size else [result]
+                if next_stage is not None:
+                    for result in results:
+                        if result is not None:
+                            await next_stage.queue.put(result)
+                if done:
+                    return
+        finally:
+            if stage.on_worker_exit:
+                await stage.on_worker_exit(state)
+
+    async def _run_stage(self, index, stage):
+        await asyncio.gather(*[self._worker(index, stage) for _ in range(stage.concurrency)])
+
+        # Upstream is finished: tell every worker of the next stage to stop
+        if index + 1 < len(self.stages):
+            next_stage = self.stages[index + 1]
+            for _ in range(next_stage.concurrency):
+                await next_stage.queue.put(_DONE)
+
+    async def _feed(self, items):
+        first = self.stages[0]
+        for item in items:
+            await first.queue.put(item)
+        for _ in range(first.concurrency):
+            await first.queue.put(_DONE)
+
+    async def run(self, items):
+        """Push every item through all stages and wait until the last one drains."""
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+
+        await asyncio.gather(
+            self._feed(items),
+            *[self._run_stage(index, stage) for index, stage in enumerate(self.stages)],
+        )
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Per-stage CPU and memory profiling for the scrapers and the importer.
+
+`--profile [DIR]` wraps each stage (fetch, parse, save, normalize, keys,
+upload) in its own cProfile profiler, and every `sample_every`-th pass
+through a stage in a pair of tracemalloc snapshots whose difference is added
+up per allocation site. At the end of the run each stage gets its own artifacts:
+
+    <stage>.prof        cProfile stats (python -m pstats, snakeviz, ...)
+    <stage>.alloc.txt   Top allocation sites by net bytes
+    report.txt          Hottest functions and allocation sites of every stage
+
+Stages nest: while `parse` runs inside `fetch`, only `parse` is profiled, so
+each CPU profile holds the stage's own work (allocation diffs of the outer
+stage do include the inner one's). Only the innermost active stage is
+ever profiled, which also keeps this working when the importer's stages
+interleave on one event loop - there, time a stage spends awaiting is
+charged to whatever stage ran in the meantime, and allocation diffs include
+the other stages' allocations, so treat those as approximate.
+"""
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+
+class StageProfiler:
+    def __init__(self, output_dir, top=20, sample_every=20, trace_memory=True):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_dir: Directory the artifacts are written to
+            top: Functions and allocation sites listed per stage in the report
+            sample_every: Take tracemalloc snapshots on every Nth pass through a stage
+            trace_memory: Set False to skip tracemalloc (it slows everything down)
+        """
+        self.output_dir = Path(output_dir)
+        self.top = top
+        self.sample_every = max(1, sample_every)
+        self.trace_memory = trace_memory
+
+        self.profiles = {}
+        self.allocations = {}
+        self.calls = Counter()
+        self.seconds = Counter()
+        self._active = []  # Stage names, innermost last
+        if trace_memory:
+            tracemalloc.start()
+
+    def _switch(self, previous, current):
+        if previous == current:
+            return
+        if previous is not None:
+            self.profiles[previous].disable()
+        if current is not None:
+            self.profiles[current].enable()
+
+    def _snapshot(self):
+        # Leave out tracemalloc's and the profiler's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    @contextmanager
+    def stage(self, name):
+        """Profile the enclosed block as stage `name`."""
+        if name not in self.profiles:
+            self.profiles[name] = cProfile.Profile()
+            self.allocations[name] = Counter()
+        self.calls[name] += 1
+        sampled = self.trace_memory and (self.calls[name] - 1) % self.sample_every == 0
+
+        # No profiler runs while snapshots are taken, so their cost is charged to no stage
+        self._switch(self._active[-1] if self._active else None, None)
+        before = self._snapshot() if sampled else None
+        self._active.append(name)
+        self._switch(None, name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self._switch(self._active[-1], None)
+            # Remove this stage's entry; with interleaved tasks it need not be the last one
+            del self._active[len(self._active) - 1 - self._active[::-1].index(name)]
+
+            if before is not None:
+                after = self._snapshot()
+                for stat in after.compare_to(before, 'lineno'):
+                    if stat.size_diff:
+                        frame = stat.traceback[0]
+                        self.allocations[name][f"{frame.filename}:{frame.lineno}"] += stat.size_diff
+            self._switch(None, self._active[-1] if self._active else None)
+
+    def hot_functions(self, name):
+        """The stage's top functions by own time, as pstats text."""
+        out = io.StringIO()
+        stats = pstats.Stats(self.profiles[name], stream=out)
+        stats.strip_dirs().sort_stats('tottime').print_stats(self.top)
+        return out.getvalue()
+
+    def allocation_sites(self, name):
+        """The stage's top allocation sites by net bytes, one per line."""
+        samples = (self.calls[name] + self.sample_every - 1) // self.sample_every
+        lines = [f"{size / 1024:10.1f} KB  {site}" for site, size in self.allocations[name].most_common(self.top)]
+        header = f"Net allocations over {samples} sampled passes (of {self.calls[name]})"
+        return '\n'.join([header] + (lines or ["  (none recorded)"]))
+
+    def write(self):
+        """Write the per-stage artifacts and the report. Returns the report path."""
+        for profile in self.profiles.values():
+            profile.disable()
+        self._active.clear()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        report = []
+        for name in self.profiles:
+            self.profiles[name].dump_stats(self.output_dir / f"{name}.prof")
+            report.append("=" * 70)
+            report.append(f"Stage: {name} ({self.calls[name]} passes, {self.seconds[name]:.2f}s wall)")
+            report.append("=" * 70)
+            report.append(self.hot_functions(name).strip())
+            if self.trace_memory:
+                allocations = self.allocation_sites(name)
+                with open(self.output_dir / f"{name}.alloc.txt", 'w') as f:
+                    f.write(allocations + '\n')
+                report.append("")
+                report.append(allocations)
+            report.append("")
+
+        report_path = self.output_dir / "report.txt"
+        with open(report_path, 'w') as f:
+            f.write('\n'.join(report) + '\n')
+        if self.trace_memory:
+            tracemalloc.stop()
+        return report_path
+
+
+def profile_stage(profiler, name):
+    """`profiler.stage(name)`, or a no-op when profiling is off."""
+    return profiler.stage(name) if profiler else nullcontext()
+
+
+def add_profile_arguments(parser):
+    """Add the shared profiling command-line options to an argparse parser."""
+    parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='DIR',
+                        help="Profile each stage (cProfile + tracemalloc) and write the results to DIR")
+    parser.add_argument('--profile-no-memory', action='store_true',
+                        help="With --profile, skip tracemalloc snapshots")
+
+
+def profiler_from_args(args):
+    """Build the StageProfiler described by parsed command-line options, or None."""
+    if args.profile is None:
+        return None
+    return StageProfiler(args.profile, trace_memory=not args.profile_no_memory)
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Adaptive rate control, retries and circuit breaking for the fetchers.
+
+Each host gets its own AIMD controller: while responses come back healthy the
+request rate and concurrency creep up (additive increase); a 429/503, a
+server error, a timeout or a response slower than the latency target cuts
+both in half (multiplicative decrease, at most once per cooldown). A
+Retry-After header pauses the host for as long as the server asked.
+
+Failed requests are retried with jittered exponential backoff, and a
+per-host circuit breaker stops hammering a host that keeps failing: after
+enough consecutive failures requests fail fast until the breaker lets a
+single trial request through.
+
+`RateControl.call` wraps an async request, `RateControl.call_sync` a
+blocking one; both pace, retry and feed the controller.
+"""
+
+import asyncio
+import email.utils
+import math
+import random
+import time
+from urllib.parse import urlparse
+
+
+# Statuses worth retrying, and the subset that means "slow down"
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+TRANSIENT_NAME_PARTS = ('Timeout', 'Connection', 'Disconnected')
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose breaker is open."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit open for {host}, retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class Verdict:
+    """How a failed request should be treated."""
+
+    def __init__(self, retryable, throttled=False, retry_after=None):
+        self.retryable = retryable
+        self.throttled = throttled
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def classify(exc):
+    """Decide whether a request exception is worth retrying, and whether it was throttling."""
+    status = getattr(exc, 'status', None)
+    headers = getattr(exc, 'headers', None)
+    response = getattr(exc, 'response', None)
+    if status is None and response is not None:
+        # requests.HTTPError
+        status = getattr(response, 'status_code', None)
+        headers = getattr(response, 'headers', None)
+
+    if isinstance(status, int):
+        retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+        return Verdict(status in RETRY_STATUSES, status in THROTTLE_STATUSES, retry_after)
+
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return Verdict(True)
+    if any(part in cls.__name__ for cls in type(exc).__mro__ for part in TRANSIENT_NAME_PARTS):
+        return Verdict(True)
+    if 'net::ERR_' in str(exc):
+        # Playwright navigation errors (connection reset, DNS, ...)
+        return Verdict(True)
+    return Verdict(False)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AIMDController:
+    def __init__(self, rate, concurrency, max_rate=None, max_concurrency=None,
+                 min_rate=0.1, min_concurrency=1, rate_step=0.25, increase_every=10,
+                 decrease_factor=0.5, latency_target=None, cooldown=2.0):
+        """
+        Initialize the controller.
+
+        Args:
+            rate: Starting requests per second
+            concurrency: Starting requests in flight
+            max_rate, max_concurrency: Ceilings for the additive increase (default: 4x / 2x the start)
+            min_rate, min_concurrency: Floors for the multiplicative decrease
+            rate_step: Requests per second added after each healthy run
+            increase_every: Healthy responses in a row before increasing
+            decrease_factor: Multiplier applied to rate and concurrency on congestion
+            latency_target: Seconds; slower responses count as congestion (None = ignore latency)
+            cooldown: Minimum seconds between two decreases
+        """
+        self.rate = float(rate)
+        self.concurrency = max(min_concurrency, int(concurrency))
+        self.max_rate = max_rate or self.rate * 4
+        self.max_concurrency = max_concurrency or self.concurrency * 2
+        self.min_rate = min_rate
+        self.min_concurrency = min_concurrency
+        self.rate_step = rate_step
+        self.increase_every = increase_every
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+
+        self.pause_until = 0.0  # monotonic time before which no request may start
+        self._healthy = 0
+        self._last_decrease = -math.inf
+        self.stats = {'increases': 0, 'decreases': 0, 'throttled': 0}
+
+    def on_success(self, latency):
+        if self.latency_target is not None and latency > self.latency_target:
+            self._decrease()
+            return
+        self._healthy += 1
+        if self._healthy >= self.increase_every:
+            self._healthy = 0
+            self.rate = min(self.max_rate, self.rate + self.rate_step)
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            self.stats['increases'] += 1
+
+    def on_error(self):
+        self._decrease()
+
+    def on_throttle(self, retry_after=None):
+        self.stats['throttled'] += 1
+        self._decrease()
+        if retry_after:
+            self.pause_until = max(self.pause_until, time.monotonic() + retry_after)
+
+    def _decrease(self):
+        self._healthy = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return  # One cut per congestion event, not one per in-flight request
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.concurrency = max(self.min_concurrency, int(self.concurrency * self.decrease_factor))
+        self.stats['decreases'] += 1
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_after=30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_after: Seconds the circuit stays open before a trial request is allowed
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.trips = 0
+
+    def retry_in(self):
+        """Seconds until the breaker lets a trial request through (0 when closed)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_after - time.monotonic())
+
+    def allow(self):
+        """Whether a request may be sent now."""
+        if self.opened_at is None:
+            return True
+        if self.retry_in() > 0 or self.trial_in_flight:
+            return False
+        self.trial_in_flight = True  # Half-open: let one request test the host
+        return True
+
+    def end_trial(self):
+        """Let another trial through when the last one ended without an outcome (e.g. cancelled)."""
+        self.trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+
+
+class HostControl:
+    """Pacing, concurrency, controller and breaker for one host."""
+
+    def __init__(self, host, controller, breaker, burst=1):
+        self.host = host
+        self.controller = controller
+        self.breaker = breaker
+        self.burst = max(1, burst)
+        self.in_flight = 0
+        self.retries = 0
+        self.failures = 0
+        self._next_slot = 0.0
+        self._condition = None
+
+    def reserve(self):
+        """Reserve the next send slot at the current rate; returns seconds to wait for it."""
+        rate = self.controller.rate
+        now = time.monotonic()
+        # Unused slots accumulate up to `burst`, like a token bucket
+        self._next_slot = max(self._next_slot, now - (self.burst - 1) / rate)
+        start = max(self._next_slot, self.controller.pause_until)
+        self._next_slot = start + 1 / rate
+        return max(0.0, start - now)
+
+    async def acquire(self):
+        """Wait for a concurrency slot and the next send slot; the slot is given back if cancelled."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.controller.concurrency)
+            self.in_flight += 1
+        delay = self.reserve()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Cancelled while pacing: the caller never reaches its release()
+                await self.release()
+                raise
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, latency, error):
+        """Feed one request's outcome to the controller and breaker; returns the Verdict for errors."""
+        if error is None:
+            self.controller.on_success(latency)
+            self.breaker.record_success()
+            return None
+
+        verdict = classify(error)
+        if not verdict.retryable:
+            # The host answered (404, bad content...): it is healthy
+            self.breaker.record_success()
+            return verdict
+
+        self.failures += 1
+        self.breaker.record_failure()
+        if verdict.throttled:
+            self.controller.on_throttle(verdict.retry_after)
+        else:
+            self.controller.on_error()
+        return verdict
+
+    def summary(self):
+        return {
+            'rate': round(self.controller.rate, 2),
+            'concurrency': self.controller.concurrency,
+            'retries': self.retries,
+            'failures': self.failures,
+            'breaker_trips': self.breaker.trips,
+            **self.controller.stats,
+        }
+
+
+class RateControl:
+    def __init__(self, rate=2.0, concurrency=4, burst=1, max_rate=None, max_concurrency=None,
+                 latency_target=None, max_retries=4, backoff_base=0.5, backoff_cap=30.0,
+                 breaker_threshold=5, breaker_reset=30.0):
+        """
+        Initialize per-host rate control.
+
+        Args:
+            rate: Starting requests per second per host
+            concurrency: Starting requests in flight per host
+            burst: Requests that may be sent back-to-back after an idle spell
+            max_rate, max_concurrency: How far healthy hosts may ramp up
+            latency_target: Seconds; slower responses count as congestion
+            max_retries: Retries per request after the first attempt
+            backoff_base, backoff_cap: Exponential backoff parameters in seconds
+            breaker_threshold: Consecutive failures that open a host's circuit
+            breaker_reset: Seconds before an open circuit allows a trial request
+        """
+        self.max_concurrency = max_concurrency or concurrency * 2  # Highest any host may reach
+        self.controller_args = dict(
+            rate=rate, concurrency=concurrency, max_rate=max_rate,
+            max_concurrency=self.max_concurrency, latency_target=latency_target,
+        )
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker_args = dict(failure_threshold=breaker_threshold, reset_after=breaker_reset)
+        self.hosts = {}
+
+    def host(self, url):
+        """The HostControl for a URL's host."""
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = HostControl(
+                host, AIMDController(**self.controller_args), CircuitBreaker(**self.breaker_args), self.burst
+            )
+        return self.hosts[host]
+
+    def _retry_delay(self, verdict, attempt):
+        return max(verdict.retry_after or 0.0, backoff_delay(attempt, self.backoff_base, self.backoff_cap))
+
+    async def call(self, url, request):
+        """Await `request()` for `url`, paced per host and retried on transient failures."""
+        control = self.host(url)
+        for attempt in range(self.max_retries + 1):
+            if not control.breaker.allow():
+                raise CircuitOpenError(control.host, control.breaker.retry_in())
+            trial = control.breaker.trial_in_flight
+
+            try:
+                await control.acquire()
+                start = time.monotonic()
+                try:
+                    result = await request()
+                except Exception as e:
+                    verdict = control.record(time.monotonic() - start, e)
+                    if not verdict.retryable or attempt == self.max_retries:
+                        raise
+                else:
+                    control.record(time.monotonic() - start, None)
+                    return result
+                finally:
+                    await control.release()
+            finally:
+                # A cancelled trial records nothing and would otherwise block the host for good
+                if trial:
+                    control.breaker.end_trial()
+
+            control.retries += 1
+            await asyncio.sleep(self._retry_delay(verdict, attempt))
+
+    def call_sync(self, url, request, paced=True):
+        """Blocking version of `call`; `paced=False` skips the rate wait (e.g. for cache hits)."""
+        control = self.host(url)
+        for attempt in range(self.max_retries + 1):
+            if not control.breaker.allow():
+                raise CircuitOpenError(control.host, control.breaker.retry_in())
+            trial = control.breaker.trial_in_flight
+
+            try:
+                if paced:
+                    delay = control.reserve()
+                    if delay > 0:
+                        time.sleep(delay)
+                start = time.monotonic()
+                try:
+                    result = request()
+                except Exception as e:
+                    verdict = control.record(time.monotonic() - start, e)
+                    if not verdict.retryable or attempt == self.max_retries:
+                        raise
+                else:
+                    control.record(time.monotonic() - start, None)
+                    return result
+            finally:
+                # An interrupted trial (e.g. Ctrl-C) records nothing
+                if trial:
+                    control.breaker.end_trial()
+
+            control.retries += 1
+            time.sleep(self._retry_delay(verdict, attempt))
+
+    def summary(self):
+        """Per-host rate, concurrency and retry counters."""
+        return {host: control.summary() for host, control in self.hosts.items()}
+
+
+def format_rate_summary(summary):
+    """One line per host describing where its controller ended up."""
+    return [
+        f"{host}: {stats['rate']:.2f} req/s, {stats['concurrency']} in flight, "
+        f"{stats['retries']} retries, {stats['throttled']} throttled, {stats['breaker_trips']} breaker trips"
+        for host, stats in summary.items()
+    ]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Request interception for the Playwright importer.
+
+Tab pages pull in images, fonts, ad iframes and a long tail of third-party
+trackers, none of which we read - and those third-party requests are what
+keep `networkidle` from settling. RequestFilter routes every request on a
+browser context through allow/deny rules by resource type and domain, and
+records per-page request counts and bytes so the savings are visible.
+"""
+
+from collections import Counter
+from urllib.parse import urlparse
+
+
+DEFAULT_BLOCKED_TYPES = {'image', 'media', 'font'}
+
+DEFAULT_BLOCKED_DOMAINS = {
+    # Ads
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'googletagservices.com',
+    'adservice.google.com',
+    'amazon-adsystem.com',
+    'adnxs.com',
+    'criteo.com',
+    'criteo.net',
+    'pubmatic.com',
+    'rubiconproject.com',
+    'openx.net',
+    'casalemedia.com',
+    'taboola.com',
+    'outbrain.com',
+    'moatads.com',
+    # Analytics and tracking
+    'google-analytics.com',
+    'googletagmanager.com',
+    'facebook.net',
+    'facebook.com',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'quantcount.com',
+    'hotjar.com',
+    'chartbeat.com',
+    'chartbeat.net',
+    'newrelic.com',
+    'nr-data.net',
+    'sentry.io',
+    'branch.io',
+}
+
+# The site itself is never blocked by domain (its scripts render the tab)
+DEFAULT_ALLOWED_DOMAINS = {'ultimate-guitar.com', 'ugstatic.com'}
+
+
+def _domain_matches(host, domains):
+    """Whether `host` is one of `domains` or a subdomain of one."""
+    while host:
+        if host in domains:
+            return True
+        _, _, host = host.partition('.')
+    return False
+
+
+class RequestFilter:
+    def __init__(self, blocked_types=None, blocked_domains=None, allowed_domains=None):
+        """
+        Initialize the filter.
+
+        Args:
+            blocked_types: Playwright resource types to abort everywhere
+            blocked_domains: Domains (and their subdomains) to abort
+            allowed_domains: Domains never blocked by the domain rules
+        """
+        self.blocked_types = set(DEFAULT_BLOCKED_TYPES if blocked_types is None else blocked_types)
+        self.blocked_domains = set(DEFAULT_BLOCKED_DOMAINS if blocked_domains is None else blocked_domains)
+        self.allowed_domains = set(DEFAULT_ALLOWED_DOMAINS if allowed_domains is None else allowed_domains)
+
+        self._pages = {}  # page -> stats for the URL currently loading in it
+        self.totals = {'pages': 0, 'requests': 0, 'blocked': 0, 'bytes': 0}
+        self.blocked_by_reason = Counter()
+
+    def should_block(self, resource_type, url):
+        """Return the reason a request should be aborted, or None to let it through."""
+        if resource_type in self.blocked_types:
+            return resource_type
+        host = (urlparse(url).hostname or '').lower()
+        if _domain_matches(host, self.allowed_domains):
+            return None
+        if _domain_matches(host, self.blocked_domains):
+            return 'domain'
+        return None
+
+    async def install(self, context):
+        """Route all requests of a browser context through the filter."""
+        await context.route('**/*', self._handle_route)
+        context.on('requestfinished', self._on_request_finished)
+
+    def _page_stats(self, request):
+        try:
+            return self._pages.get(request.frame.page)
+        except Exception:
+            return None  # Service worker requests have no frame
+
+    async def _handle_route(self, route):
+        request = route.request
+        stats = self._page_stats(request)
+        if stats is not None:
+            stats['requests'] += 1
+
+        reason = self.should_block(request.resource_type, request.url)
+        if reason:
+            self.blocked_by_reason[reason] += 1
+            if stats is not None:
+                stats['blocked'] += 1
+            await route.abort('blockedbyclient')
+        else:
+            await route.continue_()
+
+    async def _on_request_finished(self, request):
+        stats = self._page_stats(request)
+        if stats is None:
+            return
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        stats['bytes'] += max(0, sizes.get('responseBodySize', 0)) + max(0, sizes.get('responseHeadersSize', 0))
+
+    def start_page(self, page, url):
+        """Start counting requests for a navigation of `page` to `url`."""
+        self._pages[page] = {'url': url, 'requests': 0, 'blocked': 0, 'bytes': 0}
+
+    def finish_page(self, page):
+        """Stop counting for `page` and return that navigation's stats."""
+        stats = self._pages.pop(page, None)
+        if stats is None:
+            return None
+        self.totals['pages'] += 1
+        for key in ('requests', 'blocked', 'bytes'):
+            self.totals[key] += stats[key]
+        return stats
+
+    def summary(self):
+        """Totals across all finished pages, with per-page averages."""
+        pages = self.totals['pages'] or 1
+        return {
+            **self.totals,
+            'avg_requests_per_page': round(self.totals['requests'] / pages, 1),
+            'avg_bytes_per_page': round(self.totals['bytes'] / pages),
+            'blocked_by_reason': dict(self.blocked_by_reason),
+        }
+
+
+def format_page_stats(stats):
+    """One-line description of a page's network stats."""
+    return (f"{stats['requests']} requests ({stats['blocked']} blocked), "
+            f"{stats['bytes'] / 1024:.0f} KB downloaded")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Streaming result sink for the scrapers.
+
+Instead of collecting every result dict (tab content included) in a list and
+dumping it as one JSON document at the end, each result is written as a line
+of newline-delimited JSON as soon as it is ready, and the run's statistics
+are kept as running counters. Content is left out of the records - they
+point at where the content was saved instead - so memory stays flat however
+many tabs are scraped, and a crash keeps everything written up to the last
+flush.
+"""
+
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+
+# Bulky fields that are stored elsewhere and referenced, not repeated
+CONTENT_FIELDS = ('content', 'content_markup')
+
+
+def require_content(tab_data):
+    """
+    Turn a successful result whose content is blank into a failed one.
+
+    Call before saving, so a page that parsed but yielded no tab is neither
+    stored nor recorded as fetched, and is counted as a failure.
+    """
+    if tab_data.get('success') and not (tab_data.get('content') or '').strip():
+        return {**tab_data, 'success': False, 'error': 'No content found'}
+    return tab_data
+
+
+class ResultSink:
+    def __init__(self, output_dir, results_name="scraping_results.ndjson",
+                 summary_name="scraping_summary.json", flush_every=50, flush_interval=2.0):
+        """
+        Open a results file in `output_dir`.
+
+        Args:
+            output_dir: Directory the results and summary files go in
+            results_name: NDJSON file with one record per scraped URL
+            summary_name: JSON file with the run's statistics, written on close
+            flush_every: Records buffered before they are written out
+            flush_interval: Seconds after which buffered records are written anyway
+        """
+        output_dir = Path(output_dir)
+        self.results_path = output_dir / results_name
+        self.summary_path = output_dir / summary_name
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        self._file = open(self.results_path, 'w', encoding='utf-8')
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self.started = time.time()
+
+        self.stats = {
+            'total': 0,
+            'successful': 0,
+            'failed': 0,
+            'with_content': 0,
+            'content_chars': 0,
+        }
+        self.sources = Counter()
+        self.tab_types = Counter()
+
+    def write(self, tab_data, content_ref=None):
+        """Record one result; `content_ref` is its content hash in the corpus (corpus_store.py)."""
+        record = {key: value for key, value in tab_data.items() if key not in CONTENT_FIELDS}
+        content = tab_data.get('content') or ''
+        record.setdefault('content_length', len(content))
+        if content_ref is not None:
+            record['content_ref'] = str(content_ref)
+
+        self.stats['total'] += 1
+        if tab_data.get('success'):
+            self.stats['successful'] += 1
+            self.tab_types[tab_data.get('tab_type', 'unknown')] += 1
+            if tab_data.get('has_content', bool(content)):
+                self.stats['with_content'] += 1
+                self.stats['content_chars'] += len(content)
+                self.sources[tab_data.get('content_source', 'unknown')] += 1
+        else:
+            self.stats['failed'] += 1
+
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        if (len(self._buffer) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the results file."""
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._file.flush()
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def summary(self):
+        """Statistics for everything written so far."""
+        return {
+            **self.stats,
+            'content_sources': dict(self.sources),
+            'tab_types': dict(self.tab_types),
+            'results_file': self.results_path.name,
+            'elapsed_seconds': round(time.time() - self.started, 1),
+        }
+
+    def close(self):
+        """Flush the remaining records and write the summary file."""
+        self.flush()
+        self._file.close()
+        summary = self.summary()
+        with open(self.summary_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        return summary
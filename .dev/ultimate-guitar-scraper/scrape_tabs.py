@@ -6,118 +6,148 @@ This script takes the URLs extracted from your saved tabs and downloads
 the actual chord/tab content from each page.
 """
 
+import argparse
+import asyncio
 import requests
-import time
-import json
-import re
 from pathlib import Path
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-import sys
+
+from async_fetch import AsyncFetcher, DEFAULT_HEADERS
+from corpus_store import CorpusStore
+from http_cache import add_cache_arguments, cache_from_args, cached_get
+from parse_pool import ParsePool, add_parse_pool_arguments
+from profiling import add_profile_arguments, profile_stage, profiler_from_args
+from rate_control import format_rate_summary
+from result_sink import ResultSink, require_content
+from sync_manifest import SyncManifest
+from tab_parser import add_parser_arguments, extract_page_fields
+from ug_store import extract_tab_from_html
+
+def error_result(url, error):
+    """Build the result dict for a URL that could not be scraped."""
+    print(f"Error scraping {url}: {error}")
+    return {
+        'url': url,
+        'error': str(error),
+        'success': False
+    }
+
+def parse_tab_page(url, html, parser_backend='auto'):
+    """
+    Parse a fetched Ultimate Guitar page into a tab data dict.
+
+    Module-level (and free of scraper state) so parse_pool workers can run it.
+    """
+    try:
+        # Clean up the URL to get song and type info
+        url_parts = url.split('/')
+        song_info = url_parts[-1] if url_parts else ""
+    
+        # Determine tab type from URL
+        tab_type = "chords"
+        if "-tabs-" in song_info:
+            tab_type = "tab"
+        elif "-ukulele-" in song_info:
+            tab_type = "ukulele"
+    
+        # Method 0: Read the JSON store embedded in the page source.
+        # The chord text is rendered by JavaScript, so this is the only
+        # place it exists in the raw HTML - and it needs no DOM parse.
+        store_tab = extract_tab_from_html(html)
+        if store_tab and store_tab['content']:
+            return {
+                'url': url,
+                'title': store_tab['title'] or "Unknown",
+                'artist': store_tab['artist'] or "Unknown",
+                'song_info': song_info,
+                'tab_type': tab_type,
+                'content': store_tab['content'],
+                'content_markup': store_tab['content_markup'],
+                'content_source': 'js-store',
+                'key': store_tab['key'],
+                'tuning': store_tab['tuning'],
+                'capo': store_tab['capo'],
+                'success': True
+            }
+    
+        fields = extract_page_fields(html, parser_backend)
+    
+        # Extract metadata
+        title = fields['h1'].strip() if fields['h1'] is not None else "Unknown"
+    
+        # Extract artist from the title or from links
+        artist = "Unknown"
+        if "by" in title:
+            artist = title.split("by")[-1].strip()
+        elif fields['artist_link'] is not None:
+            artist = fields['artist_link'].strip()
+    
+        # Extract the main tab content
+        # The tab content is usually in a <code> or specific container
+        tab_content = ""
+    
+        # Method 1: Look for <code> elements (common for chord/tab content)
+        if fields['code']:
+            tab_content = fields['code']
+    
+        # Method 2: Look for specific tab content containers
+        if not tab_content:
+            # Look for other possible containers
+            for selector in [
+                '.js-tab-content',
+                '[data-content]', 
+                '.tab-content',
+                '.chord-content'
+            ]:
+                if selector in fields['selectors']:
+                    tab_content = fields['selectors'][selector]
+                    break
+    
+        return {
+            'url': url,
+            'title': title,
+            'artist': artist,
+            'song_info': song_info,
+            'tab_type': tab_type,
+            'content': tab_content,
+            'success': True
+        }
+        
+    except Exception as e:
+        return error_result(url, e)
 
 class TabScraper:
-    def __init__(self):
+    def __init__(self, max_per_host=4, rate=2.0, burst=4, cache=None, parser_backend='auto',
+                 profiler=None, parse_workers=None, parse_chunk=16):
+        self.cache = cache  # Optional http_cache.ResponseCache
+        self.profiler = profiler  # Optional profiling.StageProfiler (--profile)
+        self.parser_backend = parser_backend  # See tab_parser.BACKENDS
+        # Pages are parsed in worker processes, `parse_chunk` at a time (see parse_pool.py)
+        self.parse_workers = parse_workers
+        self.parse_chunk = parse_chunk
         self.session = requests.Session()
         # Set a user agent to avoid being blocked
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.delay = 1  # Delay between requests to be respectful
+        self.session.headers.update(DEFAULT_HEADERS)
+        # Polite concurrency: each host starts at `max_per_host` requests in flight
+        # and `rate` requests per second, then adapts to how the host responds
+        self.fetcher = AsyncFetcher(max_per_host=max_per_host, rate=rate, burst=burst, cache=cache)
         
     def extract_tab_content(self, url):
         """Extract the tab content from a Ultimate Guitar URL."""
         try:
             print(f"Fetching: {url}")
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract metadata
-            title_elem = soup.find('h1')
-            title = title_elem.get_text().strip() if title_elem else "Unknown"
-            
-            # Extract artist from the title or from links
-            artist = "Unknown"
-            if "by" in title:
-                artist = title.split("by")[-1].strip()
-            else:
-                artist_link = soup.find('a', href=re.compile(r'/artist/'))
-                if artist_link:
-                    artist = artist_link.get_text().strip()
-            
-            # Extract the main tab content
-            # The tab content is usually in a <code> or specific container
-            tab_content = ""
-            
-            # Method 1: Look for <code> elements (common for chord/tab content)
-            code_elem = soup.find('code')
-            if code_elem:
-                tab_content = code_elem.get_text()
-            
-            # Method 2: Look for specific tab content containers
-            if not tab_content:
-                # Look for other possible containers
-                for selector in [
-                    '.js-tab-content',
-                    '[data-content]', 
-                    '.tab-content',
-                    '.chord-content'
-                ]:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        tab_content = elem.get_text()
-                        break
-            
-            # Clean up the URL to get song and type info
-            url_parts = url.split('/')
-            song_info = url_parts[-1] if url_parts else ""
-            
-            # Determine tab type from URL
-            tab_type = "chords"
-            if "-tabs-" in song_info:
-                tab_type = "tab"
-            elif "-ukulele-" in song_info:
-                tab_type = "ukulele"
-            
-            return {
-                'url': url,
-                'title': title,
-                'artist': artist,
-                'song_info': song_info,
-                'tab_type': tab_type,
-                'content': tab_content,
-                'success': True
-            }
-            
+            html = self.fetcher.rate_control.call_sync(url, lambda: cached_get(self.session, self.cache, url))
+            return self.parse_tab_page(url, html)
         except Exception as e:
-            print(f"Error scraping {url}: {e}")
-            return {
-                'url': url,
-                'error': str(e),
-                'success': False
-            }
+            return self.error_result(url, e)
     
-    def save_tab_data(self, tab_data, output_dir):
-        """Save individual tab data to files."""
-        if not tab_data['success']:
-            return
-            
-        # Create filename-safe version
-        artist = re.sub(r'[^\w\s-]', '', tab_data['artist']).strip()
-        title_clean = re.sub(r'[^\w\s-]', '', tab_data['title']).strip()
-        filename = f"{artist} - {title_clean} - {tab_data['tab_type']}.txt"
-        filename = filename.replace('  ', ' ')[:100]  # Limit length
-        
-        filepath = output_dir / filename
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Title: {tab_data['title']}\n")
-            f.write(f"Artist: {tab_data['artist']}\n")
-            f.write(f"Type: {tab_data['tab_type']}\n")
-            f.write(f"Source: {tab_data['url']}\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(tab_data['content'])
+    def error_result(self, url, error):
+        """Build the result dict for a URL that could not be scraped."""
+        return error_result(url, error)
+    
+    def parse_tab_page(self, url, html):
+        """Parse a fetched Ultimate Guitar page into a tab data dict."""
+        return parse_tab_page(url, html, self.parser_backend)
     
     def scrape_all_tabs(self, urls_file, output_dir=None):
         """Scrape all tabs from the URLs file."""
@@ -138,52 +168,105 @@ class TabScraper:
         print(f"Found {len(urls)} URLs to scrape")
         print(f"Output directory: {output_dir}")
         
-        # Scrape each URL
-        results = []
-        for i, url in enumerate(urls, 1):
-            print(f"\n[{i}/{len(urls)}] Processing...")
-            
-            tab_data = self.extract_tab_content(url)
-            results.append(tab_data)
+        # Scrape all URLs concurrently, streaming results to disk as they finish
+        sink = ResultSink(output_dir)
+        corpus = CorpusStore(output_dir)
+        manifest = SyncManifest()
+        done = 0
+        # CPU-bound parsing runs in other processes, off the fetch loop's core
+        parse_pool = ParsePool(parse_tab_page, workers=self.parse_workers, chunk_size=self.parse_chunk,
+                               parser_backend=self.parser_backend)
+        
+        async def handle_page(index, url, html, error):
+            nonlocal done
+            done += 1
+            print(f"\n[{done}/{len(urls)}] Processing...")
+            print(f"Fetched: {url}")
             
-            if tab_data['success']:
-                self.save_tab_data(tab_data, output_dir)
-                print(f"✓ Saved: {tab_data['artist']} - {tab_data['title']}")
+            if error is not None:
+                save(self.error_result(url, error))
+                return
+            if parse_pool.workers:
+                # Parsed in other processes; waiting for them to catch up holds back this fetch worker only
+                finished = await parse_pool.submit_async(url, html)
             else:
-                print(f"✗ Failed: {url}")
-            
-            # Be respectful with delays
-            if i < len(urls):  # Don't sleep after the last one
-                time.sleep(self.delay)
+                with profile_stage(self.profiler, 'parse'):
+                    finished = parse_pool.submit(url, html)
+            save_parsed(finished)
+        
+        def save_parsed(finished):
+            for url, tab_data, error in finished:
+                save(tab_data if error is None else self.error_result(url, error))
+        
+        def save(tab_data):
+            url = tab_data['url']
+            with profile_stage(self.profiler, 'save'):
+                tab_data = require_content(tab_data)
+                if tab_data['success']:
+                    content_hash = corpus.put(tab_data)
+                    manifest.record(url, content_hash)
+                    print(f"✓ Saved: {tab_data['artist']} - {tab_data['title']}")
+                else:
+                    content_hash = None
+                    print(f"✗ Failed: {url}")
+                sink.write(tab_data, content_ref=content_hash)
         
-        # Save summary
-        summary_file = output_dir / "scraping_summary.json"
-        with open(summary_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        try:
+            # Parsing and saving happen in handle_page and are profiled as their own stages
+            with profile_stage(self.profiler, 'fetch'):
+                asyncio.run(self.fetcher.fetch_all(urls, handle_page, raw=True))
+            with profile_stage(self.profiler, 'parse'):
+                finished = parse_pool.drain()
+            save_parsed(finished)
+        finally:
+            parse_pool.close()
+            # Summary statistics were kept as the results streamed in
+            summary = sink.close()
+            corpus.close()
+            manifest.close()
         
-        successful = sum(1 for r in results if r['success'])
+        successful = summary['successful']
         print(f"\n" + "="*50)
         print(f"Scraping complete!")
         print(f"Successful: {successful}/{len(urls)}")
         print(f"Failed: {len(urls) - successful}/{len(urls)}")
-        print(f"Files saved to: {output_dir}")
+        print(f"Tabs saved to: {corpus.path} (export with: python corpus_store.py export {corpus.path} <dir>)")
+        print(f"Results: {sink.results_path}")
+        for line in format_rate_summary(self.fetcher.rate_control.summary()):
+            print(f"Rate: {line}")
+        if parse_pool.workers:
+            print(f"Parse: {parse_pool.stats['pages']} pages in {parse_pool.stats['chunks']} chunks "
+                  f"across {parse_pool.workers} processes")
+        if self.profiler:
+            print(f"Profile report: {self.profiler.write()}")
         
-        return results
+        return summary
 
 def main():
     """Main function."""
-    urls_file = Path.cwd() / "ultimate_guitar_urls.txt"
-    
-    # Allow custom URLs file
-    if len(sys.argv) > 1:
-        urls_file = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Scrape Ultimate Guitar tab content")
+    parser.add_argument('urls_file', nargs='?', default=Path.cwd() / "ultimate_guitar_urls.txt",
+                        help="File with one tab URL per line")
+    add_cache_arguments(parser)
+    add_parser_arguments(parser)
+    add_parse_pool_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
     
+    urls_file = Path(args.urls_file)
     if not urls_file.exists():
         print(f"URLs file not found: {urls_file}")
         print("Please run extract_tab_urls.py first to generate the URLs file.")
         return
     
-    scraper = TabScraper()
+    profiler = profiler_from_args(args)
+    parse_workers = args.parse_workers
+    if profiler and parse_workers is None:
+        # Work done in other processes would be missing from the parse profile
+        parse_workers = 0
+    
+    scraper = TabScraper(cache=cache_from_args(args), parser_backend=args.parser_backend,
+                         profiler=profiler, parse_workers=parse_workers, parse_chunk=args.parse_chunk)
     scraper.scrape_all_tabs(urls_file)
 
 if __name__ == "__main__":
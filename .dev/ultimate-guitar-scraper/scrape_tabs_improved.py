@@ -6,41 +6,92 @@ This script takes the URLs extracted from your saved tabs and downloads
 the actual chord/tab content from each page with better parsing.
 """
 
+import argparse
 import requests
-import time
-import json
 import re
 from pathlib import Path
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-import sys
+
+from corpus_store import CorpusStore
+from http_cache import add_cache_arguments, cache_from_args, cached_get
+from profiling import add_profile_arguments, profile_stage, profiler_from_args
+from rate_control import RateControl, format_rate_summary
+from result_sink import ResultSink, require_content
+from sync_manifest import SyncManifest
+from tab_parser import add_parser_arguments, extract_page_fields
+from ug_store import extract_tab_from_html
 
 class TabScraper:
-    def __init__(self):
+    def __init__(self, cache=None, parser_backend='auto', profiler=None):
+        self.cache = cache  # Optional http_cache.ResponseCache
+        self.profiler = profiler  # Optional profiling.StageProfiler (--profile)
+        self.parser_backend = parser_backend  # See tab_parser.BACKENDS
         self.session = requests.Session()
         # Set a user agent to avoid being blocked
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
-        self.delay = 2  # Delay between requests to be respectful
+        self.delay = 2  # Starting delay between requests to be respectful
+        # Adapts the delay per host: backs off on 429/5xx, eases up while healthy
+        self.control = RateControl(rate=1 / self.delay, concurrency=1, max_rate=2 / self.delay,
+                                   max_concurrency=1)
         
+    def fetch(self, url):
+        """Fetch a page, paced and retried per host (pages served from the cache skip the wait)."""
+        paced = not (self.cache and self.cache.serves_from_disk(url))
+        with profile_stage(self.profiler, 'fetch'):
+            return self.control.call_sync(url, lambda: cached_get(self.session, self.cache, url), paced=paced)
+    
     def extract_tab_content(self, url):
         """Extract the tab content from a Ultimate Guitar URL."""
         try:
             print(f"Fetching: {url}")
-            response = self.session.get(url)
-            response.raise_for_status()
+            html = self.fetch(url)
+            
+            # Clean up the URL to get song and type info
+            url_parts = url.split('/')
+            song_info = url_parts[-1] if url_parts else ""
+            
+            # Determine tab type from URL
+            tab_type = "chords"
+            if "-tabs-" in song_info:
+                tab_type = "tab"
+            elif "-ukulele-" in song_info:
+                tab_type = "ukulele"
+            elif "-bass-" in song_info:
+                tab_type = "bass"
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Method 0: Read the JSON store embedded in the page source
+            # (the chord text is rendered by JavaScript, so the DOM has none)
+            store_tab = extract_tab_from_html(html)
+            if store_tab and store_tab['content']:
+                tab_content = store_tab['content']
+                print(f"Found content in js-store: {len(tab_content)} characters")
+                return {
+                    'url': url,
+                    'title': store_tab['title'] or "Unknown",
+                    'artist': store_tab['artist'] or "Unknown",
+                    'song_info': song_info,
+                    'tab_type': tab_type,
+                    'content': tab_content,
+                    'content_length': len(tab_content),
+                    'content_markup': store_tab['content_markup'],
+                    'content_source': 'js-store',
+                    'key': store_tab['key'],
+                    'tuning': store_tab['tuning'],
+                    'capo': store_tab['capo'],
+                    'success': True
+                }
+            
+            fields = extract_page_fields(html, self.parser_backend)
             
             # Extract song title and artist from the page
             title = "Unknown"
             artist = "Unknown"
             
             # Method 1: Look for the main heading (pattern like "Vienna Ukulele Chords by Billy Joel")
-            h1_elem = soup.find('h1')
-            if h1_elem:
-                h1_text = h1_elem.get_text().strip()
+            if fields['h1'] is not None:
+                h1_text = fields['h1'].strip()
                 print(f"Found h1: {h1_text}")
                 if " by " in h1_text:
                     title_part, artist = h1_text.split(" by ", 1)
@@ -51,9 +102,8 @@ class TabScraper:
             
             # Method 2: Look for artist link if not found above
             if artist == "Unknown":
-                artist_link = soup.find('a', href=re.compile(r'/artist/'))
-                if artist_link:
-                    artist = artist_link.get_text().strip()
+                if fields['artist_link'] is not None:
+                    artist = fields['artist_link'].strip()
                     print(f"Found artist link: {artist}")
             
             # Method 3: Extract from URL as fallback
@@ -74,16 +124,14 @@ class TabScraper:
             tab_content = ""
             
             # Method 1: Look for <code> elements (most common for chord/tab content)
-            code_elem = soup.find('code')
-            if code_elem:
-                tab_content = code_elem.get_text(strip=False)
+            if fields['code']:
+                tab_content = fields['code']
                 print(f"Found content in <code>: {len(tab_content)} characters")
             
             # Method 2: Look for pre-formatted text areas
             if not tab_content:
-                pre_elem = soup.find('pre')
-                if pre_elem:
-                    tab_content = pre_elem.get_text(strip=False)
+                if fields['pre']:
+                    tab_content = fields['pre']
                     print(f"Found content in <pre>: {len(tab_content)} characters")
             
             # Method 3: Look for specific Ultimate Guitar content containers
@@ -95,35 +143,17 @@ class TabScraper:
                     '.chord-content',
                     '.tab_text_content'
                 ]:
-                    elem = soup.select_one(selector)
-                    if elem:
-                        tab_content = elem.get_text(strip=False)
+                    if selector in fields['selectors']:
+                        tab_content = fields['selectors'][selector]
                         print(f"Found content in {selector}: {len(tab_content)} characters")
                         break
             
             # If still no content, look for any large text blocks
             if not tab_content:
                 # Look for divs or spans with lots of text that might contain chords
-                all_text_elements = soup.find_all(['div', 'span', 'p'], string=re.compile(r'[A-G]m?[\d#b]*'))
-                for elem in all_text_elements:
-                    text = elem.get_text()
-                    if len(text) > 200:  # Reasonable size for tab content
-                        tab_content = text
-                        print(f"Found content in text block: {len(tab_content)} characters")
-                        break
-            
-            # Clean up the URL to get song and type info
-            url_parts = url.split('/')
-            song_info = url_parts[-1] if url_parts else ""
-            
-            # Determine tab type from URL
-            tab_type = "chords"
-            if "-tabs-" in song_info:
-                tab_type = "tab"
-            elif "-ukulele-" in song_info:
-                tab_type = "ukulele"
-            elif "-bass-" in song_info:
-                tab_type = "bass"
+                if fields['text_block']:
+                    tab_content = fields['text_block']
+                    print(f"Found content in text block: {len(tab_content)} characters")
             
             return {
                 'url': url,
@@ -144,28 +174,6 @@ class TabScraper:
                 'success': False
             }
     
-    def save_tab_data(self, tab_data, output_dir):
-        """Save individual tab data to files."""
-        if not tab_data['success']:
-            return
-            
-        # Create filename-safe version
-        artist = re.sub(r'[^\w\s-]', '', tab_data['artist']).strip()
-        title_clean = re.sub(r'[^\w\s-]', '', tab_data['title']).strip()
-        filename = f"{artist} - {title_clean} - {tab_data['tab_type']}.txt"
-        filename = filename.replace('  ', ' ')[:100]  # Limit length
-        
-        filepath = output_dir / filename
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Title: {tab_data['title']}\n")
-            f.write(f"Artist: {tab_data['artist']}\n")
-            f.write(f"Type: {tab_data['tab_type']}\n")
-            f.write(f"Source: {tab_data['url']}\n")
-            f.write(f"Content Length: {tab_data.get('content_length', 0)} characters\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(tab_data['content'])
-    
     def scrape_all_tabs(self, urls_file, output_dir=None):
         """Scrape all tabs from the URLs file."""
         
@@ -185,55 +193,69 @@ class TabScraper:
         print(f"Found {len(urls)} URLs to scrape")
         print(f"Output directory: {output_dir}")
         
-        # Scrape each URL
-        results = []
-        for i, url in enumerate(urls, 1):
-            print(f"\n[{i}/{len(urls)}] Processing...")
-            
-            tab_data = self.extract_tab_content(url)
-            results.append(tab_data)
-            
-            if tab_data['success']:
-                self.save_tab_data(tab_data, output_dir)
-                content_info = f"({tab_data.get('content_length', 0)} chars)" if tab_data.get('content_length') else ""
-                print(f"✓ Saved: {tab_data['artist']} - {tab_data['title']} {content_info}")
-            else:
-                print(f"✗ Failed: {url}")
-            
-            # Be respectful with delays
-            if i < len(urls):  # Don't sleep after the last one
-                time.sleep(self.delay)
-        
-        # Save summary
-        summary_file = output_dir / "scraping_summary.json"
-        with open(summary_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        # Scrape each URL, streaming results to disk as we go
+        sink = ResultSink(output_dir)
+        corpus = CorpusStore(output_dir)
+        manifest = SyncManifest()
+        try:
+            for i, url in enumerate(urls, 1):
+                print(f"\n[{i}/{len(urls)}] Processing...")
+                
+                # Fetching inside it is profiled as its own stage
+                with profile_stage(self.profiler, 'parse'):
+                    tab_data = self.extract_tab_content(url)
+                
+                with profile_stage(self.profiler, 'save'):
+                    tab_data = require_content(tab_data)
+                    if tab_data['success']:
+                        content_hash = corpus.put(tab_data)
+                        manifest.record(url, content_hash)
+                        content_info = f"({tab_data.get('content_length', 0)} chars)" if tab_data.get('content_length') else ""
+                        print(f"✓ Saved: {tab_data['artist']} - {tab_data['title']} {content_info}")
+                    else:
+                        content_hash = None
+                        print(f"✗ Failed: {url}")
+                    sink.write(tab_data, content_ref=content_hash)
+        finally:
+            # Summary statistics were kept as the results streamed in
+            summary = sink.close()
+            corpus.close()
+            manifest.close()
         
-        successful = sum(1 for r in results if r['success'])
-        with_content = sum(1 for r in results if r['success'] and r.get('content_length', 0) > 0)
+        successful = summary['successful']
+        with_content = summary['with_content']
         print(f"\n" + "="*50)
         print(f"Scraping complete!")
         print(f"Successful: {successful}/{len(urls)}")
         print(f"With content: {with_content}/{len(urls)}")
         print(f"Failed: {len(urls) - successful}/{len(urls)}")
-        print(f"Files saved to: {output_dir}")
+        print(f"Tabs saved to: {corpus.path} (export with: python corpus_store.py export {corpus.path} <dir>)")
+        print(f"Results: {sink.results_path}")
+        for line in format_rate_summary(self.control.summary()):
+            print(f"Rate: {line}")
+        if self.profiler:
+            print(f"Profile report: {self.profiler.write()}")
         
-        return results
+        return summary
 
 def main():
     """Main function."""
-    urls_file = Path.cwd() / "ultimate_guitar_urls.txt"
-    
-    # Allow custom URLs file
-    if len(sys.argv) > 1:
-        urls_file = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Scrape Ultimate Guitar tab content (improved parser)")
+    parser.add_argument('urls_file', nargs='?', default=Path.cwd() / "ultimate_guitar_urls.txt",
+                        help="File with one tab URL per line")
+    add_cache_arguments(parser)
+    add_parser_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
     
+    urls_file = Path(args.urls_file)
     if not urls_file.exists():
         print(f"URLs file not found: {urls_file}")
         print("Please run extract_tab_urls.py first to generate the URLs file.")
         return
     
-    scraper = TabScraper()
+    scraper = TabScraper(cache=cache_from_args(args), parser_backend=args.parser_backend,
+                         profiler=profiler_from_args(args))
     scraper.scrape_all_tabs(urls_file)
 
 if __name__ == "__main__":
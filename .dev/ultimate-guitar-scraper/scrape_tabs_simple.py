@@ -5,22 +5,34 @@ Ultimate Guitar Tab Content Scraper - Simple & Robust Version
 This version focuses on being crash-proof and extracting what's available.
 """
 
+import argparse
 import requests
-import time
-import json
 import re
 from pathlib import Path
-from bs4 import BeautifulSoup
-import sys
+
+from corpus_store import CorpusStore
+from http_cache import add_cache_arguments, cache_from_args, cached_get
+from profiling import add_profile_arguments, profile_stage, profiler_from_args
+from rate_control import RateControl, format_rate_summary
+from result_sink import ResultSink, require_content
+from sync_manifest import SyncManifest
+from tab_parser import add_parser_arguments, extract_page_fields
+from ug_store import extract_tab_from_html
 
 class SimpleTabScraper:
-    def __init__(self):
+    def __init__(self, cache=None, parser_backend='auto', profiler=None):
+        self.cache = cache  # Optional http_cache.ResponseCache
+        self.profiler = profiler  # Optional profiling.StageProfiler (--profile)
+        self.parser_backend = parser_backend  # See tab_parser.BACKENDS
         self.session = requests.Session()
         # Set a user agent to avoid being blocked
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
-        self.delay = 2  # Delay between requests to be respectful
+        self.delay = 2  # Starting delay between requests to be respectful
+        # Adapts the delay per host: backs off on 429/5xx, eases up while healthy
+        self.control = RateControl(rate=1 / self.delay, concurrency=1, max_rate=2 / self.delay,
+                                   max_concurrency=1)
         
     def extract_from_url(self, url):
         """Extract basic info from URL as fallback."""
@@ -59,18 +71,53 @@ class SimpleTabScraper:
         
         return "Unknown Artist", "Unknown Song", "chords"
         
+    def fetch(self, url):
+        """Fetch a page, paced and retried per host (pages served from the cache skip the wait)."""
+        paced = not (self.cache and self.cache.serves_from_disk(url))
+        with profile_stage(self.profiler, 'fetch'):
+            return self.control.call_sync(
+                url, lambda: cached_get(self.session, self.cache, url, timeout=10), paced=paced
+            )
+    
     def extract_tab_content(self, url):
         """Extract the tab content from a Ultimate Guitar URL with robust error handling."""
         try:
             print(f"Fetching: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+            html = self.fetch(url)
             
             # Get fallback info from URL
             artist_fallback, title_fallback, type_fallback = self.extract_from_url(url)
             
+            # Method 0: Read the JSON store embedded in the page source
+            # (the chord text is rendered by JavaScript, so the DOM has none)
+            try:
+                store_tab = extract_tab_from_html(html)
+            except Exception as e:
+                print(f"Error reading js-store: {e}")
+                store_tab = None
+            
+            if store_tab and store_tab['content']:
+                tab_content = store_tab['content']
+                print(f"Found content in js-store: {len(tab_content)} chars")
+                return {
+                    'url': url,
+                    'title': store_tab['title'] or title_fallback,
+                    'artist': store_tab['artist'] or artist_fallback,
+                    'tab_type': type_fallback,
+                    'content': tab_content,
+                    'content_markup': store_tab['content_markup'],
+                    'content_source': 'js-store',
+                    'content_length': len(tab_content),
+                    'page_text_length': 0,
+                    'key': store_tab['key'],
+                    'tuning': store_tab['tuning'],
+                    'capo': store_tab['capo'],
+                    'has_content': True,
+                    'success': True
+                }
+            
+            fields = extract_page_fields(html, self.parser_backend)
+            
             # Try to extract title and artist from page
             title = title_fallback
             artist = artist_fallback
@@ -78,9 +125,8 @@ class SimpleTabScraper:
             
             # Look for h1 title
             try:
-                h1_elem = soup.find('h1')
-                if h1_elem:
-                    h1_text = h1_elem.get_text().strip()
+                if fields['h1'] is not None:
+                    h1_text = fields['h1'].strip()
                     if h1_text and len(h1_text) > 0:
                         print(f"Found title: {h1_text}")
                         # Try to parse "Song Title Type by Artist"
@@ -100,9 +146,8 @@ class SimpleTabScraper:
             
             try:
                 # Method 1: Look for <code> elements
-                code_elem = soup.find('code')
-                if code_elem:
-                    tab_content = code_elem.get_text(strip=False)
+                if fields['code'] is not None:
+                    tab_content = fields['code']
                     content_source = "code"
                     print(f"Found content in <code>: {len(tab_content)} chars")
             except Exception as e:
@@ -111,9 +156,8 @@ class SimpleTabScraper:
             # Method 2: Look for <pre> elements
             if not tab_content:
                 try:
-                    pre_elem = soup.find('pre')
-                    if pre_elem:
-                        tab_content = pre_elem.get_text(strip=False)
+                    if fields['pre'] is not None:
+                        tab_content = fields['pre']
                         content_source = "pre"
                         print(f"Found content in <pre>: {len(tab_content)} chars")
                 except Exception as e:
@@ -124,9 +168,8 @@ class SimpleTabScraper:
                 selectors = ['.js-tab-content', '[data-content]', '.tab-content']
                 for selector in selectors:
                     try:
-                        elem = soup.select_one(selector)
-                        if elem:
-                            tab_content = elem.get_text(strip=False)
+                        if selector in fields['selectors']:
+                            tab_content = fields['selectors'][selector]
                             content_source = selector
                             print(f"Found content in {selector}: {len(tab_content)} chars")
                             break
@@ -134,7 +177,7 @@ class SimpleTabScraper:
                         print(f"Error with selector {selector}: {e}")
             
             # If still no content, get page text for manual inspection
-            page_text = soup.get_text() if not tab_content else ""
+            page_text_length = fields['text_length'] if not tab_content else 0
             
             return {
                 'url': url,
@@ -144,7 +187,7 @@ class SimpleTabScraper:
                 'content': tab_content,
                 'content_source': content_source,
                 'content_length': len(tab_content),
-                'page_text_length': len(page_text),
+                'page_text_length': page_text_length,
                 'has_content': len(tab_content) > 0,
                 'success': True
             }
@@ -161,34 +204,6 @@ class SimpleTabScraper:
                 'success': False
             }
     
-    def save_tab_data(self, tab_data, output_dir):
-        """Save individual tab data to files."""
-        if not tab_data['success']:
-            return
-            
-        # Create filename-safe version
-        artist = re.sub(r'[^\w\s-]', '', tab_data['artist']).strip()[:30]
-        title = re.sub(r'[^\w\s-]', '', tab_data['title']).strip()[:30]
-        filename = f"{artist} - {title} - {tab_data['tab_type']}.txt"
-        filename = re.sub(r'\s+', ' ', filename)  # Clean up spaces
-        
-        filepath = output_dir / filename
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Title: {tab_data['title']}\n")
-            f.write(f"Artist: {tab_data['artist']}\n")
-            f.write(f"Type: {tab_data['tab_type']}\n")
-            f.write(f"Source: {tab_data['url']}\n")
-            f.write(f"Content Length: {tab_data.get('content_length', 0)} characters\n")
-            f.write(f"Content Source: {tab_data.get('content_source', 'none')}\n")
-            f.write("=" * 50 + "\n\n")
-            
-            if tab_data.get('content'):
-                f.write(tab_data['content'])
-            else:
-                f.write("No chord/tab content extracted from this page.\n")
-                f.write("This may be due to JavaScript loading or page structure changes.\n")
-    
     def scrape_batch(self, urls, output_dir=None):
         """Scrape a batch of URLs."""
         
@@ -203,36 +218,36 @@ class SimpleTabScraper:
         print(f"Found {len(urls)} URLs to scrape")
         print(f"Output directory: {output_dir}")
         
-        # Scrape each URL
-        results = []
-        for i, url in enumerate(urls, 1):
-            print(f"\n[{i}/{len(urls)}] Processing...")
-            
-            tab_data = self.extract_tab_content(url)
-            results.append(tab_data)
-            
-            if tab_data['success']:
-                self.save_tab_data(tab_data, output_dir)
-                status = "✓"
-                if tab_data.get('has_content'):
-                    status += f" ({tab_data.get('content_length', 0)} chars)"
-                else:
-                    status += " (no content)"
-                print(f"{status} {tab_data['artist']} - {tab_data['title']}")
-            else:
-                print(f"✗ Failed: {url}")
-            
-            # Be respectful with delays
-            if i < len(urls):
-                time.sleep(self.delay)
-        
-        # Save summary
-        summary_file = output_dir / "scraping_summary.json"
-        with open(summary_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        # Scrape each URL, streaming results to disk as we go
+        sink = ResultSink(output_dir)
+        corpus = CorpusStore(output_dir)
+        manifest = SyncManifest()
+        try:
+            for i, url in enumerate(urls, 1):
+                print(f"\n[{i}/{len(urls)}] Processing...")
+                
+                # Fetching inside it is profiled as its own stage
+                with profile_stage(self.profiler, 'parse'):
+                    tab_data = self.extract_tab_content(url)
+                
+                with profile_stage(self.profiler, 'save'):
+                    tab_data = require_content(tab_data)
+                    if tab_data['success']:
+                        content_hash = corpus.put(tab_data)
+                        manifest.record(url, content_hash)
+                        print(f"✓ ({tab_data.get('content_length', 0)} chars) {tab_data['artist']} - {tab_data['title']}")
+                    else:
+                        content_hash = None
+                        print(f"✗ Failed: {url}")
+                    sink.write(tab_data, content_ref=content_hash)
+        finally:
+            # Summary statistics were kept as the results streamed in
+            summary = sink.close()
+            corpus.close()
+            manifest.close()
         
-        successful = sum(1 for r in results if r['success'])
-        with_content = sum(1 for r in results if r['success'] and r.get('has_content'))
+        successful = summary['successful']
+        with_content = summary['with_content']
         
         print(f"\n" + "="*50)
         print(f"Scraping complete!")
@@ -240,18 +255,26 @@ class SimpleTabScraper:
         print(f"With content: {with_content}/{len(urls)}")
         print(f"No content: {successful - with_content}/{len(urls)}")
         print(f"Failed: {len(urls) - successful}/{len(urls)}")
-        print(f"Files saved to: {output_dir}")
+        print(f"Tabs saved to: {corpus.path} (export with: python corpus_store.py export {corpus.path} <dir>)")
+        print(f"Results: {sink.results_path}")
+        for line in format_rate_summary(self.control.summary()):
+            print(f"Rate: {line}")
+        if self.profiler:
+            print(f"Profile report: {self.profiler.write()}")
         
-        return results
+        return summary
 
 def main():
     """Main function."""
-    urls_file = Path.cwd() / "test_urls.txt"  # Default to test file
-    
-    # Allow custom URLs file
-    if len(sys.argv) > 1:
-        urls_file = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Scrape Ultimate Guitar tab content (simple & robust)")
+    parser.add_argument('urls_file', nargs='?', default=Path.cwd() / "test_urls.txt",
+                        help="File with one tab URL per line (default: test file)")
+    add_cache_arguments(parser)
+    add_parser_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
     
+    urls_file = Path(args.urls_file)
     if not urls_file.exists():
         print(f"URLs file not found: {urls_file}")
         return
@@ -261,7 +284,8 @@ def main():
     with open(urls_file, 'r') as f:
         urls = [line.strip() for line in f if line.strip()]
     
-    scraper = SimpleTabScraper()
+    scraper = SimpleTabScraper(cache=cache_from_args(args), parser_backend=args.parser_backend,
+                               profiler=profiler_from_args(args))
     scraper.scrape_batch(urls)
 
 if __name__ == "__main__":
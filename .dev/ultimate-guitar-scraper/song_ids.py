@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Deterministic source ids and content hashes for the importers.
+
+A tab imported twice must land on the same song, so every song is sent
+with a `sourceId` naming where it came from: the Ultimate Guitar tab
+number at the end of the URL (`ug-1755704`), falling back to a prefix of
+the content hash when the URL has none. The API keeps one song per user
+and sourceId, under a song id of its own, so two users importing the same
+tab still get two songs. The content hash is the same SHA-256 hex digest
+the API stores as `contentHash`, which lets an importer skip songs whose
+stored content already matches.
+"""
+
+import hashlib
+import re
+
+
+TAB_ID_RE = re.compile(r'-(\d+)/?(?:[?#].*)?$')
+
+
+def tab_id_from_url(url):
+    """The numeric UG tab id at the end of a tab URL, or None."""
+    match = TAB_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+def content_hash(content):
+    """SHA-256 hex digest of the content (matches the API's contentHash)."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def source_id_for(url, content):
+    """Stable source id: `ug-<tab id>` from the URL, else `ug-<content hash prefix>`."""
+    tab_id = tab_id_from_url(url)
+    if tab_id:
+        return f"ug-{tab_id}"
+    return f"ug-{content_hash(content)[:16]}"
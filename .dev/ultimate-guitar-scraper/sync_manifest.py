@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Manifest of processed tabs, for incremental syncs.
+
+Every tab a scraper saves or the importer uploads is recorded with its UG tab
+id, content hash and the time it was last fetched. `sync` diffs a fresh URL
+list (or the HTML exports themselves) against the manifest and writes out
+only the URLs that are new or haven't been fetched within the TTL, so a
+nightly run only touches what changed:
+
+    python sync_manifest.py sync ~/Downloads/exports/ --ttl 7d -o pending_urls.txt
+    python import_automated.py --urls-file pending_urls.txt
+"""
+
+import argparse
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from extract_tab_urls import canonicalize, iter_unique_urls
+from song_ids import tab_id_from_url
+
+
+DEFAULT_MANIFEST = Path(__file__).parent / "sync_manifest.db"
+
+TTL_RE = re.compile(r'^(\d+(?:\.\d+)?)([smhd]?)$')
+TTL_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_ttl(value):
+    """Parse '3600', '90m', '12h' or '7d' into seconds."""
+    match = TTL_RE.match(value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid TTL '{value}' (use e.g. 3600, 90m, 12h, 7d)")
+    return float(match.group(1)) * TTL_UNITS[match.group(2)]
+
+
+class SyncManifest:
+    def __init__(self, path=None, commit_every=50):
+        """
+        Open (or create) the manifest database.
+
+        Args:
+            path: SQLite file (default: sync_manifest.db next to this script)
+            commit_every: Records written between commits
+        """
+        self.path = Path(path) if path else DEFAULT_MANIFEST
+        self.commit_every = commit_every
+        self._pending = 0
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS manifest (
+                url TEXT PRIMARY KEY,
+                tab_id TEXT,
+                content_hash TEXT,
+                last_fetched REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def record(self, url, content_hash):
+        """Mark `url` as fetched now with the given content hash."""
+        url = canonicalize(url)
+        self.db.execute(
+            "INSERT OR REPLACE INTO manifest (url, tab_id, content_hash, last_fetched) VALUES (?, ?, ?, ?)",
+            (url, tab_id_from_url(url), content_hash, time.time())
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def get(self, url):
+        """The manifest entry for `url` as a dict, or None."""
+        row = self.db.execute(
+            "SELECT url, tab_id, content_hash, last_fetched FROM manifest WHERE url = ?", (canonicalize(url),)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('url', 'tab_id', 'content_hash', 'last_fetched'), row))
+
+    def diff(self, urls, ttl=None):
+        """
+        Split `urls` into new, stale and fresh lists.
+
+        A URL is stale when it was last fetched more than `ttl` seconds ago;
+        with `ttl=None` nothing already in the manifest is ever stale.
+        """
+        cutoff = time.time() - ttl if ttl is not None else None
+        new, stale, fresh = [], [], []
+        for url in urls:
+            row = self.db.execute(
+                "SELECT last_fetched FROM manifest WHERE url = ?", (canonicalize(url),)
+            ).fetchone()
+            if row is None:
+                new.append(url)
+            elif cutoff is not None and row[0] < cutoff:
+                stale.append(url)
+            else:
+                fresh.append(url)
+        return new, stale, fresh
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM manifest").fetchone()[0]
+
+    def commit(self):
+        self.db.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+
+def read_urls(args):
+    """URLs to sync: from --urls-file, or extracted from the given exports."""
+    if args.urls_file:
+        with open(args.urls_file, 'r') as f:
+            return [line.strip() for line in f if line.strip()]
+    return list(iter_unique_urls(args.exports))
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Incremental sync against the processed-tabs manifest")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help="Manifest database")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sync_cmd = commands.add_parser('sync', help="Write out only the URLs that are new or stale")
+    sync_cmd.add_argument('exports', nargs='*', help="Saved HTML exports (files or directories)")
+    sync_cmd.add_argument('--urls-file', help="Use a URL list instead of HTML exports")
+    sync_cmd.add_argument('--ttl', type=parse_ttl, default=parse_ttl('7d'),
+                          help="Re-fetch tabs last fetched longer ago than this (e.g. 12h, 7d)")
+    sync_cmd.add_argument('--no-ttl', action='store_true',
+                          help="Only schedule new URLs, never re-fetch known ones")
+    sync_cmd.add_argument('-o', '--output', default=Path.cwd() / "pending_urls.txt",
+                          help="File to write the URLs to process")
+
+    commands.add_parser('stats', help="Show how many tabs the manifest knows")
+
+    args = parser.parse_args()
+    manifest = SyncManifest(args.manifest)
+    try:
+        if args.command == 'stats':
+            print(f"📒 {len(manifest)} tabs in {manifest.path}")
+            return
+
+        if not args.exports and not args.urls_file:
+            parser.error("sync needs HTML exports or --urls-file")
+
+        urls = read_urls(args)
+        new, stale, fresh = manifest.diff(urls, None if args.no_ttl else args.ttl)
+        pending = new + stale
+
+        with open(args.output, 'w') as f:
+            for url in pending:
+                f.write(url + '\n')
+
+        print(f"🔍 {len(urls)} URLs: {len(new)} new, {len(stale)} stale, {len(fresh)} up to date")
+        print(f"📝 {len(pending)} URLs to process written to: {args.output}")
+    finally:
+        manifest.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Single-pass HTML field extractor for Ultimate Guitar tab pages.
+
+Every scraper needs the same handful of things from a page: the <h1>, the
+first artist link, the first <code>/<pre>, the known tab content containers
+and (as a last resort) a large text block. Instead of building a
+BeautifulSoup tree and running a separate find/select for each, the page is
+parsed once with the fastest available backend and walked once, collecting
+the first match for every field along the way.
+
+Backends, fastest first:
+    selectolax  pip install selectolax   (optional, lexbor engine)
+    lxml        already in requirements_scraper.txt
+    bs4         BeautifulSoup with html.parser, always available as a fallback
+"""
+
+import functools
+import re
+
+
+# Containers that have held tab content on Ultimate Guitar, in priority order
+CONTENT_SELECTORS = [
+    '.js-tab-content',
+    '[data-content]',
+    '.tab-content',
+    '.chord-content',
+    '.tab_text_content',
+]
+
+_SELECTOR_CLASSES = {
+    sel[1:]: sel for sel in CONTENT_SELECTORS if sel.startswith('.')
+}
+
+CHORD_TEXT_RE = re.compile(r'[A-G]m?[\d#b]*')
+TEXT_BLOCK_TAGS = {'div', 'span', 'p'}
+TEXT_BLOCK_MIN_LENGTH = 200  # Reasonable size for tab content
+NON_TEXT_TAGS = {'script', 'style', 'template'}  # Their strings are code, not page text
+
+BACKENDS = ['selectolax', 'lxml', 'bs4']
+
+
+def _new_fields():
+    return {
+        'h1': None,
+        'artist_link': None,
+        'code': None,
+        'pre': None,
+        'selectors': {},
+        'text_block': None,
+        'text_length': 0,
+    }
+
+
+def _visit(fields, tag, attrs, node, text_of, own_text_of):
+    """
+    Record a single element into `fields` if it is the first match for any field.
+
+    `text_of(node)` returns the element's full text (only called on a match),
+    and `own_text_of(node)` its text when it has no child elements, else None.
+    """
+    if tag == 'h1':
+        if fields['h1'] is None:
+            fields['h1'] = text_of(node)
+    elif tag == 'code':
+        if fields['code'] is None:
+            fields['code'] = text_of(node)
+    elif tag == 'pre':
+        if fields['pre'] is None:
+            fields['pre'] = text_of(node)
+    elif tag == 'a':
+        if fields['artist_link'] is None and '/artist/' in (attrs.get('href') or ''):
+            fields['artist_link'] = text_of(node)
+
+    selectors = fields['selectors']
+    if 'data-content' in attrs and '[data-content]' not in selectors:
+        selectors['[data-content]'] = text_of(node)
+    class_attr = attrs.get('class')
+    if class_attr:
+        for cls in class_attr.split():
+            selector = _SELECTOR_CLASSES.get(cls)
+            if selector and selector not in selectors:
+                selectors[selector] = text_of(node)
+
+    if fields['text_block'] is None and tag in TEXT_BLOCK_TAGS:
+        text = own_text_of(node)
+        if text and len(text) > TEXT_BLOCK_MIN_LENGTH and CHORD_TEXT_RE.search(text):
+            fields['text_block'] = text
+
+
+def _text_length(strings):
+    """
+    Length of the page text with whitespace runs collapsed to one space.
+
+    The parsers disagree on whitespace-only strings (bs4's html.parser drops
+    indentation lxml and selectolax keep), so raw lengths differ by backend.
+    """
+    return len(' '.join(''.join(strings).split()))
+
+
+def _selectolax_text(node):
+    return node.text(deep=True)
+
+
+def _selectolax_own_text(node):
+    child = node.child
+    if child is None or child.tag != '-text' or child.next is not None:
+        return None
+    return child.text(deep=False)
+
+
+def _extract_selectolax(html):
+    from selectolax.lexbor import LexborHTMLParser
+
+    fields = _new_fields()
+    tree = LexborHTMLParser(html)
+    root = tree.root
+    if root is None:
+        return fields
+
+    strings = []
+    for node in root.traverse(include_text=True):
+        tag = node.tag
+        if tag == '-text':
+            if node.parent.tag not in NON_TEXT_TAGS:
+                strings.append(node.text(deep=False))
+            continue
+        if not tag or tag[0] in '-_':
+            continue  # Comment and doctype nodes
+        _visit(fields, tag, node.attributes, node, _selectolax_text, _selectolax_own_text)
+
+    fields['text_length'] = _text_length(strings)
+    return fields
+
+
+def _lxml_text(el):
+    return ''.join(el.itertext())
+
+
+def _lxml_own_text(el):
+    return el.text if len(el) == 0 else None
+
+
+def _extract_lxml(html):
+    import lxml.etree
+    import lxml.html
+
+    fields = _new_fields()
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    if not html.strip():
+        return fields
+    root = lxml.html.fromstring(html)
+
+    strings = []
+    # Comments and processing instructions get a single event of their own
+    for event, el in lxml.etree.iterwalk(root, events=('start', 'end', 'comment', 'pi')):
+        if event == 'start':
+            if el.text and el.tag not in NON_TEXT_TAGS:
+                strings.append(el.text)
+            _visit(fields, el.tag, el.attrib, el, _lxml_text, _lxml_own_text)
+        elif el.tail:
+            strings.append(el.tail)  # Text after the element, in document order
+
+    fields['text_length'] = _text_length(strings)
+    return fields
+
+
+def _bs4_text(node):
+    return node.get_text()
+
+
+def _bs4_own_text(node):
+    from bs4 import NavigableString
+
+    return node.string if isinstance(node.string, NavigableString) else None
+
+
+def _extract_bs4(html):
+    from bs4 import BeautifulSoup, NavigableString, Tag
+
+    fields = _new_fields()
+    soup = BeautifulSoup(html, 'html.parser')
+
+    strings = []
+    for node in soup.descendants:
+        if isinstance(node, NavigableString):
+            # Subclasses are comments, doctypes and the like
+            if type(node) is NavigableString and node.parent.name not in NON_TEXT_TAGS:
+                strings.append(node)
+            continue
+        if not isinstance(node, Tag):
+            continue
+
+        attrs = node.attrs
+        if isinstance(attrs.get('class'), list):
+            attrs = dict(attrs, **{'class': ' '.join(attrs['class'])})
+        _visit(fields, node.name, attrs, node, _bs4_text, _bs4_own_text)
+
+    fields['text_length'] = _text_length(strings)
+    return fields
+
+
+_EXTRACTORS = {
+    'selectolax': _extract_selectolax,
+    'lxml': _extract_lxml,
+    'bs4': _extract_bs4,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def available_backends():
+    """Backends whose parser library is importable, fastest first."""
+    available = ()
+    for name, module in [('selectolax', 'selectolax.lexbor'), ('lxml', 'lxml.html'), ('bs4', 'bs4')]:
+        try:
+            __import__(module)
+            available += (name,)
+        except ImportError:
+            pass
+    return available
+
+
+def resolve_backend(backend=None):
+    """Turn 'auto'/None into the fastest installed backend name."""
+    if backend in (None, 'auto'):
+        available = available_backends()
+        if not available:
+            raise ImportError("No HTML parser installed (need selectolax, lxml or beautifulsoup4)")
+        return available[0]
+    if backend not in _EXTRACTORS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    return backend
+
+
+def extract_page_fields(html, backend=None):
+    """
+    Parse a tab page once and return every field the scrapers look at.
+
+    Returns a dict with the text of the first <h1>, first /artist/ link,
+    first <code> and first <pre> (None when absent), `selectors` mapping each
+    of CONTENT_SELECTORS to the text of its first match, the first large
+    chord-looking `text_block`, and `text_length`: the length of the page's
+    text outside scripts and styles, whitespace collapsed, the same for every
+    backend.
+    """
+    return _EXTRACTORS[resolve_backend(backend)](html)
+
+
+def add_parser_arguments(parser):
+    """Add the shared --parser option to an argparse parser."""
+    parser.add_argument('--parser', dest='parser_backend', default='auto',
+                        choices=['auto'] + BACKENDS,
+                        help="HTML parser backend (default: fastest installed)")
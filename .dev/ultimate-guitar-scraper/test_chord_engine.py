@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Parity tests for chord_engine.py.
+
+The cases mirror src/services/parser.test.js (plus the key cases of
+transposer.test.js and chords.test.js), so the Python port is held to the
+same fixtures as the app's parser. Run with:
+
+    python -m unittest test_chord_engine    (or: python -m pytest test_chord_engine.py)
+"""
+
+import json
+import unittest
+
+from chord_engine import (
+    PARSED_VERSION,
+    decode_parsed,
+    encode_parsed,
+    extract_metadata,
+    format_to_ug_text,
+    get_semitone_difference,
+    get_transposed_key,
+    key_uses_flats,
+    parse_chord,
+    parse_ug_format,
+    transpose_chord,
+    transpose_encoded,
+    transpose_parsed_song,
+    transpose_song,
+    transpose_song_to_key,
+    transpose_songs,
+)
+
+
+SONG = """[Verse 1]
+C       G       Am      F
+This is a line of lyrics
+
+[Chorus]
+F       G       C
+Chorus lyrics here"""
+
+
+def chord_line(*chords, lyrics='Test lyrics'):
+    return {
+        'type': 'chord-line',
+        'chords': [{'chord': chord, 'position': position} for chord, position in chords],
+        'lyrics': lyrics,
+    }
+
+
+class ParseUGFormatTest(unittest.TestCase):
+    def test_section_markers(self):
+        result = parse_ug_format('[Verse 1]\n[Chorus]\n[Bridge]')
+        self.assertEqual(result, [
+            {'type': 'section', 'content': '[Verse 1]'},
+            {'type': 'section', 'content': '[Chorus]'},
+            {'type': 'section', 'content': '[Bridge]'},
+        ])
+
+    def test_chord_lyric_pairs(self):
+        result = parse_ug_format('C       G       Am      F\nThis is a line of lyrics')
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['type'], 'chord-line')
+        self.assertEqual(result[0]['lyrics'], 'This is a line of lyrics')
+        self.assertEqual([c['chord'] for c in result[0]['chords']], ['C', 'G', 'Am', 'F'])
+
+    def test_complete_song_structure(self):
+        result = parse_ug_format(SONG)
+        self.assertEqual([line['type'] for line in result],
+                         ['section', 'chord-line', 'empty', 'section', 'chord-line'])
+
+    def test_empty_lines(self):
+        result = parse_ug_format('C       G\nLyrics\n\nD       A\nMore lyrics')
+        self.assertIn({'type': 'empty', 'content': ''}, result)
+
+    def test_lyrics_without_chords(self):
+        result = parse_ug_format('[Verse 1]\nJust some lyrics without chords above')
+        self.assertEqual(result[1], {'type': 'lyric', 'content': 'Just some lyrics without chords above'})
+
+    def test_complex_chords(self):
+        result = parse_ug_format('Cmaj7   Gsus4   Am11    Fmaj7\nComplex chord line')
+        self.assertEqual([c['chord'] for c in result[0]['chords']], ['Cmaj7', 'Gsus4', 'Am11', 'Fmaj7'])
+
+    def test_slash_chords(self):
+        result = parse_ug_format('C/G     Am/E    F/C\nSlash chord line')
+        self.assertEqual([c['chord'] for c in result[0]['chords']], ['C/G', 'Am/E', 'F/C'])
+
+    def test_chord_positions(self):
+        result = parse_ug_format('C               G\nWord1 word2 word3')
+        self.assertEqual([c['position'] for c in result[0]['chords']], [0, 16])
+
+    def test_empty_input(self):
+        self.assertEqual(parse_ug_format(''), [])
+        self.assertEqual(parse_ug_format(None), [])
+
+    def test_chord_lines_and_lyrics(self):
+        text = 'This line has some words that look like chords: Am I going to be parsed wrong?'
+        self.assertEqual(parse_ug_format(text)[0]['type'], 'lyric')
+
+    def test_trailing_chord_line_is_dropped(self):
+        self.assertEqual(parse_ug_format('Lyrics\nC  G'), [{'type': 'lyric', 'content': 'Lyrics'}])
+
+    def test_javascript_whitespace_and_lengths(self):
+        # NBSP is whitespace to String.trim(), U+0085 is not
+        self.assertEqual(parse_ug_format('\xa0\xa0')[0]['type'], 'empty')
+        self.assertEqual(parse_ug_format('\x85')[0]['type'], 'lyric')
+        # Positions count UTF-16 code units, as String.prototype.length does
+        result = parse_ug_format('\U0001F3B8 C G\nlyrics')
+        self.assertEqual([c['position'] for c in result[0]['chords']], [3, 5])
+
+
+class TransposeParsedSongTest(unittest.TestCase):
+    def test_transposes_all_chords(self):
+        result = transpose_parsed_song([chord_line(('C', 0), ('G', 8))], 2, 'C')
+        self.assertEqual(result, [chord_line(('D', 0), ('A', 8))])
+
+    def test_flats_for_flat_keys(self):
+        result = transpose_parsed_song([chord_line(('C', 0))], 1, 'Bb')
+        self.assertEqual(result[0]['chords'][0]['chord'], 'Db')
+
+    def test_non_chord_lines_unchanged(self):
+        parsed = [
+            {'type': 'section', 'content': '[Verse 1]'},
+            {'type': 'lyric', 'content': 'Just lyrics'},
+            {'type': 'empty', 'content': ''},
+        ]
+        self.assertEqual(transpose_parsed_song(parsed, 2, 'C'), parsed)
+
+    def test_input_is_not_modified(self):
+        parsed = [chord_line(('C', 0))]
+        transpose_parsed_song(parsed, 2)
+        self.assertEqual(parsed, [chord_line(('C', 0))])
+
+
+class FormatToUGTextTest(unittest.TestCase):
+    def test_chord_lyric_pairs(self):
+        result = format_to_ug_text([chord_line(('C', 0), ('G', 8))])
+        self.assertEqual(result, 'C       G\nTest lyrics')
+
+    def test_section_markers(self):
+        self.assertEqual(format_to_ug_text([{'type': 'section', 'content': '[Verse 1]'}]), '[Verse 1]')
+
+    def test_empty_lines(self):
+        self.assertEqual(format_to_ug_text([{'type': 'empty', 'content': ''}]), '')
+
+    def test_overlapping_chords_keep_one_space(self):
+        self.assertEqual(format_to_ug_text([chord_line(('Cmaj7', 0), ('G', 3))]), 'Cmaj7 G\nTest lyrics')
+
+    def test_round_trip(self):
+        parsed = parse_ug_format(SONG)
+        self.assertEqual(parse_ug_format(format_to_ug_text(parsed)), parsed)
+
+
+class ExtractMetadataTest(unittest.TestCase):
+    def test_title_artist_key(self):
+        metadata = extract_metadata('Title: Test Song\nArtist: Test Artist\nKey: C')
+        self.assertEqual(metadata, {'title': 'Test Song', 'artist': 'Test Artist', 'key': 'C'})
+
+    def test_case_insensitive_labels(self):
+        metadata = extract_metadata('title: Test Song\nartist: Test Artist\nkey: G')
+        self.assertEqual(metadata, {'title': 'Test Song', 'artist': 'Test Artist', 'key': 'G'})
+
+    def test_missing_metadata(self):
+        metadata = extract_metadata('[Verse 1]\nC       G\nLyrics')
+        self.assertEqual(metadata, {'title': None, 'artist': None, 'key': None})
+
+    def test_partial_metadata(self):
+        metadata = extract_metadata('Title: Test Song\n[Verse 1]\nC       G')
+        self.assertEqual(metadata, {'title': 'Test Song', 'artist': None, 'key': None})
+
+    def test_trims_values(self):
+        metadata = extract_metadata('Title:   Test Song  \nArtist:  Test Artist  ')
+        self.assertEqual((metadata['title'], metadata['artist']), ('Test Song', 'Test Artist'))
+
+    def test_only_ascii_labels_fold_case(self):
+        # JavaScript's /i (without /u) doesn't fold U+017F LONG S to 's'
+        self.assertIsNone(extract_metadata('Artiſt: Someone')['artist'])
+
+
+class ChordTest(unittest.TestCase):
+    def test_transpose_chord(self):
+        self.assertEqual(transpose_chord('C', 2), 'D')
+        self.assertEqual(transpose_chord('C', -1), 'B')
+        self.assertEqual(transpose_chord('C', 1, True), 'Db')
+        self.assertEqual(transpose_chord('Db', 1), 'D')
+        self.assertEqual(transpose_chord('F#m7', 13), 'Gm7')
+        self.assertEqual(transpose_chord('C/G', 2), 'D/G')  # The bass note is left alone, as in the app
+
+    def test_unknown_chords_unchanged(self):
+        for chord in ('', '   ', 'H', 'Cb', 'x'):
+            self.assertEqual(transpose_chord(chord, 3), chord)
+
+    def test_parse_chord(self):
+        self.assertEqual(parse_chord('Bbmaj7'), ('Bb', 'maj7'))
+        self.assertIsNone(parse_chord('Hm'))
+
+    def test_key_uses_flats(self):
+        self.assertTrue(key_uses_flats('Bb'))
+        self.assertTrue(key_uses_flats('Dm'))
+        self.assertFalse(key_uses_flats('G'))
+        self.assertFalse(key_uses_flats('Am'))
+
+    def test_semitone_difference(self):
+        self.assertEqual(get_semitone_difference('C', 'D'), 2)
+        self.assertEqual(get_semitone_difference('G', 'C'), 5)
+        self.assertEqual(get_semitone_difference('Bb', 'C#'), 3)
+        self.assertEqual(get_semitone_difference('C', 'H'), 0)
+
+
+class TransposerTest(unittest.TestCase):
+    def test_transpose_song(self):
+        result = transpose_song('C       G       Am      F\nThis is a line of lyrics', 2)
+        self.assertEqual(result, 'D       A       Bm      G\nThis is a line of lyrics')
+
+    def test_flats_and_sharps(self):
+        self.assertEqual(transpose_song('C  F  G\nx', 1, 'F'), 'Db Gb Ab\nx')
+        self.assertEqual(transpose_song('C  F  G\nx', 1, 'D'), 'C# F# G#\nx')
+
+    def test_full_octave_and_empty(self):
+        self.assertEqual(transpose_song(SONG, 12), SONG)
+        self.assertEqual(transpose_song('', 3), '')
+
+    def test_transpose_song_to_key(self):
+        self.assertEqual(transpose_song_to_key('C  F  G\nx', 'C', 'Bb'), 'Bb Eb F\nx')
+        self.assertEqual(transpose_song_to_key('G  C  D\nx', 'G', 'C'), 'C  F  G\nx')
+
+    def test_transposed_key(self):
+        self.assertEqual(get_transposed_key('C', -2), 'A#')
+        self.assertEqual(get_transposed_key('F', 1), 'Gb')
+        self.assertEqual(get_transposed_key('Em', 2), 'F#m')
+        self.assertEqual(get_transposed_key('Dm', -2), 'Cm')
+        self.assertEqual(get_transposed_key('Am', 12), 'Am')
+        self.assertIsNone(get_transposed_key(None, 2))
+        self.assertIsNone(get_transposed_key('', 2))
+
+    def test_batch(self):
+        songs = ['C  G\nx', 'Am  F\ny']
+        self.assertEqual(list(transpose_songs(songs, 2)), ['D  A\nx', 'Bm  G\ny'])
+        jobs = [('C  G\nx', 1, 'F'), ('C  G\nx', 1, None)]
+        self.assertEqual(list(transpose_songs(jobs, 0)), ['Db Ab\nx', 'C# G#\nx'])
+
+
+class EncodedParsedTest(unittest.TestCase):
+    def test_compact_form(self):
+        encoded = encode_parsed('[Verse 1]\nC   G   C\nLyrics\n\nPlain')
+        self.assertEqual(encoded, {'v': PARSED_VERSION, 't': 'scel', 'c': ['C', 'G'], 'p': [[0, 0, 1, 4, 0, 8]]})
+
+    def test_round_trip(self):
+        for text in (SONG, '', 'Lyrics\nC  G', '\U0001F3B8 C G\nlyrics', ' [Intro] \n\xa0'):
+            encoded = json.loads(json.dumps(encode_parsed(text)))
+            self.assertEqual(decode_parsed(encoded, text), parse_ug_format(text))
+
+    def test_transpose(self):
+        encoded = transpose_encoded(encode_parsed(SONG), 1, 'F')
+        self.assertEqual(decode_parsed(encoded, SONG), transpose_parsed_song(parse_ug_format(SONG), 1, 'F'))
+
+    def test_mismatched_content(self):
+        encoded = encode_parsed(SONG)
+        self.assertIsNone(decode_parsed(encoded, SONG + '\nAnother line'))
+        self.assertIsNone(decode_parsed(encoded, '[Verse 1]'))
+        self.assertIsNone(decode_parsed({**encoded, 'v': PARSED_VERSION + 1}, SONG))
+        self.assertIsNone(decode_parsed(None, SONG))
+
+
+if __name__ == '__main__':
+    unittest.main()
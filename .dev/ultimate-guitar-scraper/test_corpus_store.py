@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for corpus_store.py. Run with:
+
+    python -m unittest test_corpus_store    (or: python -m pytest test_corpus_store.py)
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from corpus_store import CorpusStore
+
+
+def tab(url, content, title='Song', artist='Artist'):
+    return {'url': url, 'content': content, 'title': title, 'artist': artist, 'tab_type': 'chords',
+            'key': 'G', 'tuning': None, 'capo': 2, 'content_source': 'store', 'success': True}
+
+
+class CorpusStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.store = CorpusStore(self.dir, compression='zlib')
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_put_get_round_trip(self):
+        url = 'https://tabs.ultimate-guitar.com/tab/artist/song-chords-1001'
+        digest = self.store.put(tab(url, 'G  D\nLyrics ünïcode'))
+
+        stored = self.store.get(url)
+        self.assertEqual(stored['content_hash'], digest)
+        self.assertEqual(stored['content'], 'G  D\nLyrics ünïcode')
+        self.assertEqual((stored['title'], stored['key'], stored['capo']), ('Song', 'G', 2))
+        self.assertIsNone(self.store.get(url + '0'))
+
+    def test_same_content_stored_once(self):
+        first = self.store.put(tab('https://tabs.ultimate-guitar.com/tab/a/song-chords-1', 'C G'))
+        second = self.store.put(tab('https://tabs.ultimate-guitar.com/tab/b/song-chords-2', 'C G'))
+        self.assertEqual(first, second)
+
+        stats = self.store.stats()
+        self.assertEqual((stats['tabs'], stats['unique_contents']), (2, 1))
+
+    def test_changed_content_drops_unused_blob(self):
+        urls = [f'https://tabs.ultimate-guitar.com/tab/a/song-chords-{i}' for i in range(3)]
+        self.store.put(tab(urls[0], 'C G\nold'))
+        self.store.put(tab(urls[1], 'Am F\nshared'))
+        self.store.put(tab(urls[2], 'Am F\nshared'))
+
+        self.store.put(tab(urls[0], 'C G\nnew'))
+        self.store.put(tab(urls[1], 'Am F\nnewer'))
+
+        # The old content of tab 0 went; tab 2 still uses the old content of tab 1
+        self.assertEqual(self.store.stats()['unique_contents'], 3)
+        self.assertEqual(self.store.get(urls[2])['content'], 'Am F\nshared')
+
+    def test_rejects_blank_content(self):
+        with self.assertRaises(ValueError):
+            self.store.put(tab('https://tabs.ultimate-guitar.com/tab/a/song-chords-1', ' \n\n'))
+        self.assertEqual(len(self.store), 0)
+
+    def test_export_round_trip(self):
+        self.store.put(tab('https://tabs.ultimate-guitar.com/tab/a/song-chords-1', 'C G\nfirst'))
+        self.store.put(tab('https://tabs.ultimate-guitar.com/tab/b/song-chords-2', 'Am F\nsecond'))
+        self.store.commit()
+
+        reopened = CorpusStore(self.dir / 'corpus.db')
+        try:
+            out = self.dir / 'exported'
+            self.assertEqual(reopened.export(out), 2)
+        finally:
+            reopened.close()
+
+        # Same artist and title: the second file is told apart by its tab id, not overwritten
+        files = sorted(out.glob('*.txt'))
+        self.assertEqual([f.name for f in files],
+                         ['Artist - Song - chords (2).txt', 'Artist - Song - chords.txt'])
+        contents = sorted(f.read_text(encoding='utf-8').split('=' * 50 + '\n\n', 1)[1] for f in files)
+        self.assertEqual(contents, ['Am F\nsecond', 'C G\nfirst'])
+
+
+if __name__ == '__main__':
+    unittest.main()
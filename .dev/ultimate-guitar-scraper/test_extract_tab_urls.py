@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for extract_tab_urls.py. Run with:
+
+    python -m unittest test_extract_tab_urls    (or: python -m pytest test_extract_tab_urls.py)
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import extract_tab_urls
+from extract_tab_urls import URL_PATTERN, iter_file_urls, iter_unique_urls
+
+
+TAB = 'https://tabs.ultimate-guitar.com/tab/billy-joel/vienna-chords-{}'
+
+
+class IterFileUrlsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, text, name='export.html'):
+        path = Path(self.tmp.name) / name
+        path.write_bytes(text.encode('utf-8'))
+        return path
+
+    def assert_matches_findall(self, path, chunk_sizes):
+        expected = [url.decode('utf-8') for url in URL_PATTERN.findall(path.read_bytes())]
+        for chunk_size in chunk_sizes:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_file_urls(path, chunk_size=chunk_size)), expected)
+        return expected
+
+    def test_urls_straddling_chunk_boundaries(self):
+        links = ''.join(f'<a href="{TAB.format(i)}?from=export">Vienna {i}</a>\n' for i in range(40))
+        path = self.write(f'<html><body>{links}</body></html>')
+        # Every chunk size puts some URLs across a boundary
+        expected = self.assert_matches_findall(path, [7, 50, 97, 128, 1000, 1 << 20])
+        self.assertEqual(len(expected), 40)
+
+    def test_match_cut_off_by_the_scan_window(self):
+        long_url = TAB.format('1' * 200)
+        path = self.write(f'<a href="{TAB.format(1)}">x</a> <a href="{long_url}">y</a> <a href="{TAB.format(2)}">z</a>')
+        # A window of boundary + 64 bytes ends inside the long URL, which must still come out whole
+        with mock.patch.object(extract_tab_urls, 'CHUNK_OVERLAP', 64):
+            expected = self.assert_matches_findall(path, [50, 60, 100])
+        self.assertIn(long_url, expected)
+
+    def test_empty_file(self):
+        path = self.write('')
+        self.assertEqual(list(iter_file_urls(path, chunk_size=16)), [])
+
+    def test_unique_canonical_urls_across_files(self):
+        first = self.write(f'"{TAB.format(1)}?x=1" "{TAB.format(2)}/"', 'a.html')
+        self.write(f'"{TAB.format(2)}#top" &quot;{TAB.format(3)}&quot;', 'b.html')
+        self.assertEqual(list(iter_unique_urls([first, Path(self.tmp.name)])),
+                         [TAB.format(1), TAB.format(2), TAB.format(3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,26 @@
 #!/usr/bin/env python3
 """
 Quick test of the automation - just extracts from 3 tabs to verify it works
+
+A manual check against the live site (it opens a browser window), run as a
+script; it has no test_ functions, so pytest doesn't collect it:
+
+    python test_extraction.py [--no-block]
 """
 
 import asyncio
 import json
 import time
-import re
+import sys
 from pathlib import Path
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+from page_extract import CONTENT_SELECTOR, extract_in_page, extract_legacy, timed
 
+from request_filter import RequestFilter, format_page_stats
 
-async def test_extraction():
+
+async def run_extraction(block_resources=True):
     """Test extracting from just 3 tabs."""
     
     # Test URLs
@@ -22,12 +31,17 @@ async def test_extraction():
     ]
     
     print("🎵 Testing Ultimate Guitar Extraction")
-    print(f"📚 Testing with {len(urls)} tabs\n")
+    print(f"📚 Testing with {len(urls)} tabs")
+    print(f"🧹 Blocking images/fonts/ads/trackers: {'yes' if block_resources else 'no'}\n")
+    
+    request_filter = RequestFilter() if block_resources else None
     
     async with async_playwright() as p:
         print("🌐 Launching browser...")
         browser = await p.chromium.launch(headless=False)
         context = await browser.new_context()
+        if request_filter:
+            await request_filter.install(context)
         page = await context.new_page()
         
         results = []
@@ -35,37 +49,49 @@ async def test_extraction():
         for i, url in enumerate(urls, 1):
             print(f"\n[{i}/{len(urls)}] Testing: {url}")
             
+            if request_filter:
+                request_filter.start_page(page, url)
+            
             try:
                 # Navigate
+                load_start = time.perf_counter()
                 await page.goto(url, wait_until='networkidle', timeout=30000)
-                await page.wait_for_timeout(2000)
+                load_time = time.perf_counter() - load_start
+                print(f"   Loaded in {load_time:.2f}s")
                 
-                # Extract title/artist
-                h1_elem = await page.query_selector('h1')
-                h1_text = ""
-                if h1_elem:
-                    h1_text = await h1_elem.inner_text()
-                    print(f"   Title found: {h1_text}")
+                # Wait for the tab content instead of a fixed delay
+                try:
+                    await page.wait_for_selector(CONTENT_SELECTOR, timeout=15000)
+                except PlaywrightTimeoutError:
+                    print("   ⚠️  Content did not render within 15s")
+                
+                # Same page read both ways: element handles vs one page.evaluate
+                legacy, legacy_time = await timed(extract_legacy(page, url))
+                data, extract_time = await timed(extract_in_page(page))
+                print(f"   Extraction: {legacy_time * 1000:.1f} ms handle-by-handle, "
+                      f"{extract_time * 1000:.1f} ms single round trip")
+                if legacy != data:
+                    print("   ⚠️  Extractors disagree!")
                 
-                # Extract content
-                code_elem = await page.query_selector('code')
-                content_length = 0
-                if code_elem:
-                    content = await code_elem.inner_text()
-                    content_length = len(content.strip())
-                    print(f"   Content found: {content_length} characters")
+                h1_text = f"{data['title']} by {data['artist']}"
+                content_length = len(data['content'])
+                if content_length:
+                    print(f"   Title found: {h1_text}")
+                    print(f"   Content found: {content_length} characters (from <{data['contentSource']}>)")
                     
                     # Show first 200 chars
-                    if content_length > 0:
-                        preview = content.strip()[:200]
-                        print(f"   Preview: {preview}...")
+                    preview = data['content'][:200]
+                    print(f"   Preview: {preview}...")
                 else:
-                    print(f"   ⚠️  No content found in <code> tag")
+                    print(f"   ⚠️  No content found in <code> or <pre>")
                 
                 results.append({
                     'url': url,
                     'title': h1_text,
                     'content_length': content_length,
+                    'load_time': load_time,
+                    'legacy_extract_time': legacy_time,
+                    'extract_time': extract_time,
                     'success': content_length > 50
                 })
                 
@@ -77,6 +103,10 @@ async def test_extraction():
                     'error': str(e)
                 })
             
+            if request_filter:
+                page_stats = request_filter.finish_page(page)
+                print(f"   Network: {format_page_stats(page_stats)}")
+            
             await page.wait_for_timeout(1000)
         
         await browser.close()
@@ -89,6 +119,19 @@ async def test_extraction():
         print(f"Total: {len(results)}")
         print(f"✅ Successful extractions: {successful}")
         print(f"❌ Failed: {len(results) - successful}")
+        load_times = [r['load_time'] for r in results if 'load_time' in r]
+        if load_times:
+            print(f"⏱️  Average load time: {sum(load_times) / len(load_times):.2f}s")
+        extract_results = [r for r in results if 'extract_time' in r]
+        if extract_results:
+            legacy_ms = sum(r['legacy_extract_time'] for r in extract_results) / len(extract_results) * 1000
+            single_ms = sum(r['extract_time'] for r in extract_results) / len(extract_results) * 1000
+            print(f"⏱️  Extraction: {legacy_ms:.1f} ms -> {single_ms:.1f} ms per page "
+                  f"({legacy_ms - single_ms:.1f} ms saved)")
+        if request_filter:
+            network = request_filter.summary()
+            print(f"🧹 Requests: {network['requests']} ({network['blocked']} blocked), "
+                  f"avg {network['avg_bytes_per_page'] / 1024:.0f} KB/page")
         print("="*60)
         
         if successful == len(results):
@@ -101,7 +144,8 @@ async def test_extraction():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_extraction())
+    # Pass --no-block to load every resource and compare load times
+    asyncio.run(run_extraction(block_resources='--no-block' not in sys.argv))
 
 
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for http_cache.py. Run with:
+
+    python -m unittest test_http_cache    (or: python -m pytest test_http_cache.py)
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from http_cache import CacheMiss, ResponseCache, cached_get
+
+
+URL = 'https://tabs.ultimate-guitar.com/tab/artist/song-chords-{}'
+
+
+class NoNetwork:
+    """A requests.Session stand-in that fails the test if it is used."""
+
+    def get(self, *args, **kwargs):
+        raise AssertionError("cache went to the network")
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cache(self, **options):
+        cache = ResponseCache(self.tmp.name, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def objects(self):
+        return [name for _, _, names in os.walk(os.path.join(self.tmp.name, 'objects')) for name in names]
+
+    def test_put_get(self):
+        cache = self.cache()
+        cache.put(URL.format(1), 'Chörds', etag='"v1"')
+        cached = cache.get(URL.format(1))
+        self.assertEqual((cached.body, cached.text, cached.etag), ('Chörds'.encode('utf-8'), 'Chörds', '"v1"'))
+        self.assertEqual(cache.conditional_headers(cached), {'If-None-Match': '"v1"'})
+        self.assertIsNone(cache.get(URL.format(2)))
+
+    def test_lru_eviction(self):
+        # Random bodies don't compress, so each takes a little over 1000 bytes on disk
+        bodies = [os.urandom(1000) for _ in range(3)]
+        cache = self.cache(max_bytes=2500)
+        cache.put(URL.format(0), bodies[0])
+        time.sleep(0.01)
+        cache.put(URL.format(1), bodies[1])
+        time.sleep(0.01)
+        cache.get(URL.format(0))  # Now 1 is the least recently used
+        time.sleep(0.01)
+        cache.put(URL.format(2), bodies[2])
+
+        self.assertIsNone(cache.get(URL.format(1)))
+        self.assertEqual(cache.get(URL.format(0)).body, bodies[0])
+        self.assertEqual(cache.get(URL.format(2)).body, bodies[2])
+        self.assertEqual(cache.stats['evicted'], 1)
+        self.assertEqual(len(self.objects()), 2)
+        self.assertLessEqual(cache.total_size(), 2500)
+
+    def test_shared_digest_bodies(self):
+        shared, other = os.urandom(1000), os.urandom(1000)
+        cache = self.cache(max_bytes=2500)
+        cache.put(URL.format(0), shared)
+        cache.put(URL.format(1), shared)
+        self.assertEqual(len(self.objects()), 1)
+        self.assertEqual(cache.total_size(), cache._object_path(cache.db.execute(
+            "SELECT digest FROM entries WHERE url = ?", (URL.format(0),)).fetchone()[0]).stat().st_size)
+
+        time.sleep(0.01)
+        cache.put(URL.format(2), other)
+        time.sleep(0.01)
+        cache.get(URL.format(1))
+        time.sleep(0.01)
+        cache.put(URL.format(3), os.urandom(1000))
+
+        # Dropping URL 0 freed nothing (URL 1 still uses its body), so URL 2 went too
+        self.assertIsNone(cache.get(URL.format(0)))
+        self.assertIsNone(cache.get(URL.format(2)))
+        self.assertEqual(cache.get(URL.format(1)).body, shared)
+        self.assertEqual(len(self.objects()), 2)
+
+    def test_changed_body_replaces_old_object(self):
+        cache = self.cache()
+        cache.put(URL.format(0), 'old page')
+        cache.put(URL.format(1), 'shared page')
+        cache.put(URL.format(2), 'shared page')
+        self.assertEqual(len(self.objects()), 2)
+
+        cache.put(URL.format(0), 'new page')
+        cache.put(URL.format(1), 'newer page')
+
+        # The old body of URL 0 went; URL 2 still uses the old body of URL 1
+        self.assertEqual(len(self.objects()), 3)
+        self.assertEqual(cache.get(URL.format(2)).text, 'shared page')
+        self.assertEqual(cache._total_size, cache.total_size())
+
+    def test_offline(self):
+        self.cache().put(URL.format(1), 'cached page')
+        offline = self.cache(offline=True)
+
+        self.assertEqual(cached_get(NoNetwork(), offline, URL.format(1)), 'cached page')
+        self.assertTrue(offline.last_hit)
+        self.assertTrue(offline.serves_from_disk(URL.format(2)))
+        with self.assertRaises(CacheMiss):
+            cached_get(NoNetwork(), offline, URL.format(2))
+        self.assertEqual((offline.stats['hits'], offline.stats['misses']), (1, 1))
+
+    def test_max_age(self):
+        cache = self.cache(max_age=60)
+        cache.put(URL.format(1), 'page')
+        self.assertTrue(cache.serves_from_disk(URL.format(1)))
+        self.assertFalse(cache.serves_from_disk(URL.format(2)))
+        self.assertEqual(cached_get(NoNetwork(), cache, URL.format(1)), 'page')
+
+        cache.max_age = None  # Always revalidate
+        self.assertFalse(cache.serves_from_disk(URL.format(1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for import_journal.py. Run with:
+
+    python -m unittest test_import_journal    (or: python -m pytest test_import_journal.py)
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from import_journal import FAILED, FETCHED, PARSED, UPLOADED, ImportJournal
+
+
+URLS = [f'https://tabs.ultimate-guitar.com/tab/artist/song-chords-{i}' for i in range(4)]
+
+
+class ImportJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'import_journal.jsonl'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replay_last_state_wins(self):
+        journal = ImportJournal(self.path)
+        journal.record(URLS[0], FETCHED)
+        journal.record(URLS[0], PARSED, song_id='ug-0')
+        journal.record(URLS[0], UPLOADED, song_id='ug-0')
+        journal.record(URLS[1], FAILED, reason='no_content')
+        journal.record(URLS[2], PARSED)
+        journal.close()
+
+        replayed = ImportJournal(self.path)
+        self.addCleanup(replayed.close)
+        self.assertEqual(replayed.state(URLS[0]), UPLOADED)
+        self.assertEqual(replayed.states[URLS[1]]['reason'], 'no_content')
+        self.assertEqual(replayed.pending(URLS), URLS[1:])
+        self.assertEqual(replayed.summary(), {UPLOADED: 1, FAILED: 1, PARSED: 1})
+
+    def test_torn_last_line(self):
+        journal = ImportJournal(self.path)
+        journal.record(URLS[0], UPLOADED)
+        journal.record(URLS[1], FETCHED)
+        journal.close()
+        # A crash mid-write leaves half a record with no newline
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"url": "%s", "state": "upl' % URLS[1])
+
+        journal = ImportJournal(self.path)
+        self.assertEqual(journal.state(URLS[0]), UPLOADED)
+        self.assertEqual(journal.state(URLS[1]), FETCHED)
+        journal.record(URLS[1], UPLOADED)
+        journal.close()
+
+        # The next record went on its own line, so it replays
+        lines = self.path.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(json.loads(lines[-1])['state'], UPLOADED)
+        replayed = ImportJournal(self.path)
+        self.addCleanup(replayed.close)
+        self.assertEqual(replayed.pending(URLS), URLS[2:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for key_detection.py. Run with:
+
+    python -m unittest test_key_detection    (or: python -m pytest test_key_detection.py)
+"""
+
+import unittest
+from pathlib import Path
+
+from chord_engine import encode_parsed
+from key_detection import chord_tones, chords_from_parsed, chords_from_text, detect_key, detect_keys
+from ug_store import extract_tab_from_html
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+PROGRESSIONS = {
+    'G': ['G', 'D', 'Em', 'C', 'G', 'D', 'Em', 'C', 'G'],
+    'Am': ['Am', 'F', 'C', 'G', 'Am', 'F', 'C', 'E7', 'Am'],
+    'Dm': ['Dm', 'Gm', 'A7', 'Dm'],
+    'Eb': ['Eb', 'Ab', 'Bb7', 'Cm', 'Ab', 'Bb', 'Eb'],
+    'E': ['E', 'B', 'C#m', 'A', 'E'],
+}
+
+
+class ChordTonesTest(unittest.TestCase):
+    def test_qualities(self):
+        self.assertEqual(chord_tones('C'), (0, 4, 7))
+        self.assertEqual(chord_tones('Am'), (9, 0, 4))
+        self.assertEqual(chord_tones('Cmaj7'), (0, 4, 7, 11))
+        self.assertEqual(chord_tones('G7'), (7, 11, 2, 5))
+        self.assertEqual(chord_tones('Bdim'), (11, 2, 5))
+        self.assertEqual(chord_tones('Dsus4'), (2, 7, 9))
+        self.assertEqual(chord_tones('Asus2'), (9, 11, 4))
+        self.assertEqual(chord_tones('Cadd9'), (0, 4, 7, 2))
+        self.assertEqual(chord_tones('E5'), (4, 11))
+
+    def test_slash_bass(self):
+        self.assertEqual(chord_tones('C/G'), (0, 4, 7))
+        self.assertEqual(chord_tones('D/F#'), (2, 6, 9))
+        self.assertEqual(chord_tones('C/Bb'), (0, 4, 7, 10))
+
+    def test_not_a_chord(self):
+        self.assertEqual(chord_tones('Hello'), ())
+
+
+class DetectKeysTest(unittest.TestCase):
+    def test_progressions(self):
+        for key, chords in PROGRESSIONS.items():
+            detected, confidence = detect_key(chords)
+            self.assertEqual(detected, key, chords)
+            self.assertGreater(confidence, 0.5)
+            self.assertLessEqual(confidence, 1.0)
+
+    def test_batch_matches_single(self):
+        songs = list(PROGRESSIONS.values())
+        self.assertEqual(detect_keys(songs), [detect_key(chords) for chords in songs])
+
+    def test_no_chords(self):
+        self.assertEqual(detect_keys([[], ['Intro']]), [(None, 0.0), (None, 0.0)])
+        self.assertEqual(detect_keys([]), [])
+
+    def test_fixture(self):
+        tab = extract_tab_from_html((FIXTURES / "tab_static.html").read_text(encoding='utf-8'))
+        self.assertEqual(detect_key(chords_from_text(tab['content']))[0], tab['key'])
+
+
+class ChordSourcesTest(unittest.TestCase):
+    def test_parsed_form_matches_text(self):
+        text = "[Verse]\nC       G/B     Am\nLyrics here\nF   C\nMore lyrics"
+        self.assertEqual(chords_from_text(text), ['C', 'G/B', 'Am', 'F', 'C'])
+        self.assertEqual(chords_from_parsed(encode_parsed(text)), chords_from_text(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for metrics.py. Run with:
+
+    python -m unittest test_metrics    (or: python -m pytest test_metrics.py)
+"""
+
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+from metrics import CONTENT_TYPE, HttpTimings, Registry
+
+
+class RegistryRenderTest(unittest.TestCase):
+    def test_render(self):
+        registry = Registry()
+        pages = registry.counter('scrape_pages', "Pages fetched", ('source',))
+        pages.inc(source='cache')
+        pages.inc(2, source='network')
+        registry.gauge('scrape_queue_depth', "Items waiting", ('stage',), collect=lambda: {('upload',): 3})
+        latency = registry.histogram('scrape_fetch_seconds', "Fetch time", ('host',), buckets=(2, 1))
+        for seconds in (0.5, 1, 1.5, 5):
+            latency.observe(seconds, host='tabs.ultimate-guitar.com')
+
+        self.assertEqual(registry.render(), '\n'.join([
+            '# TYPE scrape_pages counter',
+            '# HELP scrape_pages Pages fetched',
+            'scrape_pages_total{source="cache"} 1',
+            'scrape_pages_total{source="network"} 2',
+            '# TYPE scrape_queue_depth gauge',
+            '# HELP scrape_queue_depth Items waiting',
+            'scrape_queue_depth{stage="upload"} 3',
+            '# TYPE scrape_fetch_seconds histogram',
+            '# HELP scrape_fetch_seconds Fetch time',
+            # Buckets are cumulative and end with +Inf
+            'scrape_fetch_seconds_bucket{host="tabs.ultimate-guitar.com",le="1"} 2',
+            'scrape_fetch_seconds_bucket{host="tabs.ultimate-guitar.com",le="2"} 3',
+            'scrape_fetch_seconds_bucket{host="tabs.ultimate-guitar.com",le="+Inf"} 4',
+            'scrape_fetch_seconds_count{host="tabs.ultimate-guitar.com"} 4',
+            'scrape_fetch_seconds_sum{host="tabs.ultimate-guitar.com"} 8',
+            '# EOF',
+        ]) + '\n')
+        self.assertEqual(latency.summary(host='tabs.ultimate-guitar.com'), {'count': 4, 'sum': 8.0, 'mean': 2.0})
+
+    def test_label_escaping(self):
+        registry = Registry()
+        registry.counter('errors', "Errors", ('reason',)).inc(reason='bad "quote" \\ and\nnewline')
+        self.assertIn('errors_total{reason="bad \\"quote\\" \\\\ and\\nnewline"} 1\n', registry.render())
+
+    def test_wrong_labels(self):
+        counter = Registry().counter('pages', "Pages", ('source',))
+        with self.assertRaises(ValueError):
+            counter.inc(host='x')
+
+    def test_fractional_values(self):
+        registry = Registry()
+        registry.histogram('t', "Time", buckets=(0.25,)).observe(0.125)
+        self.assertIn('t_bucket{le="0.25"} 1\n', registry.render())
+        self.assertIn('t_sum 0.125\n', registry.render())
+
+    def test_serve_and_textfile(self):
+        registry = Registry()
+        registry.counter('pages', "Pages").inc()
+        url = registry.serve(0)
+        self.addCleanup(registry.stop)
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+            self.assertEqual(response.read().decode('utf-8'), registry.render())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'metrics.prom'
+            registry.write_textfile(path)
+            self.assertEqual(path.read_text(), registry.render())
+            self.assertEqual([p.name for p in Path(tmp).iterdir()], ['metrics.prom'])
+
+
+class HttpTimingsTest(unittest.TestCase):
+    def test_browser_request_timing(self):
+        registry = Registry()
+        timings = HttpTimings(registry, 'fetch')
+        request = SimpleNamespace(url='https://tabs.ultimate-guitar.com/tab/a/b-chords-1', timing={
+            'domainLookupStart': -1, 'domainLookupEnd': -1,  # Reused connection
+            'connectStart': 0, 'connectEnd': 20,
+            'requestStart': 25, 'responseStart': 125, 'responseEnd': 150,
+        })
+        timings.observe_browser_request(request)
+
+        host = 'tabs.ultimate-guitar.com'
+        self.assertEqual(timings.dns.summary(host=host)['count'], 0)
+        self.assertAlmostEqual(timings.connect.summary(host=host)['sum'], 0.02)
+        self.assertAlmostEqual(timings.ttfb.summary(host=host)['sum'], 0.1)
+        self.assertAlmostEqual(timings.download.summary(host=host)['sum'], 0.025)
+
+
+if __name__ == '__main__':
+    unittest.main()
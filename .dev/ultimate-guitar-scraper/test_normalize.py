@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for normalize.py. Run with:
+
+    python -m unittest test_normalize    (or: python -m pytest test_normalize.py)
+"""
+
+import asyncio
+import io
+import unittest
+from pathlib import Path
+
+from chord_engine import parse_ug_format
+from normalize import ContentNormalizer, normalize_lines, normalize_text
+from ug_store import extract_tab_from_html, strip_markup
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class NormalizeTextTest(unittest.TestCase):
+    def test_markup(self):
+        self.assertEqual(normalize_text('[tab][ch]Am[/ch]   [ch]G/B[/ch]\nLyrics[/tab]'), 'Am   G/B\nLyrics')
+        self.assertEqual(strip_markup('[ch]C[/ch] [ch]G[/ch]\nla la'), 'C G\nla la')
+
+    def test_line_endings(self):
+        self.assertEqual(normalize_text('C  G\r\nLyrics\rMore\r\n'), 'C  G\nLyrics\nMore')
+
+    def test_spaces(self):
+        self.assertEqual(normalize_text('C\xa0\xa0G\u2009D   \nwo\u200brd\t!'), 'C  G D\nword    !')
+        self.assertEqual(normalize_text('\ufeffC G'), 'C G')
+
+    def test_tabs_keep_chords_over_lyrics(self):
+        self.assertEqual(normalize_text('C\tG\nab\tcd'), 'C       G\nab      cd')
+
+    def test_blank_lines(self):
+        text = '\n\n[Verse]\n\n\n\nC  G\n  \n\t\nLyrics\n\n\n'
+        self.assertEqual(normalize_text(text), '[Verse]\n\nC  G\n\nLyrics')
+
+    def test_keeps_first_line_indent(self):
+        self.assertEqual(normalize_text('\n    Am    F\nlyrics'), '    Am    F\nlyrics')
+
+    def test_clean_text_unchanged(self):
+        text = '[Verse 1]\nC       G       Am      F\nThis is a line of lyrics\n\n[Chorus]\nF  G'
+        self.assertEqual(normalize_text(text), text)
+        self.assertEqual(normalize_text(''), '')
+
+    def test_parses_the_same(self):
+        text = '[Verse]\r\n[ch]C[/ch]\xa0 [ch]G[/ch]   \r\nLyrics here\r\n\r\n\r\n'
+        self.assertEqual(parse_ug_format(normalize_text(text)), parse_ug_format('[Verse]\nC  G\nLyrics here'))
+
+    def test_streams_file_lines(self):
+        f = io.StringIO('C  G \r\nLyrics\r\n\r\n\r\nEnd\r\n', newline='')
+        self.assertEqual(list(normalize_lines(f)), ['C  G', 'Lyrics', '', 'End'])
+
+
+class ContentNormalizerTest(unittest.TestCase):
+    def test_bytes_saved(self):
+        normalizer = ContentNormalizer()
+        self.assertEqual(normalizer.normalize('C G  \r\nla\xa0la\r\n\r\n\r\n'), ('C G\nla la', 10))
+        self.assertEqual(normalizer.normalize('C G\nla'), ('C G\nla', 0))
+
+        summary = normalizer.summary()
+        self.assertEqual((summary['songs'], summary['changed']), (2, 1))
+        self.assertEqual(summary['bytes_in'] - summary['bytes_out'], summary['bytes_saved'])
+        self.assertEqual(summary['bytes_saved'], 10)
+
+    def test_importer_counts_markup(self):
+        from import_automated import UGToOpenChordsImporter
+
+        url = 'https://tabs.ultimate-guitar.com/tab/billy-joel/vienna-chords-1001'
+        store_tab = extract_tab_from_html((FIXTURES / 'tab_static.html').read_text(encoding='utf-8'))
+        importer = UGToOpenChordsImporter()
+        tab_data = importer.tab_data_from_store(url, store_tab, 'js-store')
+        _, song = asyncio.run(importer.normalize_stage((0, url, tab_data), None))
+
+        # Measured from the raw page markup, not from the already-clean content
+        markup_bytes = len(store_tab['content_markup'].encode('utf-8'))
+        content_bytes = len(song['content'].encode('utf-8'))
+        self.assertEqual(song['content'], store_tab['content'])
+        self.assertEqual(importer.normalizer.summary()['bytes_saved'], markup_bytes - content_bytes)
+        self.assertGreater(markup_bytes, content_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
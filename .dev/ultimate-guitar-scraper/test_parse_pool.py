@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for parse_pool.py. Run with:
+
+    python -m unittest test_parse_pool    (or: python -m pytest test_parse_pool.py)
+"""
+
+import asyncio
+import time
+import unittest
+
+from parse_pool import ParsePool
+
+
+def title(url, html, suffix=''):
+    if 'boom' in html:
+        raise ValueError(url)
+    return html.split('<title>', 1)[1].split('</title>', 1)[0] + suffix
+
+
+def slow_title(url, html):
+    time.sleep(0.2)
+    return title(url, html)
+
+
+PAGES = [(f"https://tabs.ultimate-guitar.com/tab/a/song-chords-{i}", f"<title>Sóng {i}</title>".encode('utf-8'))
+         for i in range(7)]
+
+
+class ParsePoolTest(unittest.TestCase):
+    def parse_all(self, pool, pages):
+        finished = []
+        for url, html in pages:
+            finished.extend(pool.submit(url, html))
+        return finished + pool.drain()
+
+    def test_in_process_and_workers_agree(self):
+        for workers in (0, 2):
+            with ParsePool(title, workers=workers, chunk_size=3, suffix='!') as pool:
+                finished = self.parse_all(pool, PAGES)
+            self.assertEqual(finished, [(url, f"Sóng {i}!", None) for i, (url, _) in enumerate(PAGES)])
+
+    def test_errors_are_returned(self):
+        pages = PAGES[:2] + [('https://tabs.ultimate-guitar.com/tab/a/boom-chords-9', b'boom')]
+        with ParsePool(title, workers=1, chunk_size=2) as pool:
+            finished = self.parse_all(pool, pages)
+        self.assertEqual([result for _, result, _ in finished], ['Sóng 0', 'Sóng 1', None])
+        self.assertIsInstance(finished[2][2], ValueError)
+
+    def test_submit_async_keeps_the_loop_running(self):
+        ticks = 0
+
+        async def ticker(stop):
+            nonlocal ticks
+            while not stop.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        async def run(pool):
+            stop = asyncio.Event()
+            task = asyncio.create_task(ticker(stop))
+            finished = []
+            for url, html in PAGES:
+                # One chunk in flight at most: every page waits for the previous one
+                finished.extend(await pool.submit_async(url, html))
+            stop.set()
+            await task
+            return finished
+
+        with ParsePool(slow_title, workers=1, chunk_size=1, max_pending=1) as pool:
+            finished = asyncio.run(run(pool)) + pool.drain()
+        self.assertEqual([url for url, _, _ in finished], [url for url, _ in PAGES])
+        # The ticker kept running while submit_async waited on the workers
+        self.assertGreater(ticks, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for pipeline.py. Run with:
+
+    python -m unittest test_pipeline    (or: python -m pytest test_pipeline.py)
+"""
+
+import asyncio
+import unittest
+
+from pipeline import Pipeline, Stage
+
+
+class PipelineTest(unittest.TestCase):
+    def run_pipeline(self, stages, items):
+        out = []
+
+        async def collect(item, state):
+            out.append(item)
+
+        asyncio.run(Pipeline(stages + [Stage('collect', collect)]).run(items))
+        return out
+
+    def test_stages_in_order(self):
+        async def double(item, state):
+            return item * 2
+
+        async def drop_odd(item, state):
+            return item if item % 4 == 0 else None
+
+        out = self.run_pipeline([Stage('double', double, concurrency=3), Stage('filter', drop_odd)], range(10))
+        self.assertEqual(sorted(out), [0, 4, 8, 12, 16])
+
+    def test_batch_stage(self):
+        batches = []
+
+        async def group(items, state):
+            batches.append(list(items))
+            return [item for item in items if item != 3]
+
+        stage = Stage('group', group, batch_size=4, linger=5.0)
+        out = self.run_pipeline([stage], range(10))
+        self.assertEqual(out, [0, 1, 2, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(batches, [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+        self.assertEqual(stage.processed, 10)
+
+    def test_batch_stage_lingers_briefly(self):
+        batches = []
+
+        async def slow(item, state):
+            await asyncio.sleep(0.05)
+            return item
+
+        async def group(items, state):
+            batches.append(list(items))
+            return items
+
+        # Items trickle in more slowly than the linger: nobody waits for a full batch
+        self.run_pipeline([Stage('slow', slow), Stage('group', group, batch_size=10, linger=0.01)], range(3))
+        self.assertEqual(batches, [[0], [1], [2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
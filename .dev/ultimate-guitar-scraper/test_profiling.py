@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for profiling.py. Run with:
+
+    python -m unittest test_profiling    (or: python -m pytest test_profiling.py)
+"""
+
+import asyncio
+import pstats
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+from profiling import StageProfiler
+
+
+def fetch_work():
+    return sum(range(1000))
+
+
+def parse_work():
+    return [str(i) for i in range(1000)]
+
+
+def functions(profiler, stage):
+    """Names of the functions a stage's profile saw."""
+    return {name for _, _, name in pstats.Stats(profiler.profiles[stage]).stats}
+
+
+class StageProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(tracemalloc.stop)
+
+    def profiler(self, **options):
+        return StageProfiler(Path(self.tmp.name) / 'profile', **options)
+
+    def test_nested_stage_is_profiled_on_its_own(self):
+        profiler = self.profiler(trace_memory=False)
+        for _ in range(2):
+            with profiler.stage('fetch'):
+                fetch_work()
+                with profiler.stage('parse'):
+                    parse_work()
+                fetch_work()
+
+        self.assertIn('fetch_work', functions(profiler, 'fetch'))
+        self.assertNotIn('parse_work', functions(profiler, 'fetch'))
+        self.assertIn('parse_work', functions(profiler, 'parse'))
+        self.assertNotIn('fetch_work', functions(profiler, 'parse'))
+        self.assertEqual(profiler.calls, {'fetch': 2, 'parse': 2})
+        self.assertEqual(profiler._active, [])
+
+    def test_interleaved_stages(self):
+        profiler = self.profiler(trace_memory=False)
+        seen = []
+
+        async def run_stage(name, hold, wait_for=None):
+            with profiler.stage(name):
+                hold.set()
+                if wait_for:
+                    await wait_for.wait()
+                seen.append(list(profiler._active))
+                await asyncio.sleep(0)
+
+        async def run():
+            upload_started, normalize_started = asyncio.Event(), asyncio.Event()
+            # upload enters first but leaves first, while normalize (entered later) is still active
+            upload = asyncio.create_task(run_stage('upload', upload_started, wait_for=normalize_started))
+            await upload_started.wait()
+            normalize = asyncio.create_task(run_stage('normalize', normalize_started, wait_for=asyncio.Event()))
+            await upload
+            seen.append(list(profiler._active))
+            normalize.cancel()
+            await asyncio.gather(normalize, return_exceptions=True)
+
+        asyncio.run(run())
+        self.assertEqual(seen, [['upload', 'normalize'], ['normalize']])
+        self.assertEqual(profiler._active, [])
+
+    def test_write_artifacts(self):
+        profiler = self.profiler(sample_every=2)
+        for _ in range(3):
+            with profiler.stage('fetch'):
+                fetch_work()
+                with profiler.stage('parse'):
+                    kept = parse_work()
+        report_path = profiler.write()
+
+        output = Path(self.tmp.name) / 'profile'
+        self.assertEqual(sorted(p.name for p in output.iterdir()),
+                         ['fetch.alloc.txt', 'fetch.prof', 'parse.alloc.txt', 'parse.prof', 'report.txt'])
+        self.assertIn('fetch_work', {name for _, _, name in pstats.Stats(str(output / 'fetch.prof')).stats})
+
+        report = report_path.read_text()
+        self.assertIn('Stage: fetch (3 passes', report)
+        self.assertIn('Stage: parse (3 passes', report)
+        alloc = (output / 'parse.alloc.txt').read_text()
+        self.assertTrue(alloc.startswith('Net allocations over 2 sampled passes (of 3)'))
+        self.assertIn('test_profiling.py', alloc)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(len(kept), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for rate_control.py. Run with:
+
+    python -m unittest test_rate_control    (or: python -m pytest test_rate_control.py)
+"""
+
+import asyncio
+import time
+import unittest
+
+from rate_control import AIMDController, RateControl, classify
+
+
+URL = 'https://tabs.ultimate-guitar.com/tab/artist/song-chords-1001'
+
+
+class HTTPStatusError(Exception):
+    """Stand-in for an HTTP error carrying a status and headers, like aiohttp's."""
+
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.headers = headers or {}
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_throttled_with_retry_after(self):
+        verdict = classify(HTTPStatusError(429, {'Retry-After': '3'}))
+        self.assertTrue(verdict.retryable and verdict.throttled)
+        self.assertEqual(verdict.retry_after, 3.0)
+
+    def test_not_retryable(self):
+        verdict = classify(HTTPStatusError(404))
+        self.assertFalse(verdict.retryable or verdict.throttled)
+
+
+class AIMDControllerTest(unittest.TestCase):
+    def test_additive_increase(self):
+        controller = AIMDController(rate=2, concurrency=2, increase_every=3)
+        for _ in range(3):
+            controller.on_success(0.1)
+        self.assertEqual((controller.rate, controller.concurrency), (2.25, 3))
+
+    def test_throttle_halves_once_per_cooldown_and_pauses(self):
+        controller = AIMDController(rate=4, concurrency=4, cooldown=60)
+        controller.on_throttle(retry_after=5)
+        controller.on_throttle(retry_after=1)
+        self.assertEqual((controller.rate, controller.concurrency), (2.0, 2))
+        self.assertEqual(controller.stats['throttled'], 2)
+        self.assertEqual(controller.stats['decreases'], 1)
+        self.assertAlmostEqual(controller.pause_until - time.monotonic(), 5, delta=0.5)
+
+
+class RateControlCallTest(unittest.TestCase):
+    def test_backs_off_on_429_with_retry_after(self):
+        control = RateControl(rate=100, concurrency=4, max_retries=2, backoff_base=0.001)
+        responses = [HTTPStatusError(429, {'Retry-After': '1'}), 'page']
+
+        async def request():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        async def run():
+            start = time.monotonic()
+            result = await control.call(URL, request)
+            return result, time.monotonic() - start
+
+        result, elapsed = asyncio.run(run())
+        host = control.host(URL)
+        self.assertEqual(result, 'page')
+        # Retried after the server's Retry-After, not the (much shorter) backoff
+        self.assertGreaterEqual(elapsed, 1.0)
+        self.assertEqual(host.retries, 1)
+        self.assertEqual((host.controller.rate, host.controller.concurrency), (50.0, 2))
+        self.assertEqual(host.controller.stats['throttled'], 1)
+        self.assertEqual(host.in_flight, 0)
+
+    def test_gives_up_after_max_retries(self):
+        control = RateControl(rate=100, max_retries=1, backoff_base=0.001)
+        calls = []
+
+        async def request():
+            calls.append(1)
+            raise HTTPStatusError(503)
+
+        with self.assertRaises(HTTPStatusError):
+            asyncio.run(control.call(URL, request))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(control.host(URL).in_flight, 0)
+
+    def test_cancel_while_pacing_releases_slot(self):
+        control = RateControl(rate=1, concurrency=1)
+
+        async def request():
+            return 'page'
+
+        async def run():
+            await control.call(URL, request)  # Takes the only send slot for the next second
+            task = asyncio.create_task(control.call(URL, request))
+            await asyncio.sleep(0.05)  # Now waiting for its send slot
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertEqual(control.host(URL).in_flight, 0)
+
+
+    def test_cancelled_trial_lets_the_next_one_through(self):
+        control = RateControl(rate=100, max_retries=0, breaker_threshold=1, breaker_reset=0.05)
+
+        async def fail():
+            raise HTTPStatusError(503)
+
+        async def hang():
+            await asyncio.sleep(60)
+
+        async def ok():
+            return 'page'
+
+        async def run():
+            with self.assertRaises(HTTPStatusError):
+                await control.call(URL, fail)  # Opens the circuit
+            await asyncio.sleep(0.06)
+            trial = asyncio.create_task(control.call(URL, hang))
+            await asyncio.sleep(0.02)  # The trial request is in flight
+            self.assertTrue(control.host(URL).breaker.trial_in_flight)
+            trial.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await trial
+            return await control.call(URL, ok)
+
+        self.assertEqual(asyncio.run(run()), 'page')
+        breaker = control.host(URL).breaker
+        self.assertEqual((breaker.opened_at, breaker.trial_in_flight), (None, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
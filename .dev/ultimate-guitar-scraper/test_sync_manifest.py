@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for sync_manifest.py. Run with:
+
+    python -m unittest test_sync_manifest    (or: python -m pytest test_sync_manifest.py)
+"""
+
+import argparse
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from sync_manifest import SyncManifest, parse_ttl
+
+
+URLS = [f'https://tabs.ultimate-guitar.com/tab/artist/song-chords-{1000 + i}' for i in range(3)]
+
+
+class ParseTTLTest(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(parse_ttl('3600'), 3600)
+        self.assertEqual(parse_ttl('90m'), 5400)
+        self.assertEqual(parse_ttl('12h'), 43200)
+        self.assertEqual(parse_ttl(' 7D '), 604800)
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_ttl('a week')
+
+
+class SyncManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manifest = SyncManifest(Path(self.tmp.name) / 'sync_manifest.db')
+
+    def tearDown(self):
+        self.manifest.close()
+        self.tmp.cleanup()
+
+    def backdate(self, url, seconds):
+        self.manifest.db.execute("UPDATE manifest SET last_fetched = ? WHERE url = ?", (time.time() - seconds, url))
+
+    def test_record(self):
+        self.manifest.record(URLS[0] + '?from=export', 'abc123')
+        entry = self.manifest.get(URLS[0])
+        self.assertEqual((entry['url'], entry['tab_id'], entry['content_hash']), (URLS[0], '1000', 'abc123'))
+        self.assertEqual(len(self.manifest), 1)
+
+    def test_ttl_staleness(self):
+        for url in URLS[:2]:
+            self.manifest.record(url, 'hash')
+        self.backdate(URLS[0], 8 * 86400)
+        self.backdate(URLS[1], 6 * 86400)
+
+        new, stale, fresh = self.manifest.diff(URLS, ttl=parse_ttl('7d'))
+        self.assertEqual((new, stale, fresh), ([URLS[2]], [URLS[0]], [URLS[1]]))
+
+        # Without a TTL known URLs are never stale
+        self.assertEqual(self.manifest.diff(URLS, ttl=None), ([URLS[2]], [], URLS[:2]))
+
+        # Fetching it again makes it fresh
+        self.manifest.record(URLS[0], 'new hash')
+        self.assertEqual(self.manifest.diff(URLS, ttl=parse_ttl('7d'))[1], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for tab_parser.py. Run with:
+
+    python -m unittest test_tab_parser    (or: python -m pytest test_tab_parser.py)
+"""
+
+import unittest
+from pathlib import Path
+
+from tab_parser import available_backends, extract_page_fields
+
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+class ExtractPageFieldsTest(unittest.TestCase):
+    def assert_backends_agree(self, html):
+        backends = available_backends()
+        if len(backends) < 2:
+            self.skipTest("needs at least two parser backends installed")
+        expected = extract_page_fields(html, backends[-1])
+        for backend in backends[:-1]:
+            with self.subTest(backend=backend):
+                self.assertEqual(extract_page_fields(html, backend), expected)
+        return expected
+
+    def test_backends_agree_on_fixtures(self):
+        for name in ('tab_rendered.html', 'tab_static.html'):
+            with self.subTest(fixture=name):
+                fields = self.assert_backends_agree((FIXTURES / name).read_text(encoding='utf-8'))
+                self.assertGreater(fields['text_length'], 0)
+
+    def test_text_length_skips_scripts_comments_and_whitespace(self):
+        html = """<html><head><title>T</title><style>p { color: red }</style></head><body>
+            <!-- note -->x<p>a  <b>b</b>
+            c</p>tail<script>var q = 1;</script></body></html>"""
+        fields = self.assert_backends_agree(html)
+        self.assertEqual(fields['text_length'], len('T xa b ctail'))
+
+    def test_first_match_wins(self):
+        html = """<html><body>
+            <h1>Vienna Chords by Billy Joel</h1>
+            <a href="/tabs/other">Other</a><a href="/artist/billy-joel">Billy Joel</a>
+            <div class="tab-content">first</div><div class="tab-content">second</div>
+            <pre>[Verse]\nC G Am</pre><pre>later</pre>
+            </body></html>"""
+        fields = self.assert_backends_agree(html)
+        self.assertEqual(fields['h1'], 'Vienna Chords by Billy Joel')
+        self.assertEqual(fields['artist_link'], 'Billy Joel')
+        self.assertEqual(fields['selectors'], {'.tab-content': 'first'})
+        self.assertEqual(fields['pre'], '[Verse]\nC G Am')
+        self.assertIsNone(fields['code'])
+
+
+if __name__ == '__main__':
+    unittest.main()
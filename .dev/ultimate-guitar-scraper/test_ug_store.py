@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for ug_store.py. Run with:
+
+    python -m unittest test_ug_store    (or: python -m pytest test_ug_store.py)
+"""
+
+import html as html_lib
+import json
+import unittest
+from pathlib import Path
+
+from ug_store import (extract_tab_from_html, extract_tab_from_payload, extract_tab_from_store,
+                      find_store, find_tab_payload)
+
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+PAGE_DATA = {
+    'tab': {'id': 42, 'song_name': 'Vienna', 'artist_name': 'Billy Joel', 'type': 'Chords', 'capo': '2'},
+    'tab_view': {
+        'wiki_tab': {'content': '[Verse]\r\n[ch]C[/ch]  [ch]G/B[/ch]\r\nSlow down, you crazy child  \r\n'},
+        'meta': {'tonality': 'C', 'tuning': {'name': 'Standard', 'value': 'E A D G B E'}},
+    },
+}
+CONTENT = '[Verse]\nC  G/B\nSlow down, you crazy child'
+
+
+class FindStoreTest(unittest.TestCase):
+    def test_js_store_data_content(self):
+        value = html_lib.escape(json.dumps({'store': {'page': {'data': PAGE_DATA}}}), quote=True)
+        page = f'<html><body><div class="js-store" data-content="{value}"></div></body></html>'
+        self.assertEqual(find_store(page)['store']['page']['data'], PAGE_DATA)
+
+        # Attribute order doesn't matter
+        page = f'<html><body><div data-content="{value}" class="js-store"></div></body></html>'
+        self.assertEqual(find_store(page)['store']['page']['data'], PAGE_DATA)
+
+    def test_ugapp_store_script(self):
+        page = ('<html><head><script>window.UGAPP = window.UGAPP || {};\n'
+                f'window.UGAPP.store.page = {json.dumps({"data": PAGE_DATA})};\n'
+                'window.UGAPP.env = "production";</script></head><body></body></html>')
+        self.assertEqual(find_store(page), {'store': {'page': {'data': PAGE_DATA}}})
+
+    def test_no_store(self):
+        self.assertIsNone(find_store('<html><body><h1>Vienna</h1></body></html>'))
+        self.assertIsNone(find_store('<div class="js-store" data-content="{not json"></div>'))
+        self.assertIsNone(extract_tab_from_html('<html><body><pre>C G</pre></body></html>'))
+
+
+class ExtractTabTest(unittest.TestCase):
+    def test_extract_tab_from_store(self):
+        tab = extract_tab_from_store({'store': {'page': {'data': PAGE_DATA}}})
+        self.assertEqual(tab, {
+            'title': 'Vienna',
+            'artist': 'Billy Joel',
+            'key': 'C',
+            'tuning': 'E A D G B E',
+            'capo': 2,
+            'content_markup': PAGE_DATA['tab_view']['wiki_tab']['content'],
+            'content': CONTENT,
+            'tab_id': 42,
+            'ug_type': 'Chords',
+        })
+
+    def test_store_without_tab(self):
+        self.assertIsNone(extract_tab_from_store({'store': {'page': {'data': {'search': []}}}}))
+        self.assertIsNone(extract_tab_from_store({'store': {}}))
+
+    def test_static_fixture(self):
+        tab = extract_tab_from_html((FIXTURES / 'tab_static.html').read_text(encoding='utf-8'))
+        self.assertEqual((tab['title'], tab['artist'], tab['key'], tab['tab_id']), ('Vienna', 'Billy Joel', 'C', 1755704))
+        self.assertTrue(tab['content'].startswith('[Intro]\nC   G/B   Am'))
+        self.assertNotIn('[ch]', tab['content'])
+        self.assertIn('[ch]', tab['content_markup'])
+
+    def test_rendered_fixture_has_no_store(self):
+        self.assertIsNone(extract_tab_from_html((FIXTURES / 'tab_rendered.html').read_text(encoding='utf-8')))
+
+
+class PayloadTest(unittest.TestCase):
+    def test_find_tab_payload(self):
+        payload = {'meta': {}, 'data': [{'ads': []}, {'page': PAGE_DATA}]}
+        self.assertIs(find_tab_payload(payload), PAGE_DATA)
+        self.assertIsNone(find_tab_payload({'tab_view': 'not a dict'}))
+        self.assertIsNone(find_tab_payload({'a': {'b': {'c': PAGE_DATA}}}, max_depth=1))
+
+    def test_extract_tab_from_payload(self):
+        tab = extract_tab_from_payload({'data': {'page': PAGE_DATA}})
+        self.assertEqual((tab['title'], tab['content']), ('Vienna', CONTENT))
+        self.assertIsNone(extract_tab_from_payload({'data': {'results': []}}))
+
+
+if __name__ == '__main__':
+    unittest.main()
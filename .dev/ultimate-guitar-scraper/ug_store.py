@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Static extractor for the JSON state Ultimate Guitar embeds in every tab page.
+
+The chord text is rendered client-side, which is why plain DOM scraping
+comes back empty. The data the page renders from ships in the HTML itself,
+HTML-escaped inside `<div class="js-store" data-content="...">` (older
+pages) or assigned to `window.UGAPP.store.page` in an inline script. Pulling
+it out with a string search and one json.loads avoids both the DOM parse and
+the headless browser.
+"""
+
+import html as html_lib
+import json
+import re
+
+from normalize import normalize_text
+
+
+STORE_DIV_MARKER = 'class="js-store"'
+DATA_CONTENT_ATTR = 'data-content="'
+UGAPP_STORE_RE = re.compile(r'window\.UGAPP\.store\.page\s*=\s*')
+
+
+def find_store(page_html):
+    """Return the decoded page store dict, or None when the page has none."""
+    start = page_html.find(STORE_DIV_MARKER)
+    if start != -1:
+        tag_end = page_html.find('>', start)
+        attr = page_html.find(DATA_CONTENT_ATTR, start, tag_end if tag_end != -1 else None)
+        if attr == -1:
+            # data-content came before class="js-store" in the tag
+            tag_start = page_html.rfind('<', 0, start)
+            attr = page_html.find(DATA_CONTENT_ATTR, tag_start, start)
+        if attr != -1:
+            value_start = attr + len(DATA_CONTENT_ATTR)
+            value_end = page_html.find('"', value_start)
+            if value_end != -1:
+                try:
+                    return json.loads(html_lib.unescape(page_html[value_start:value_end]))
+                except ValueError:
+                    pass
+
+    match = UGAPP_STORE_RE.search(page_html)
+    if match:
+        try:
+            page, _ = json.JSONDecoder().raw_decode(page_html, match.end())
+            return {'store': {'page': page}}
+        except ValueError:
+            pass
+
+    return None
+
+
+def strip_markup(markup):
+    """Turn UG chord markup into plain, normalized chord-over-lyrics text (see normalize.py)."""
+    return normalize_text(markup)
+
+
+def _get(data, *keys):
+    for key in keys:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def extract_tab_from_store(store):
+    """
+    Read the tab fields out of a decoded page store.
+
+    Returns a dict with title, artist, key, tuning, capo, content_markup
+    (raw `[ch]`/`[tab]` markup), content (markup stripped, normalized), tab_id and
+    ug_type, or None when the store holds no tab.
+    """
+    data = _get(store, 'store', 'page', 'data')
+    if not isinstance(data, dict):
+        return None
+
+    tab = data.get('tab') or {}
+    tab_view = data.get('tab_view') or {}
+    markup = _get(tab_view, 'wiki_tab', 'content')
+    if not tab and not markup:
+        return None
+
+    meta = tab_view.get('meta') or {}
+    tuning = meta.get('tuning')
+    if isinstance(tuning, dict):
+        tuning = tuning.get('value') or tuning.get('name')
+
+    capo = meta.get('capo', tab.get('capo'))
+    try:
+        capo = int(capo) if capo not in (None, '') else 0
+    except (TypeError, ValueError):
+        capo = 0
+
+    markup = markup or ''
+    return {
+        'title': tab.get('song_name'),
+        'artist': tab.get('artist_name'),
+        'key': tab.get('tonality_name') or meta.get('tonality') or None,
+        'tuning': tuning or None,
+        'capo': capo,
+        'content_markup': markup,
+        'content': strip_markup(markup),
+        'tab_id': tab.get('id'),
+        'ug_type': tab.get('type'),
+    }
+
+
+def find_tab_payload(data, max_depth=6):
+    """
+    Find the tab data in an arbitrary JSON payload (e.g. an XHR response).
+
+    Returns the dict holding `tab_view` - the same shape as `store.page.data`
+    in the embedded store - or None.
+    """
+    if max_depth < 0:
+        return None
+    if isinstance(data, dict):
+        if isinstance(data.get('tab_view'), dict):
+            return data
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        found = find_tab_payload(child, max_depth - 1)
+        if found is not None:
+            return found
+    return None
+
+
+def extract_tab_from_payload(data):
+    """Read the tab fields out of a JSON payload that contains tab data, or None."""
+    payload = find_tab_payload(data)
+    if payload is None:
+        return None
+    return extract_tab_from_store({'store': {'page': {'data': payload}}})
+
+
+def extract_tab_from_html(page_html):
+    """Find the embedded store in a tab page and return its tab fields, or None."""
+    store = find_store(page_html)
+    if store is None:
+        return None
+    return extract_tab_from_store(store)
@@ -1,6 +1,7 @@
 // DynamoDB utility functions for Vercel serverless functions
+import { createHash } from 'crypto';
 import { DynamoDBClient } from '@aws-sdk/client-dynamodb';
-import { DynamoDBDocumentClient, QueryCommand, GetCommand, PutCommand, UpdateCommand, DeleteCommand, ScanCommand } from '@aws-sdk/lib-dynamodb';
+import { DynamoDBDocumentClient, QueryCommand, GetCommand, UpdateCommand, DeleteCommand, ScanCommand, BatchGetCommand, BatchWriteCommand } from '@aws-sdk/lib-dynamodb';
 
 // Initialize DynamoDB client
 const client = new DynamoDBClient({
@@ -15,6 +16,51 @@ const docClient = DynamoDBDocumentClient.from(client);
 
 const TABLE_NAME = (process.env.DYNAMODB_TABLE_NAME || 'open-chords-songs').trim();
 
+// BatchWriteItem accepts at most 25 put requests per call
+const BATCH_WRITE_LIMIT = 25;
+const BATCH_WRITE_MAX_ATTEMPTS = 5;
+const BATCH_WRITE_BASE_DELAY_MS = 50;
+
+// sourceIds end up in songIds and URLs, so they're kept to a safe alphabet
+const SOURCE_ID_RE = /^[A-Za-z0-9_-]{1,64}$/;
+const SOURCED_SONG_ID_RE = /^([A-Za-z0-9_-]{1,64})\.(.+)$/;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+/**
+ * SHA-256 hex digest of a song's content, stored as contentHash so importers
+ * can tell whether a re-import would change anything
+ */
+export function contentHash(content) {
+  return createHash('sha256').update(content ?? '', 'utf8').digest('hex');
+}
+
+/**
+ * The song's precomputed parsed form (see src/services/parsedSong.ts), if it sent
+ * a well-formed one. It's derived from content, so it's only kept when it comes
+ * with the content it was computed from.
+ */
+export function parsedField(song) {
+  const parsed = song.parsed;
+  if (!parsed || typeof parsed !== 'object' || !Number.isInteger(parsed.v) ||
+      typeof parsed.t !== 'string' || !Array.isArray(parsed.c) || !Array.isArray(parsed.p)) {
+    return undefined;
+  }
+  return { v: parsed.v, t: parsed.t, c: parsed.c, p: parsed.p };
+}
+
+/**
+ * The song's key and how sure the importer is of it (1 when the tab states it,
+ * the correlation with the key profile when it was detected from the chords).
+ * Only the fields the client sent are returned.
+ */
+export function keyFields(song) {
+  return {
+    ...(typeof song.key === 'string' && song.key && { key: song.key }),
+    ...(typeof song.keyConfidence === 'number' && { keyConfidence: song.keyConfidence }),
+  };
+}
+
 /**
  * List all songs for a user
  */
@@ -49,19 +95,91 @@ export async function listAllSongs() {
 }
 
 /**
- * Get a specific song by songId (PUBLIC - scans for the song)
+ * The songId of a user's copy of an imported song: `<sourceId>.<userId>`
+ * Importers send where a song came from as sourceId (e.g. `ug-<tab id>`) rather
+ * than an id, so a re-import replaces the same song while two users importing
+ * the same tab still get distinct songs. The owner can be read back from the id,
+ * which lets getSongById fetch it directly.
+ */
+export function sourceSongId(userId, sourceId) {
+  return `${sourceId}.${userId}`;
+}
+
+/**
+ * Whether a client-sent sourceId can be used in a songId
+ */
+export function isValidSourceId(sourceId) {
+  return typeof sourceId === 'string' && SOURCE_ID_RE.test(sourceId);
+}
+
+/**
+ * The songId to store a song under: derived from its sourceId when it has one
+ */
+export function songIdFor(userId, song) {
+  return song.sourceId ? sourceSongId(userId, song.sourceId) : song.id;
+}
+
+/**
+ * List the id, sourceId, contentHash and parsed-form version of a user's songs
+ * Importers match their songs by sourceId, and only the songs a POST from the
+ * same user would replace count. Reads only those attributes, following pagination.
+ */
+export async function listSongHashes(userId) {
+  const hashes = [];
+  let lastKey;
+
+  do {
+    const response = await docClient.send(new QueryCommand({
+      TableName: TABLE_NAME,
+      KeyConditionExpression: 'userId = :userId',
+      ExpressionAttributeValues: {
+        ':userId': userId,
+      },
+      ProjectionExpression: 'songId, sourceId, contentHash, parsed.v',
+      ExclusiveStartKey: lastKey,
+    }));
+    for (const item of response.Items || []) {
+      hashes.push({
+        id: item.songId,
+        sourceId: item.sourceId || null,
+        contentHash: item.contentHash || null,
+        parsedVersion: item.parsed?.v ?? null,
+      });
+    }
+    lastKey = response.LastEvaluatedKey;
+  } while (lastKey);
+
+  return hashes;
+}
+
+/**
+ * Get a specific song by songId (PUBLIC)
+ * Imported songs name their owner in the id and are read directly; songs created
+ * in the app are scanned for, stopping at the first page that has the song.
  */
 export async function getSongById(songId) {
-  const command = new ScanCommand({
-    TableName: TABLE_NAME,
-    FilterExpression: 'songId = :songId',
-    ExpressionAttributeValues: {
-      ':songId': songId,
-    },
-  });
+  const sourced = SOURCED_SONG_ID_RE.exec(songId);
+  if (sourced) {
+    return getSong(sourced[2], songId);
+  }
 
-  const response = await docClient.send(command);
-  return response.Items?.[0] || null;
+  let lastKey;
+  do {
+    const response = await docClient.send(new ScanCommand({
+      TableName: TABLE_NAME,
+      FilterExpression: 'songId = :songId',
+      ExpressionAttributeValues: {
+        ':songId': songId,
+      },
+      ExclusiveStartKey: lastKey,
+    }));
+    if (response.Items?.length) {
+      return response.Items[0];
+    }
+    lastKey = response.LastEvaluatedKey;
+  } while (lastKey);
+
+  return null;
 }
 
 /**
@@ -81,29 +199,147 @@ export async function getSong(userId, songId) {
 }
 
 /**
- * Save a new song
+ * Save a song, creating it or replacing an existing one with the same id
+ * (or, for an imported song, the user's song from the same sourceId).
+ * A re-import replaces every attribute but keeps the original createdAt.
  */
 export async function saveSong(userId, song, ownerEmail = 'anonymous') {
   const now = new Date().toISOString();
-  
-  const item = {
-    userId,
-    songId: song.id,
+  const parsed = parsedField(song);
+
+  const attributes = {
     title: song.title,
     artist: song.artist,
     content: song.content,
-    createdAt: now,
+    contentHash: contentHash(song.content),
+    ...(song.sourceId && { sourceId: song.sourceId }),
+    ...keyFields(song),
+    ...(parsed && { parsed }),
     updatedAt: now,
     ownerEmail,  // Store owner's email
   };
+  // Optional attributes the song doesn't have are removed, as a PutItem would
+  const removed = ['key', 'keyConfidence', 'parsed'].filter(name => !(name in attributes));
+  const names = Object.fromEntries(Object.keys(attributes).concat(removed).map(name => [`#${name}`, name]));
 
-  const command = new PutCommand({
+  const command = new UpdateCommand({
     TableName: TABLE_NAME,
-    Item: item,
+    Key: {
+      userId,
+      songId: songIdFor(userId, song),
+    },
+    UpdateExpression: 'SET ' + Object.keys(attributes).map(name => `#${name} = :${name}`).join(', ') +
+      ', createdAt = if_not_exists(createdAt, :now)' +
+      (removed.length ? ' REMOVE ' + removed.map(name => `#${name}`).join(', ') : ''),
+    ExpressionAttributeNames: names,
+    ExpressionAttributeValues: {
+      ...Object.fromEntries(Object.entries(attributes).map(([name, value]) => [`:${name}`, value])),
+      ':now': now,
+    },
+    ReturnValues: 'ALL_NEW',
   });
 
-  await docClient.send(command);
-  return item;
+  const response = await docClient.send(command);
+  return response.Attributes;
+}
+
+/**
+ * createdAt of the songs among `songIds` that a user already has, by songId
+ * BatchWriteItem can only put whole items, so re-imported songs carry theirs over.
+ */
+async function existingCreatedAt(userId, songIds) {
+  const createdAt = new Map();
+  let keys = songIds.map(songId => ({ userId, songId }));
+
+  for (let attempt = 0; keys.length > 0 && attempt < BATCH_WRITE_MAX_ATTEMPTS; attempt++) {
+    if (attempt > 0) {
+      await sleep(BATCH_WRITE_BASE_DELAY_MS * 2 ** (attempt - 1));
+    }
+    let response;
+    try {
+      response = await docClient.send(new BatchGetCommand({
+        RequestItems: {
+          [TABLE_NAME]: { Keys: keys, ProjectionExpression: 'songId, createdAt' },
+        },
+      }));
+    } catch (err) {
+      // Not worth failing the write over: the rest get a fresh createdAt
+      console.error('Error reading existing createdAt:', err);
+      break;
+    }
+    for (const item of response.Responses?.[TABLE_NAME] || []) {
+      createdAt.set(item.songId, item.createdAt);
+    }
+    keys = response.UnprocessedKeys?.[TABLE_NAME]?.Keys || [];
+  }
+
+  return createdAt;
+}
+
+/**
+ * Save many new songs with BatchWriteItem.
+ * Items DynamoDB leaves unprocessed (throttling) are retried with exponential backoff.
+ * Returns one result per song: { id, status: 'saved' | 'failed', error? }
+ */
+export async function saveSongsBatch(userId, songs, ownerEmail = 'anonymous') {
+  const now = new Date().toISOString();
+  const results = [];
+
+  for (let start = 0; start < songs.length; start += BATCH_WRITE_LIMIT) {
+    const chunk = songs.slice(start, start + BATCH_WRITE_LIMIT);
+    const songIds = chunk.map(song => songIdFor(userId, song));
+    const createdAt = await existingCreatedAt(userId, songIds);
+    let pending = chunk.map((song, i) => {
+      const parsed = parsedField(song);
+      return {
+        PutRequest: {
+          Item: {
+            userId,
+            songId: songIds[i],
+            title: song.title,
+            artist: song.artist,
+            content: song.content,
+            contentHash: contentHash(song.content),
+            ...(song.sourceId && { sourceId: song.sourceId }),
+            ...keyFields(song),
+            ...(parsed && { parsed }),
+            createdAt: createdAt.get(songIds[i]) || now,
+            updatedAt: now,
+            ownerEmail,
+          },
+        },
+      };
+    });
+
+    let error = null;
+    for (let attempt = 0; pending.length > 0 && attempt < BATCH_WRITE_MAX_ATTEMPTS; attempt++) {
+      if (attempt > 0) {
+        await sleep(BATCH_WRITE_BASE_DELAY_MS * 2 ** (attempt - 1));
+      }
+
+      try {
+        const response = await docClient.send(new BatchWriteCommand({
+          RequestItems: { [TABLE_NAME]: pending },
+        }));
+        pending = response.UnprocessedItems?.[TABLE_NAME] || [];
+        error = pending.length > 0 ? 'Unprocessed after retries' : null;
+      } catch (err) {
+        // Throttled or failed as a whole: retry the same requests
+        error = err.message;
+      }
+    }
+
+    const unprocessed = new Set(pending.map(request => request.PutRequest.Item.songId));
+    for (const songId of songIds) {
+      if (unprocessed.has(songId)) {
+        results.push({ id: songId, status: 'failed', error });
+      } else {
+        results.push({ id: songId, status: 'saved' });
+      }
+    }
+  }
+
+  return results;
 }
 
 /**
@@ -111,6 +347,10 @@ export async function saveSong(userId, song, ownerEmail = 'anonymous') {
  */
 export async function updateSong(userId, song) {
   const now = new Date().toISOString();
+  // An edit without a fresh parsed form drops the stored one, which no longer matches the content
+  const parsed = parsedField(song);
+  // The key is only changed when one is sent ('key' is a reserved word, hence #key)
+  const { key, keyConfidence } = keyFields(song);
 
   const command = new UpdateCommand({
     TableName: TABLE_NAME,
@@ -118,12 +358,20 @@ export async function updateSong(userId, song) {
       userId,
       songId: song.id,
     },
-    UpdateExpression: 'SET title = :title, artist = :artist, content = :content, updatedAt = :updatedAt',
+    UpdateExpression: 'SET title = :title, artist = :artist, content = :content, contentHash = :contentHash, updatedAt = :updatedAt' +
+      (key ? ', #key = :key' : '') +
+      (keyConfidence !== undefined ? ', keyConfidence = :keyConfidence' : '') +
+      (parsed ? ', parsed = :parsed' : ' REMOVE parsed'),
+    ...(key && { ExpressionAttributeNames: { '#key': 'key' } }),
     ExpressionAttributeValues: {
       ':title': song.title,
       ':artist': song.artist,
       ':content': song.content,
+      ':contentHash': contentHash(song.content),
       ':updatedAt': now,
+      ...(key && { ':key': key }),
+      ...(keyConfidence !== undefined && { ':keyConfidence': keyConfidence }),
+      ...(parsed && { ':parsed': parsed }),
     },
     ReturnValues: 'ALL_NEW',
   });
@@ -0,0 +1,157 @@
+// @vitest-environment node
+import { describe, it, expect, beforeEach, vi } from 'vitest';
+
+const { send } = vi.hoisted(() => ({ send: vi.fn() }));
+
+// Commands just keep their input; the document client is a mock `send`
+vi.mock('@aws-sdk/client-dynamodb', () => ({
+  DynamoDBClient: class {},
+}));
+
+vi.mock('@aws-sdk/lib-dynamodb', () => {
+  const command = () => class {
+    constructor(input) {
+      this.input = input;
+    }
+  };
+  return {
+    DynamoDBDocumentClient: { from: () => ({ send }) },
+    QueryCommand: command(),
+    GetCommand: command(),
+    UpdateCommand: command(),
+    DeleteCommand: command(),
+    ScanCommand: command(),
+    BatchGetCommand: command(),
+    BatchWriteCommand: command(),
+  };
+});
+
+import { BatchGetCommand, BatchWriteCommand, GetCommand, ScanCommand } from '@aws-sdk/lib-dynamodb';
+import { getSongById, saveSongsBatch } from './_dynamodb';
+
+const TABLE = 'open-chords-songs';
+
+const songs = ['a', 'b', 'c'].map(id => ({
+  sourceId: `ug-${id}`,
+  title: `Song ${id}`,
+  artist: 'Artist',
+  content: `[Verse]\nC G\n${id}`,
+}));
+
+const writtenIds = (command) =>
+  command.input.RequestItems[TABLE].map(request => request.PutRequest.Item.songId);
+
+function respond({ existing = [], writes }) {
+  const writeResponses = [...writes];
+  send.mockImplementation(async (command) => {
+    if (command instanceof BatchGetCommand) {
+      return { Responses: { [TABLE]: existing } };
+    }
+    if (command instanceof BatchWriteCommand) {
+      const unprocessed = writeResponses.shift() ?? [];
+      const requests = command.input.RequestItems[TABLE]
+        .filter(request => unprocessed.includes(request.PutRequest.Item.songId));
+      return requests.length > 0 ? { UnprocessedItems: { [TABLE]: requests } } : {};
+    }
+    throw new Error(`Unexpected command: ${command.constructor.name}`);
+  });
+}
+
+const batchWrites = () =>
+  send.mock.calls.map(([command]) => command).filter(command => command instanceof BatchWriteCommand);
+
+describe('saveSongsBatch', () => {
+  beforeEach(() => {
+    send.mockReset();
+    vi.spyOn(console, 'error').mockImplementation(() => {});
+  });
+
+  it('should retry UnprocessedItems until every song is written', async () => {
+    respond({ writes: [['ug-b.user-1', 'ug-c.user-1'], ['ug-c.user-1'], []] });
+
+    const results = await saveSongsBatch('user-1', songs, 'user@example.com');
+
+    expect(results).toEqual(songs.map(song => ({ id: `${song.sourceId}.user-1`, status: 'saved' })));
+    expect(batchWrites().map(writtenIds)).toEqual([
+      ['ug-a.user-1', 'ug-b.user-1', 'ug-c.user-1'],
+      ['ug-b.user-1', 'ug-c.user-1'],
+      ['ug-c.user-1'],
+    ]);
+  });
+
+  it('should report songs still unprocessed after the last attempt as failed', async () => {
+    respond({ writes: Array(5).fill(['ug-b.user-1']) });
+
+    const results = await saveSongsBatch('user-1', songs);
+
+    expect(batchWrites()).toHaveLength(5);
+    expect(results).toEqual([
+      { id: 'ug-a.user-1', status: 'saved' },
+      { id: 'ug-b.user-1', status: 'failed', error: 'Unprocessed after retries' },
+      { id: 'ug-c.user-1', status: 'saved' },
+    ]);
+  });
+
+  it('should retry a batch that failed as a whole', async () => {
+    respond({ writes: [[]] });
+    send.mockImplementationOnce(async () => ({ Responses: { [TABLE]: [] } }))
+      .mockImplementationOnce(async () => {
+        throw new Error('ProvisionedThroughputExceededException');
+      });
+
+    const results = await saveSongsBatch('user-1', songs);
+
+    expect(batchWrites()).toHaveLength(2);
+    expect(results.every(result => result.status === 'saved')).toBe(true);
+  });
+
+  it('should keep createdAt of songs the user already has', async () => {
+    respond({ existing: [{ songId: 'ug-a.user-1', createdAt: '2024-01-01T00:00:00.000Z' }], writes: [[]] });
+
+    await saveSongsBatch('user-1', songs);
+
+    const items = batchWrites()[0].input.RequestItems[TABLE].map(request => request.PutRequest.Item);
+    expect(items[0].createdAt).toBe('2024-01-01T00:00:00.000Z');
+    expect(items[1].createdAt).toBe(items[1].updatedAt);
+    expect(items.every(item => item.userId === 'user-1' && item.contentHash)).toBe(true);
+  });
+
+  it('should give each user their own song for the same source', async () => {
+    respond({ writes: [[], []] });
+
+    await saveSongsBatch('user-1', songs.slice(0, 1));
+    await saveSongsBatch('user-2', songs.slice(0, 1));
+
+    const items = batchWrites().map(command => command.input.RequestItems[TABLE][0].PutRequest.Item);
+    expect(items.map(item => [item.userId, item.songId, item.sourceId])).toEqual([
+      ['user-1', 'ug-a.user-1', 'ug-a'],
+      ['user-2', 'ug-a.user-2', 'ug-a'],
+    ]);
+  });
+});
+
+describe('getSongById', () => {
+  beforeEach(() => {
+    send.mockReset();
+  });
+
+  it('should read an imported song from its owner without scanning', async () => {
+    send.mockImplementation(async (command) => ({ Item: { ...command.input.Key, title: 'Song' } }));
+
+    const song = await getSongById('ug-1755704.user-2');
+
+    expect(song).toEqual({ userId: 'user-2', songId: 'ug-1755704.user-2', title: 'Song' });
+    expect(send.mock.calls.map(([command]) => command instanceof GetCommand)).toEqual([true]);
+  });
+
+  it('should scan for songs created in the app, stopping at the first match', async () => {
+    send.mockImplementationOnce(async () => ({ Items: [], LastEvaluatedKey: { songId: 'x' } }))
+      .mockImplementationOnce(async () => ({ Items: [{ songId: '1700000000000' }], LastEvaluatedKey: { songId: 'y' } }));
+
+    const song = await getSongById('1700000000000');
+
+    expect(song).toEqual({ songId: '1700000000000' });
+    expect(send.mock.calls).toHaveLength(2);
+    expect(send.mock.calls.every(([command]) => command instanceof ScanCommand)).toBe(true);
+  });
+});
@@ -1,6 +1,7 @@
 // API endpoint: GET /api/songs - List all songs (PUBLIC)
+// API endpoint: GET /api/songs?view=hashes - List { id, sourceId, contentHash, parsedVersion } of the caller's songs (AUTH OPTIONAL)
 // API endpoint: POST /api/songs - Create a new song (AUTH REQUIRED)
-import { listSongs, listAllSongs, saveSong } from './_dynamodb.js';
+import { listSongs, listAllSongs, listSongHashes, saveSong, isValidSourceId } from './_dynamodb.js';
 import { authenticateRequest } from './_auth.js';
 
 export default async function handler(req, res) {
@@ -15,6 +16,18 @@ export default async function handler(req, res) {
 
   try {
     if (req.method === 'GET') {
+      // Only ids and content hashes - lets importers skip unchanged songs cheaply.
+      // Scoped to the songs a POST from the same caller would overwrite
+      if (req.query?.view === 'hashes') {
+        let userId = 'anonymous';
+        try {
+          userId = (await authenticateRequest(req)).userId;
+        } catch (error) {
+          // Anonymous importers see the anonymous songs
+        }
+        return res.status(200).json(await listSongHashes(userId));
+      }
+
       // List all songs - PUBLIC, no auth required
       const songs = await listAllSongs();
       // Transform songId to id for frontend compatibility
@@ -42,9 +55,12 @@ export default async function handler(req, res) {
       
       const song = req.body;
 
-      // Validate required fields
-      if (!song.id || !song.title || !song.content) {
-        return res.status(400).json({ error: 'Missing required fields: id, title, content' });
+      // Validate required fields (imported songs send a sourceId instead of an id)
+      if (!(song.id || song.sourceId) || !song.title || !song.content) {
+        return res.status(400).json({ error: 'Missing required fields: id (or sourceId), title, content' });
+      }
+      if (song.sourceId && !isValidSourceId(song.sourceId)) {
+        return res.status(400).json({ error: 'Invalid sourceId' });
       }
 
       const savedSong = await saveSong(userId, song, ownerEmail); // Pass ownerEmail as 3rd param
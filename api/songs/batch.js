@@ -0,0 +1,81 @@
+// API endpoint: POST /api/songs/batch - Create many songs at once (AUTH OPTIONAL, like POST /api/songs)
+// Body: { songs: [{ id or sourceId, title, artist, content, key?, keyConfidence?, parsed?, ... }, ...] }
+// Response: { results: [{ id, status: 'saved' | 'invalid' | 'failed', error? }], saved, failed }
+import { saveSongsBatch, songIdFor, isValidSourceId } from '../_dynamodb.js';
+import { authenticateRequest } from '../_auth.js';
+
+// Keeps a request well under the serverless body size limit
+const MAX_BATCH_SONGS = 100;
+
+export default async function handler(req, res) {
+  // Enable CORS
+  res.setHeader('Access-Control-Allow-Origin', '*');
+  res.setHeader('Access-Control-Allow-Methods', 'POST, OPTIONS');
+  res.setHeader('Access-Control-Allow-Headers', 'Content-Type, Authorization');
+
+  if (req.method === 'OPTIONS') {
+    return res.status(200).end();
+  }
+
+  if (req.method !== 'POST') {
+    return res.status(405).json({ error: 'Method not allowed' });
+  }
+
+  try {
+    let userId = 'anonymous';
+    let ownerEmail = 'anonymous';
+
+    try {
+      const authResult = await authenticateRequest(req);
+      userId = authResult.userId;
+      ownerEmail = authResult.email;
+    } catch (error) {
+      console.log('No authentication provided, creating anonymous songs');
+    }
+
+    const songs = req.body?.songs;
+
+    if (!Array.isArray(songs) || songs.length === 0) {
+      return res.status(400).json({ error: 'Body must be { songs: [...] } with at least one song' });
+    }
+
+    if (songs.length > MAX_BATCH_SONGS) {
+      return res.status(413).json({ error: `At most ${MAX_BATCH_SONGS} songs per batch` });
+    }
+
+    // Validate each song; a bad item is reported, not a reason to reject the batch
+    const results = new Array(songs.length);
+    const valid = [];
+    const seen = new Set();
+
+    songs.forEach((song, index) => {
+      const songId = song && songIdFor(userId, song);
+      if (!(song?.id || song?.sourceId) || !song.title || !song.content) {
+        results[index] = { id: song?.id ?? null, status: 'invalid', error: 'Missing required fields: id (or sourceId), title, content' };
+      } else if (song.sourceId && !isValidSourceId(song.sourceId)) {
+        results[index] = { id: null, status: 'invalid', error: 'Invalid sourceId' };
+      } else if (seen.has(songId)) {
+        // BatchWriteItem rejects the whole call when a key appears twice
+        results[index] = { id: songId, status: 'invalid', error: 'Duplicate id in batch' };
+      } else {
+        seen.add(songId);
+        valid.push({ index, song });
+      }
+    });
+
+    const saved = await saveSongsBatch(userId, valid.map(entry => entry.song), ownerEmail);
+    valid.forEach((entry, i) => {
+      results[entry.index] = saved[i];
+    });
+
+    const savedCount = results.filter(result => result.status === 'saved').length;
+    return res.status(200).json({
+      results,
+      saved: savedCount,
+      failed: results.length - savedCount,
+    });
+  } catch (error) {
+    console.error('API Error:', error);
+    return res.status(500).json({ error: 'Internal server error', message: error.message });
+  }
+}
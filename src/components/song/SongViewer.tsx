@@ -5,6 +5,7 @@ import type { ParsedLine, ParsedChordLine, ChordPosition } from '../../types/son
 
 interface SongViewerProps {
   songText: string;
+  parsedLines?: ParsedLine[] | null; // already parsed (from song.parsed); songText is parsed otherwise
   title?: string;
   artist?: string;
   isDoubleColumn?: boolean;
@@ -14,17 +15,19 @@ interface SongViewerProps {
  * SongViewer component - displays a song with chords above lyrics
  * Uses monospace font for proper alignment
  */
-function SongViewer({ songText, title, artist, isDoubleColumn = false }: SongViewerProps) {
+function SongViewer({ songText, parsedLines: preParsedLines, title, artist, isDoubleColumn = false }: SongViewerProps) {
   const [parsedLines, setParsedLines] = useState<ParsedLine[]>([]);
   const [columns, setColumns] = useState<ParsedLine[][]>([]);
   const contentRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
-    if (songText) {
+    if (preParsedLines) {
+      setParsedLines(preParsedLines);
+    } else if (songText) {
       const parsed = parseUGFormat(songText);
       setParsedLines(parsed);
     }
-  }, [songText]);
+  }, [songText, preParsedLines]);
 
   useEffect(() => {
     if (!isDoubleColumn || parsedLines.length === 0) {
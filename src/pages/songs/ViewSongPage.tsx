@@ -5,7 +5,8 @@ import UnifiedNavBar from '../../components/layout/UnifiedNavBar';
 import SongViewer from '../../components/song/SongViewer';
 import { getSong } from '../../services/storage';
 import { transposeSong } from '../../services/transposer';
-import type { Song } from '../../types/song';
+import { parseStoredSong } from '../../services/parsedSong';
+import type { Song, ParsedLine } from '../../types/song';
 
 /**
  * View Song Page - View and transpose a song (PUBLIC)
@@ -15,6 +16,7 @@ export default function ViewSongPage() {
   const { user, isAuthenticated } = useAuth();
   const [song, setSong] = useState<Song | null>(null);
   const [transposedContent, setTransposedContent] = useState('');
+  const [storedLines, setStoredLines] = useState<ParsedLine[] | null>(null);
   const [currentTranspose, setCurrentTranspose] = useState(0);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
@@ -103,8 +105,13 @@ export default function ViewSongPage() {
 
   useEffect(() => {
     if (song) {
-      const transposed = transposeSong(song.content, currentTranspose);
-      setTransposedContent(transposed);
+      // Imported songs come with their parsed lines: transposing those only touches the chords
+      const lines = parseStoredSong(song, currentTranspose);
+      setStoredLines(lines);
+      if (!lines) {
+        const transposed = transposeSong(song.content, currentTranspose);
+        setTransposedContent(transposed);
+      }
     }
   }, [currentTranspose, song]);
 
@@ -196,6 +203,7 @@ export default function ViewSongPage() {
       >
         <SongViewer
           songText={transposedContent}
+          parsedLines={storedLines}
           title={song.title}
           artist={song.artist}
           isDoubleColumn={isDoubleColumn}
@@ -0,0 +1,90 @@
+import { describe, it, expect } from 'vitest';
+import { decodeParsed, transposeEncoded, parseStoredSong, PARSED_VERSION } from './parsedSong';
+import { parseUGFormat } from './parser';
+import { transposeSong } from './transposer';
+
+const content = `[Verse 1]
+C       G       Am      F
+This is a line of lyrics
+
+[Chorus]
+F       G       C
+Chorus lyrics here`;
+
+// What the importer stores for `content` (chord_engine.encode_parsed)
+const encoded = {
+  v: PARSED_VERSION,
+  t: 'scesc',
+  c: ['C', 'G', 'Am', 'F'],
+  p: [[0, 0, 1, 8, 2, 16, 3, 24], [3, 0, 1, 8, 0, 16]],
+};
+
+describe('parsedSong service', () => {
+  describe('decodeParsed', () => {
+    it('should decode to the same lines as parseUGFormat', () => {
+      expect(decodeParsed(encoded, content)).toEqual(parseUGFormat(content));
+    });
+
+    it('should handle a trailing chord line the parser drops', () => {
+      expect(decodeParsed({ v: PARSED_VERSION, t: 'lx', c: [], p: [] }, 'Lyrics\nC  G')).toEqual(
+        parseUGFormat('Lyrics\nC  G')
+      );
+    });
+
+    it('should handle empty content', () => {
+      expect(decodeParsed({ v: PARSED_VERSION, t: '', c: [], p: [] }, '')).toEqual([]);
+    });
+
+    it('should reject a form that does not fit the content', () => {
+      expect(decodeParsed(encoded, content + '\nAnother line')).toBeNull();
+      expect(decodeParsed(encoded, '[Verse 1]')).toBeNull();
+    });
+
+    it('should reject unknown versions and missing forms', () => {
+      expect(decodeParsed({ ...encoded, v: PARSED_VERSION + 1 }, content)).toBeNull();
+      expect(decodeParsed(null, content)).toBeNull();
+      expect(decodeParsed(undefined, content)).toBeNull();
+    });
+  });
+
+  describe('transposeEncoded', () => {
+    it('should transpose the chord table', () => {
+      expect(transposeEncoded(encoded, 2).c).toEqual(['D', 'A', 'Bm', 'G']);
+      expect(transposeEncoded(encoded, 1, 'F').c).toEqual(['Db', 'Ab', 'Bbm', 'Gb']);
+    });
+
+    it('should leave positions and line types alone', () => {
+      const result = transposeEncoded(encoded, 5);
+      expect(result.t).toBe(encoded.t);
+      expect(result.p).toEqual(encoded.p);
+    });
+  });
+
+  describe('parseStoredSong', () => {
+    it('should match parsing the transposed text', () => {
+      for (const semitones of [0, 1, 2, 7, -3]) {
+        expect(parseStoredSong({ content, parsed: encoded }, semitones)).toEqual(
+          parseUGFormat(transposeSong(content, semitones))
+        );
+      }
+    });
+
+    it('should push chords apart when a transposed chord gets longer', () => {
+      const text = 'C G A\nLyrics';
+      const parsed = { v: PARSED_VERSION, t: 'c', c: ['C', 'G', 'A'], p: [[0, 0, 1, 2, 2, 4]] };
+      const result = parseStoredSong({ content: text, parsed }, 1);
+
+      expect(result[0].chords).toEqual([
+        { chord: 'C#', position: 0 },
+        { chord: 'G#', position: 3 },
+        { chord: 'A#', position: 6 },
+      ]);
+      expect(result).toEqual(parseUGFormat(transposeSong(text, 1)));
+    });
+
+    it('should return null without a usable parsed form', () => {
+      expect(parseStoredSong({ content })).toBeNull();
+      expect(parseStoredSong({ content: content + '\nMore', parsed: encoded })).toBeNull();
+    });
+  });
+});
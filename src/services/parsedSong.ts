@@ -0,0 +1,113 @@
+import { transposeChord, keyUsesFlats } from '../utils/chords';
+import type { ParsedLine, ChordPosition, EncodedParsedSong, Song } from '../types/song';
+
+/**
+ * Decoder for the compact parsed form the importer stores next to a song's
+ * content (song.parsed), so viewing a song doesn't have to re-parse it
+ */
+
+export const PARSED_VERSION = 1;
+
+/**
+ * Parsed lines from their compact form and the song's content.
+ * Returns null if the form is of an unknown version or doesn't fit the content.
+ */
+export function decodeParsed(encoded: EncodedParsedSong | null | undefined, content: string): ParsedLine[] | null {
+  if (!encoded || encoded.v !== PARSED_VERSION) return null;
+  if (!content) return encoded.t ? null : [];
+
+  const lines = content.split('\n');
+  const parsed: ParsedLine[] = [];
+  let chordLine = 0;
+  let i = 0;
+
+  for (const code of encoded.t) {
+    if (i >= lines.length) return null;
+
+    switch (code) {
+      case 'c': {
+        const pairs = encoded.p[chordLine++];
+        if (!pairs || i + 1 >= lines.length) return null;
+        const chords: ChordPosition[] = [];
+        for (let j = 0; j < pairs.length; j += 2) {
+          const chord = encoded.c[pairs[j]];
+          if (chord === undefined) return null;
+          chords.push({ chord, position: pairs[j + 1] });
+        }
+        parsed.push({ type: 'chord-line', chords, lyrics: lines[i + 1] });
+        i += 2;
+        continue;
+      }
+      case 's':
+        parsed.push({ type: 'section', content: lines[i].trim() });
+        break;
+      case 'l':
+        parsed.push({ type: 'lyric', content: lines[i] });
+        break;
+      case 'e':
+        parsed.push({ type: 'empty', content: '' });
+        break;
+      case 'x':
+        break;
+      default:
+        return null;
+    }
+    i++;
+  }
+
+  return i === lines.length ? parsed : null;
+}
+
+/**
+ * Transpose a compact parsed song; only its table of distinct chords changes
+ */
+export function transposeEncoded(
+  encoded: EncodedParsedSong,
+  semitones: number,
+  originalKey: string | null = null
+): EncodedParsedSong {
+  const useFlats = originalKey ? keyUsesFlats(originalKey) : false;
+  return {
+    ...encoded,
+    c: encoded.c.map((chord) => transposeChord(chord, semitones, useFlats)),
+  };
+}
+
+/**
+ * Columns the chords end up at once formatToUGText has written them out:
+ * a transposed chord can be longer, and chords it runs into are pushed right
+ */
+function layoutChords(chords: ChordPosition[]): ChordPosition[] {
+  const sorted = [...chords].sort((a, b) => a.position - b.position);
+  let length = 0;
+  let currentPos = 0;
+
+  return sorted.map(({ chord, position }) => {
+    const start = length + Math.max(position - currentPos, length > 0 ? 1 : 0);
+    length = start + chord.length;
+    currentPos = position + chord.length;
+    return { chord, position: start };
+  });
+}
+
+/**
+ * A song's parsed lines, transposed, from its stored parsed form.
+ * Gives the same lines as parseUGFormat(transposeSong(content, semitones, key)),
+ * or null when the song has no usable parsed form (parse its content instead).
+ */
+export function parseStoredSong(
+  song: Pick<Song, 'content' | 'parsed'>,
+  semitones = 0,
+  originalKey: string | null = null
+): ParsedLine[] | null {
+  if (!song.parsed) return null;
+
+  const parsed = decodeParsed(transposeEncoded(song.parsed, semitones, originalKey), song.content);
+  if (!parsed) return null;
+  // A lone empty line formats to '', which parses to no lines at all
+  if (parsed.length === 1 && parsed[0].type === 'empty') return [];
+
+  return parsed.map((line) =>
+    line.type === 'chord-line' ? { ...line, chords: layoutChords(line.chords) } : line
+  );
+}
@@ -8,6 +8,9 @@ export interface Song {
   title: string;
   artist: string;
   content: string;
+  key?: string; // stated on the tab, or detected from its chords by the importer
+  keyConfidence?: number; // 0-1; 1 when the tab states the key
+  parsed?: EncodedParsedSong; // set by the importer, see services/parsedSong
   type?: 'chords' | 'tabs';
   userId?: string;
   ownerEmail?: string;
@@ -48,3 +51,14 @@ export type ParsedLine =
   | ParsedChordLine
   | ParsedLyric
   | ParsedEmpty;
+
+/**
+ * Compact, versioned form of a song's parsed lines, stored next to its content.
+ * Text isn't repeated: sections and lyrics are read back from the content.
+ */
+export interface EncodedParsedSong {
+  v: number; // format version
+  t: string; // one letter per line: s(ection), c(hord-line), l(yric), e(mpty); x = dropped trailing chord line
+  c: string[]; // distinct chords, in order of first use
+  p: number[][]; // per chord-line: chord index, position, chord index, position, ...
+}